@@ -0,0 +1,361 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from headless import Backend
+
+# =====================
+# BATCH BOARD ENGINE
+# =====================
+# N boards of the same size held as stacked NumPy arrays, for simulation
+# and analytics. Follows the rules of MinesweeperBoard exactly, which
+# `python batch_board.py verify` checks against the real board.
+#
+#   python batch_board.py verify [--trials N]
+#   python batch_board.py bench [--boards N] [--width W] [--height H] [--mines M]
+
+PLAYING, WON, LOST = 0, 1, 2
+
+def padded(a: np.ndarray) -> np.ndarray:
+    """a with a one cell border of zeros around its last two axes."""
+    height, width = a.shape[-2:]
+    result = np.zeros(a.shape[:-2] + (height + 2, width + 2), dtype=a.dtype)
+    result[..., 1:-1, 1:-1] = a
+    return result
+
+def window_reduce(a: np.ndarray, op) -> np.ndarray:
+    """Combines every cell with its 3x3 neighborhood using op (add, max,
+    or), separably: rows first, then columns. Out of range cells read 0."""
+    height, width = a.shape[-2:]
+    p = padded(a)
+
+    rows = op(op(p[..., :, 0:width], p[..., :, 1:width + 1]), p[..., :, 2:width + 2])
+    return op(op(rows[..., 0:height, :], rows[..., 1:height + 1, :]), rows[..., 2:height + 2, :])
+
+def neighbor_sum(a: np.ndarray) -> np.ndarray:
+    """Sum of the 8 neighbors of every cell, a 3x3 convolution minus the center."""
+    a = a.astype(np.uint8)
+    return window_reduce(a, np.add) - a
+
+def dilate(a: np.ndarray) -> np.ndarray:
+    """Cells that are set or have a set neighbor."""
+    return window_reduce(a, np.logical_or)
+
+def flood_regions(mask: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """Cells of mask 8-connected to a seed cell, on every board in the
+    batch at once.
+
+    Each round dilates the regions found so far and keeps what lies in
+    mask. A board leaves the stack once its region stops growing, so a
+    round only costs the boards still flooding, and there are as many
+    rounds as the widest flood's radius."""
+    result = np.zeros_like(mask)
+    index = np.arange(len(mask))
+    region = seeds & mask
+
+    while index.size:
+        grown = dilate(region) & mask
+        growing = (grown != region).reshape(len(region), -1).any(axis=1)
+
+        done = ~growing
+        result[index[done]] = grown[done]
+        index, region, mask = index[growing], grown[growing], mask[growing]
+
+    return result
+
+class BatchBoard:
+    boards: int
+    width: int
+    height: int
+    mine_amount: int
+
+    # (boards, height, width)
+    mined: np.ndarray
+    counts: np.ndarray
+    uncovered: np.ndarray
+    flagged: np.ndarray
+
+    # (boards,)
+    game_state: np.ndarray
+    uncovered_tiles_amount: np.ndarray
+    flags_left: np.ndarray
+    is_first_click: np.ndarray
+
+    def __init__(self, boards, width, height, mine_amount, rng=None):
+        max_mine_amount = max(width * height - 9, 0)
+        if not 0 <= mine_amount <= max_mine_amount:
+            raise ValueError(f"mine_amount must be between 0 and {max_mine_amount}")
+
+        self.boards = boards
+        self.width = width
+        self.height = height
+        self.mine_amount = mine_amount
+        self.rng = np.random.default_rng(rng)
+
+        shape = (boards, height, width)
+        self.mined = np.zeros(shape, dtype=bool)
+        self.counts = np.zeros(shape, dtype=np.uint8)
+        self.uncovered = np.zeros(shape, dtype=bool)
+        self.flagged = np.zeros(shape, dtype=bool)
+
+        self.game_state = np.full(boards, PLAYING, dtype=np.int8)
+        self.uncovered_tiles_amount = np.zeros(boards, dtype=np.int64)
+        self.flags_left = np.full(boards, mine_amount, dtype=np.int64)
+        self.is_first_click = np.ones(boards, dtype=bool)
+
+    @classmethod
+    def from_layouts(cls, mined: np.ndarray) -> "BatchBoard":
+        """Boards with the given (boards, height, width) mine layouts, past
+        the first click."""
+        boards, height, width = mined.shape
+        mine_amounts = mined.reshape(boards, -1).sum(axis=1)
+        if boards and np.any(mine_amounts != mine_amounts[0]):
+            raise ValueError("all layouts must have the same mine amount")
+
+        batch = cls(boards, width, height, int(mine_amounts[0]) if boards else 0)
+        batch.mined[:] = mined
+        batch.counts[:] = neighbor_sum(batch.mined)
+        batch.is_first_click[:] = False
+        return batch
+
+    # --- GENERATING MINES ---
+
+    def generate_mines(self, first_click_x, first_click_y, selected=None) -> None:
+        """Places mine_amount mines on the selected boards, away from the
+        3x3 area around each board's first click."""
+        if selected is None:
+            selected = np.ones(self.boards, dtype=bool)
+        index = np.flatnonzero(selected)
+        if index.size == 0:
+            return
+
+        xs = np.broadcast_to(first_click_x, (self.boards,))[index]
+        ys = np.broadcast_to(first_click_y, (self.boards,))[index]
+
+        # Sampling without replacement: the mine_amount eligible cells with
+        # the smallest random keys. Safe cells get keys that never win
+        rows = np.arange(self.height)[None, :, None]
+        cols = np.arange(self.width)[None, None, :]
+        safe = (np.abs(rows - ys[:, None, None]) <= 1) & (np.abs(cols - xs[:, None, None]) <= 1)
+
+        keys = self.rng.random((index.size, self.height * self.width))
+        keys[safe.reshape(index.size, -1)] = 2.0
+
+        mined = np.zeros_like(keys, dtype=bool)
+        if self.mine_amount:
+            picks = np.argpartition(keys, self.mine_amount - 1, axis=1)[:, :self.mine_amount]
+            np.put_along_axis(mined, picks, True, axis=1)
+
+        mined = mined.reshape(index.size, self.height, self.width)
+        self.mined[index] = mined
+        self.counts[index] = neighbor_sum(mined)
+
+    # --- PLAYER ACTIONS ---
+
+    def uncover_tile(self, xs, ys, selected=None) -> np.ndarray:
+        """Uncovers (xs[b], ys[b]) on every selected board b still playing,
+        flooding through empty tiles. Returns the (boards, height, width)
+        mask of newly revealed tiles."""
+        xs = np.broadcast_to(np.asarray(xs), (self.boards,))
+        ys = np.broadcast_to(np.asarray(ys), (self.boards,))
+        b = np.arange(self.boards)
+        if selected is None:
+            selected = np.ones(self.boards, dtype=bool)
+
+        active = (
+            selected
+            & (self.game_state == PLAYING)
+            & ~self.uncovered[b, ys, xs]
+            & ~self.flagged[b, ys, xs]
+        )
+
+        # Generate mines on first click
+        self.generate_mines(xs, ys, active & self.is_first_click)
+        self.is_first_click &= ~active
+
+        revealed = np.zeros_like(self.mined)
+        revealed[b[active], ys[active], xs[active]] = True
+
+        # The flood passes through covered, unflagged, empty tiles connected
+        # to the start, and reveals them plus the tiles around them. Only
+        # boards whose start is such a tile flood at all
+        open_zeros = ~self.uncovered & ~self.flagged & ~self.mined & (self.counts == 0)
+        flooding = np.flatnonzero(active & open_zeros[b, ys, xs])
+
+        if flooding.size:
+            starts = np.zeros((flooding.size, self.height, self.width), dtype=bool)
+            starts[np.arange(flooding.size), ys[flooding], xs[flooding]] = True
+            region = flood_regions(open_zeros[flooding], starts)
+            flooded = dilate(region) & ~self.uncovered[flooding] & ~self.flagged[flooding]
+            revealed[flooding] |= flooded
+
+        self.uncovered |= revealed
+        self.uncovered_tiles_amount += revealed.reshape(self.boards, -1).sum(axis=1)
+
+        hit_mine = active & self.mined[b, ys, xs]
+        self.game_state[hit_mine] = LOST
+
+        tiles_amount = self.width * self.height
+        won = active & ~hit_mine & (
+            self.uncovered_tiles_amount == tiles_amount - self.mine_amount
+        )
+        self.game_state[won] = WON
+
+        return revealed
+
+    def flag_tile(self, xs, ys, selected=None) -> None:
+        """Toggles the flag at (xs[b], ys[b]) on every selected board b."""
+        xs = np.broadcast_to(np.asarray(xs), (self.boards,))
+        ys = np.broadcast_to(np.asarray(ys), (self.boards,))
+        b = np.arange(self.boards)
+        if selected is None:
+            selected = np.ones(self.boards, dtype=bool)
+
+        covered = selected & ~self.uncovered[b, ys, xs]
+        flagged = self.flagged[b, ys, xs]
+
+        remove = covered & flagged
+        place = covered & ~flagged & (self.flags_left > 0)
+
+        self.flagged[b[remove], ys[remove], xs[remove]] = False
+        self.flagged[b[place], ys[place], xs[place]] = True
+        self.flags_left += remove.astype(np.int64) - place.astype(np.int64)
+
+# =====================
+# DIFFERENTIAL CHECK
+# =====================
+
+def board_arrays(ms, board):
+    """(mined, counts, uncovered, flagged) of a MinesweeperBoard as arrays."""
+    tiles = np.frombuffer(bytes(board.tiles), dtype=np.uint8)
+    tiles = tiles.reshape(board.height, board.width)
+    Tile = ms.Tile
+    return (
+        (tiles & Tile.MINED) != 0,
+        tiles & Tile.MINE_COUNT_MASK,
+        (tiles & Tile.UNCOVERED) != 0,
+        (tiles & Tile.FLAGGED) != 0,
+    )
+
+def verify(trials, seed):
+    ms = Backend().load_game()
+    rng = random.Random(seed)
+    checked = 0
+
+    for trial in range(trials):
+        width, height = rng.randint(1, 24), rng.randint(1, 16)
+        mine_amount = rng.randint(0, ms.MinesweeperBoard.get_max_mine_amount(width, height))
+        copies = rng.randint(1, 6)
+
+        # Reference boards: the game's own mine placement
+        boards = [ms.MinesweeperBoard(width, height, mine_amount) for _ in range(copies)]
+        first = [(rng.randrange(width), rng.randrange(height)) for _ in boards]
+        for board, (x, y) in zip(boards, first):
+            random.seed(rng.random())
+            board.generate_mines(x, y)
+            board.is_first_click = False
+
+        batch = BatchBoard.from_layouts(np.stack([board_arrays(ms, board)[0] for board in boards]))
+        for board, b in zip(boards, range(copies)):
+            assert np.array_equal(board_arrays(ms, board)[1], batch.counts[b]), "counts"
+
+        # Same actions on both, first the first click
+        for step in range(rng.randint(1, 40)):
+            if step == 0:
+                actions = [("uncover", x, y) for x, y in first]
+            else:
+                actions = [
+                    (rng.choice(("uncover", "uncover", "flag")), rng.randrange(width), rng.randrange(height))
+                    for _ in boards
+                ]
+
+            xs = np.array([x for _, x, _ in actions])
+            ys = np.array([y for _, _, y in actions])
+            playing = batch.game_state == PLAYING
+
+            # A batch call takes one kind of action, so split them by kind
+            for kind in ("flag", "uncover"):
+                selected = np.array([action[0] == kind for action in actions]) & playing
+
+                for i in np.flatnonzero(selected):
+                    _, x, y = actions[i]
+                    if kind == "flag":
+                        boards[i].flag_tile(x, y)
+                    else:
+                        boards[i].uncover_tile(x, y)
+
+                if kind == "flag":
+                    batch.flag_tile(xs, ys, selected)
+                else:
+                    batch.uncover_tile(xs, ys, selected)
+
+            for i, board in enumerate(boards):
+                _, _, uncovered, flagged = board_arrays(ms, board)
+                assert np.array_equal(uncovered, batch.uncovered[i]), ("uncovered", trial, step)
+                assert np.array_equal(flagged, batch.flagged[i]), ("flagged", trial, step)
+                assert board.game_state == batch.game_state[i], ("state", trial, step)
+                assert board.flags_left == batch.flags_left[i], ("flags", trial, step)
+                assert board.uncovered_tiles_amount == batch.uncovered_tiles_amount[i]
+                checked += 1
+
+        # The batch's own placement: exact amount, safe first click area
+        generated = BatchBoard(copies, width, height, mine_amount, rng=rng.randrange(2**32))
+        xs = np.array([x for x, _ in first])
+        ys = np.array([y for _, y in first])
+        generated.uncover_tile(xs, ys)
+        per_board = generated.mined.reshape(copies, -1).sum(axis=1)
+        assert np.all(per_board == mine_amount), "mine amount"
+        for b, (x, y) in enumerate(first):
+            assert not generated.mined[b, max(y - 1, 0):y + 2, max(x - 1, 0):x + 2].any(), "safe zone"
+        assert np.array_equal(generated.counts, neighbor_sum(generated.mined)), "generated counts"
+
+    print(f"{trials} trials, {checked} board states match MinesweeperBoard")
+
+# =====================
+# BENCHMARK
+# =====================
+
+def bench(boards, width, height, mine_amount, seed):
+    ms = Backend().load_game()
+    x, y = width // 2, height // 2
+
+    random.seed(seed)
+    start = time.perf_counter()
+    for _ in range(boards):
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+        board.uncover_tile(x, y)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = BatchBoard(boards, width, height, mine_amount, rng=seed)
+    batch.uncover_tile(x, y)
+    batched = time.perf_counter() - start
+
+    print(f"{boards} boards {width}x{height}, {mine_amount} mines, generate + first click")
+    print(f"MinesweeperBoard  {boards / single:>12.0f} boards/s")
+    print(f"BatchBoard        {boards / batched:>12.0f} boards/s  ({single / batched:.1f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized batch board engine")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = commands.add_parser("verify", help="differential check against MinesweeperBoard")
+    verify_parser.add_argument("--trials", type=int, default=200)
+
+    bench_parser = commands.add_parser("bench", help="boards per second")
+    bench_parser.add_argument("--boards", type=int, default=10000)
+    bench_parser.add_argument("--width", type=int, default=30)
+    bench_parser.add_argument("--height", type=int, default=16)
+    bench_parser.add_argument("--mines", type=int, default=99)
+
+    args = parser.parse_args()
+    if args.command == "verify":
+        verify(args.trials, args.seed)
+    else:
+        bench(args.boards, args.width, args.height, args.mines, args.seed)
+
+if __name__ == "__main__":
+    main()
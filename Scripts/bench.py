@@ -0,0 +1,881 @@
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from headless import Backend
+
+# =====================
+# BENCHMARK SUITE
+# =====================
+# Runs the game against the headless backend and reports, per case, the
+# fill_rect calls, pixels written and wall time of the measured operation.
+#
+#   python bench.py [--seed S] render [--repeat N] [--count-only] [case ...]
+#   python bench.py [--seed S] memory
+#   python bench.py [--seed S] flood [--sizes N ...] [--density D] [--legacy-limit N]
+#   python bench.py [--seed S] mines [--repeat N]
+#   python bench.py [--seed S] noguess [--clicks N]
+#   python bench.py [--seed S] profile [--frames N]
+#   python bench.py [--seed S] pacing [--seconds S] [--work-ms MS]
+#   python bench.py [--seed S] tiles [--repeat N]
+#   python bench.py [--seed S] shadow [--frames N] [--games N]
+#   python bench.py [--seed S] scroll [--size N] [--density D]
+#   python bench.py [--seed S] endless [--steps N] [--density D] [--budget B]
+#                                      [--click-every N] [--chunks N]
+
+FRAME_TIME = 1 / 60
+
+CASES = []
+
+def case(name):
+    """Registers a benchmark case. The case does its setup and returns
+    the operation to measure."""
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+class Env:
+    def __init__(self, seed):
+        self.backend = Backend()
+        self.ms = self.backend.load_game()
+        self.seed = seed
+
+        self.framebuffer = self.backend.framebuffer
+        self.keyboard = self.backend.keyboard
+        self.clock = self.backend.clock
+
+    def start_game(self):
+        random.seed(self.seed)
+        self.keyboard.release_all()
+        self.ms.game.reset()
+        # Settle the input edge detectors with nothing held
+        self.ms.game.update()
+
+# --- CASES ---
+
+@case("MinesweeperManager.reset")
+def bench_game_reset(env: Env):
+    env.keyboard.release_all()
+    return env.ms.game.reset
+
+@case("MenuDisplay.reset")
+def bench_menu_reset(env: Env):
+    return env.ms.menu.menu_display.reset
+
+@case("Hud.reset")
+def bench_hud_reset(env: Env):
+    return env.ms.game.hud.reset
+
+@case("uncover (flood fill) + draw")
+def bench_flood_fill(env: Env):
+    env.start_game()
+    game = env.ms.game
+    x, y = game.board.width // 2, game.board.height // 2
+
+    def run():
+        game.board.uncover_tile(x, y)
+        game.display.draw_dirty_tiles(game.board)
+    return run
+
+@case("chord (batched flood) + draw")
+def bench_chord(env: Env):
+    env.start_game()
+    game = env.ms.game
+    board = game.board
+    Tile = env.ms.Tile
+    board.uncover_tile(board.width // 2, board.height // 2)
+
+    # Flag the mines around the first number with a covered safe neighbor
+    for i in range(len(board.tiles)):
+        if not board.tiles[i] & Tile.UNCOVERED or not board.tiles[i] & Tile.MINE_COUNT_MASK:
+            continue
+        around = list(board.neighbors(i))
+        if any(not board.tiles[j] & (Tile.UNCOVERED | Tile.MINED) for j in around):
+            for j in around:
+                if board.tiles[j] & Tile.MINED:
+                    board.flag_tile(j % board.width, j // board.width)
+            break
+    game.display.draw_dirty_tiles(board)
+    x, y = i % board.width, i // board.width
+
+    def run():
+        board.chord_tile(x, y)
+        game.display.draw_dirty_tiles(board)
+    return run
+
+@case("MinesweeperManager.update (idle)")
+def bench_update_idle(env: Env):
+    env.start_game()
+
+    def run():
+        env.clock.advance(FRAME_TIME)
+        env.ms.game.update()
+    return run
+
+@case("MinesweeperManager.update (move)")
+def bench_update_move(env: Env):
+    env.start_game()
+
+    def run():
+        env.clock.advance(FRAME_TIME)
+        env.keyboard.press(env.ms.KEY_RIGHT)
+        env.ms.game.update()
+    return run
+
+# --- BASELINES ---
+
+class LegacyTile:
+    """The one-object-per-tile layout the board used before packing."""
+
+    def __init__(self):
+        self.is_mined = False
+        self.neighboring_mine_count = 0
+
+        self.is_uncovered = False
+        self.is_flagged = False
+        self.needs_redraw = True
+
+def legacy_uncover(board, Tile, start_x, start_y):
+    """uncover_tile's original flood fill: list.pop(0), re-enqueued
+    neighbors and a visited set of tuples."""
+    tiles = board.tiles
+    w, h = board.width, board.height
+
+    queue = [(start_x, start_y)]
+    visited = set()
+
+    while queue:
+        x, y = queue.pop(0)
+
+        if (x, y) in visited:
+            continue
+        visited.add((x, y))
+
+        i = y * w + x
+        tile = tiles[i]
+        if tile & (Tile.UNCOVERED | Tile.FLAGGED):
+            continue
+
+        tiles[i] = tile | Tile.UNCOVERED
+        board.mark_uncover_dirty((i,))
+        board.uncovered_tiles_amount += 1
+
+        if tile & Tile.MINE_COUNT_MASK == 0:
+            for nx, ny in (
+                (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1),
+                (x - 1, y + 1), (x - 1, y - 1), (x + 1, y + 1), (x + 1, y - 1)
+            ):
+                if 0 <= nx < w and 0 <= ny < h:
+                    queue.append((nx, ny))
+
+def legacy_generate_mines(board, Tile, first_click_x, first_click_y):
+    """generate_mines' original rejection sampling with randint."""
+    tiles = board.tiles
+    w = board.width
+    counter = 0
+
+    while counter < board.mine_amount:
+        x = random.randint(0, board.width - 1)
+        y = random.randint(0, board.height - 1)
+        i = y * w + x
+
+        if tiles[i] & Tile.MINED:
+            continue
+        if abs(first_click_x - x) <= 1 and abs(first_click_y - y) <= 1:
+            continue
+
+        tiles[i] |= Tile.MINED
+        for j in board.neighbors(i):
+            tiles[j] += 1
+        counter += 1
+
+def legacy_draw_tile(ms, display, board, x, y):
+    """draw_tile before the render command cache: colors, borders and
+    sprite offsets worked out again on every redraw."""
+    Tile = ms.Tile
+    SpriteLibrary = ms.SpriteLibrary
+    fill_rect = ms.fill_rect
+
+    tile = board.get_tile(x, y)
+    t = display.tile_size
+    screen_x = display.offset_x + x * t
+    screen_y = display.offset_y + y * t
+
+    toggle = (x + y) % 2 == 0
+    if tile & Tile.UNCOVERED:
+        bg_color = SpriteLibrary.COLORS["uncovered_1" if toggle else "uncovered_2"]
+    else:
+        bg_color = SpriteLibrary.COLORS["covered_1" if toggle else "covered_2"]
+    fill_rect(screen_x, screen_y, t, t, bg_color)
+
+    is_uncovered = tile & Tile.UNCOVERED
+    is_mined = tile & Tile.MINED
+
+    if is_uncovered:
+        borders = [False, False, False, False]
+        for n, (nx, ny) in enumerate(((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y))):
+            neighbor = board.get_tile(nx, ny)
+            if neighbor is not None and not neighbor & Tile.UNCOVERED:
+                borders[n] = True
+
+        border_color = SpriteLibrary.COLORS["uncovered_border"]
+        w = display.BORDER_WEIGHT
+        if borders[0]:
+            fill_rect(screen_x, screen_y, t, w, border_color)
+        if borders[1]:
+            fill_rect(screen_x, screen_y + t - w, t, w, border_color)
+        if borders[2]:
+            fill_rect(screen_x, screen_y, w, t, border_color)
+        if borders[3]:
+            fill_rect(screen_x + t - w, screen_y, w, t, border_color)
+
+    num = tile & Tile.MINE_COUNT_MASK
+    if is_uncovered and num > 0 and not is_mined:
+        SpriteLibrary.draw_digit(screen_x + 7, screen_y + 6, num, display.get_num_color(num), 1)
+
+    if tile & Tile.FLAGGED:
+        SpriteLibrary.draw_sprite(screen_x, screen_y, SpriteLibrary.FLAG_SPRITE, SpriteLibrary.COLORS["flag"], 1)
+
+    if is_uncovered and is_mined:
+        SpriteLibrary.draw_sprite(screen_x, screen_y, SpriteLibrary.MINE_SPRITE, SpriteLibrary.COLORS["mine"], 1)
+
+# --- HARNESS ---
+
+def run_case(env: Env, setup, repeat):
+    walls = []
+    for _ in range(repeat):
+        operation = setup(env)
+        env.framebuffer.reset_counters()
+
+        start = time.perf_counter()
+        operation()
+        walls.append(time.perf_counter() - start)
+
+    return env.framebuffer.fill_rect_calls, env.framebuffer.pixels_written, walls
+
+def measure_allocation(build):
+    """Returns (retained, peak) bytes allocated while running build."""
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+def run_render(args):
+    env = Env(args.seed)
+    env.framebuffer.write_pixels = not args.count_only
+
+    print(f"{'case':<36} {'fill_rect':>10} {'pixels':>10} {'median ms':>10} {'min ms':>10}")
+    for name, setup in CASES:
+        if args.cases and not any(pattern in name for pattern in args.cases):
+            continue
+
+        calls, pixels, walls = run_case(env, setup, args.repeat)
+        median_ms = statistics.median(walls) * 1000
+        min_ms = min(walls) * 1000
+        print(f"{name:<36} {calls:>10} {pixels:>10} {median_ms:>10.3f} {min_ms:>10.3f}")
+
+def run_memory(args):
+    ms = Env(args.seed).ms
+
+    print(f"{'board':<10} {'layout':<14} {'retained':>12} {'peak':>12} {'reset peak':>12}")
+    for width, height in ((16, 10), (64, 64), (512, 512)):
+        mine_amount = width * height // 6
+
+        def build_legacy():
+            return [[LegacyTile() for _ in range(width)] for _ in range(height)]
+
+        def build_packed():
+            return ms.MinesweeperBoard(width, height, mine_amount)
+
+        board = build_packed()
+
+        layouts = (
+            ("list[Tile]", build_legacy, build_legacy),
+            ("bytearray", build_packed, board.reset),
+        )
+
+        label = f"{width}x{height}"
+        for layout, build, reset in layouts:
+            retained, peak = measure_allocation(build)
+            _, reset_peak = measure_allocation(reset)
+            print(f"{label:<10} {layout:<14} {retained:>12} {peak:>12} {reset_peak:>12}")
+
+def run_flood(args):
+    ms = Env(args.seed).ms
+
+    print(f"{'board':<10} {'revealed':>10} {'legacy s':>10} {'current s':>10} {'speedup':>8} {'+changes s':>11}")
+    for size in args.sizes:
+        board = ms.MinesweeperBoard(size, size, int(size * size * args.density))
+        x = y = size // 2
+
+        random.seed(args.seed)
+        board.generate_mines(x, y)
+        board.is_first_click = False
+        mined = bytes(board.tiles)
+
+        def timed(uncover):
+            board.tiles[:] = mined
+            board.dirty_tiles.clear()
+            board.uncovered_tiles_amount = 0
+
+            start = time.perf_counter()
+            uncover(x, y)
+            return time.perf_counter() - start
+
+        current = timed(board.uncover_tile)
+        revealed = board.uncovered_tiles_amount
+
+        # The same reveal building and publishing its ChangeSet
+        changes = []
+        board.subscribe(changes.append)
+        published = timed(board.uncover_tile)
+        board.unsubscribe(changes.append)
+        assert len(changes[0].indices) == revealed
+
+        label = f"{size}x{size}"
+        if size <= args.legacy_limit:
+            legacy = timed(lambda x, y: legacy_uncover(board, ms.Tile, x, y))
+            assert board.uncovered_tiles_amount == revealed
+            print(f"{label:<10} {revealed:>10} {legacy:>10.3f} {current:>10.3f} "
+                  f"{legacy / current:>7.1f}x {published:>11.3f}")
+        else:
+            print(f"{label:<10} {revealed:>10} {'skipped':>10} {current:>10.3f} {'-':>8} {published:>11.3f}")
+
+def run_mines(args):
+    ms = Env(args.seed).ms
+
+    configs = (
+        ("expert", 30, 16, 99),
+        ("expert near-full", 30, 16, 30 * 16 - 9),
+        ("100x100 20%", 100, 100, 2000),
+        ("100x100 near-full", 100, 100, 100 * 100 - 9),
+    )
+
+    print(f"{'board':<20} {'mines':>6} {'legacy ms':>10} {'current ms':>10} {'speedup':>8}")
+    for label, width, height, mine_amount in configs:
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+        x, y = width // 2, height // 2
+        random.seed(args.seed)
+
+        def timed(generate):
+            walls = []
+            for _ in range(args.repeat):
+                board.reset()
+                start = time.perf_counter()
+                generate(x, y)
+                walls.append(time.perf_counter() - start)
+            return statistics.median(walls) * 1000
+
+        legacy = timed(lambda x, y: legacy_generate_mines(board, ms.Tile, x, y))
+        current = timed(board.generate_mines)
+        print(f"{label:<20} {mine_amount:>6} {legacy:>10.3f} {current:>10.3f} {legacy / current:>7.1f}x")
+
+def run_noguess(args):
+    ms = Env(args.seed).ms
+    pool = ms.layout_pool
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+
+    print(f"{'board':<12} {'fill s':>8} {'max step ms':>12} {'layouts':>8} {'KB':>6} "
+          f"{'hit rate':>9} {'hit ms':>8} {'miss ms':>8}")
+    for label, width, height, mine_amount in (("16x10", 16, 10, 25), ("expert", 30, 16, 99)):
+        board = ms.MinesweeperBoard(width, height, mine_amount, no_guess=True)
+        config = (width, height, mine_amount)
+
+        # Filling as the menu does it, one step per idle frame
+        steps = []
+        while True:
+            start = time.perf_counter()
+            if not pool.fill_step():
+                break
+            steps.append(time.perf_counter() - start)
+        entries = pool.layouts[config]
+        size = sum(len(mines) + len(opening) for mines, opening in entries)
+
+        # First clicks on a full pool, refilled in between as the menu would
+        hits = []
+        for _ in range(args.clicks):
+            while pool.fill_step():
+                pass
+            pooled = len(entries)
+
+            board.reset()
+            start = time.perf_counter()
+            board.uncover_tile(rng.randrange(width), rng.randrange(height))
+            wall = time.perf_counter() - start
+
+            assert len(entries) < pooled, "a full pool missed a click"
+            hits.append(wall)
+
+        # First clicks on an empty pool deal ordinary mines
+        misses = []
+        ms.layout_pool = ms.LayoutPool()
+        for _ in range(args.clicks):
+            board.reset()
+            start = time.perf_counter()
+            board.uncover_tile(rng.randrange(width), rng.randrange(height))
+            misses.append(time.perf_counter() - start)
+        ms.layout_pool = pool
+
+        print(f"{label:<12} {sum(steps):>8.2f} {max(steps) * 1000:>12.2f} {len(entries):>8} "
+              f"{size / 1024:>6.1f} {len(hits) / args.clicks:>9.0%} "
+              f"{statistics.median(hits) * 1000:>8.2f} {statistics.median(misses) * 1000:>8.2f}")
+
+def play_random_frames(env: Env, rng, frames):
+    """Plays frames of random input: mostly moves, some uncovers and flags.
+    Stops early when the game ends."""
+    ms = env.ms
+    keys = (ms.KEY_UP, ms.KEY_DOWN, ms.KEY_LEFT, ms.KEY_RIGHT, ms.KEY_TOOLBOX, ms.KEY_BACKSPACE)
+    weights = (4, 4, 4, 4, 1, 1)
+
+    for _ in range(frames):
+        env.keyboard.release_all()
+        if rng.random() < 0.5:
+            env.keyboard.press(rng.choices(keys, weights)[0])
+        env.clock.advance(FRAME_TIME)
+        if ms.game.update() != ms.ProgramState.GAME:
+            return
+
+def run_profile(args):
+    env = Env(args.seed)
+    ms = env.ms
+    game = ms.game
+    rng = random.Random(args.seed)
+
+    profiler = ms.FrameProfiler(clock=time.perf_counter)
+    profiler.install()
+    game.profiler = profiler
+    env.start_game()
+    play_random_frames(env, rng, args.frames)
+    # dump already ran if the game ended
+    if game.board.game_state == ms.GameState.PLAYING:
+        profiler.dump()
+
+    # Cost of the hooks on idle frames, installed and not
+    def idle_frames():
+        env.start_game()
+        start = time.perf_counter()
+        for _ in range(1000):
+            env.clock.advance(FRAME_TIME)
+            game.update()
+        return (time.perf_counter() - start) / 1000 * 1e6
+
+    disabled = []
+    enabled = []
+    for _ in range(5):
+        game.profiler = None
+        profiler.uninstall()
+        disabled.append(idle_frames())
+
+        game.profiler = profiler
+        profiler.install()
+        enabled.append(idle_frames())
+    game.profiler = None
+    profiler.uninstall()
+
+    print()
+    print(f"idle update, profiler off  {min(disabled):>8.2f} us")
+    print(f"idle update, profiler on   {min(enabled):>8.2f} us")
+
+def run_pacing(args):
+    """Runs the game loop for simulated seconds of virtual time, each frame
+    costing --work-ms, busy-spinning or paced by FramePacer."""
+    env = Env(args.seed)
+    ms = env.ms
+    game = ms.game
+    work = args.work_ms / 1000
+    right_key = game.selector.RIGHT_KEY
+
+    # Input schedules: time -> (keys down, when they were pressed)
+    def held_right(now):
+        return [ms.KEY_RIGHT], 0.0
+
+    def idle(now):
+        return [], None
+
+    def taps(now):
+        # A 50ms press every 0.4s, alternating directions. The press
+        # times fall between polls
+        n = int(now / 0.4)
+        if now - n * 0.4 < 0.05:
+            return [(ms.KEY_RIGHT, ms.KEY_LEFT)[n % 2]], n * 0.4
+        return [], None
+
+    print(f"{'input':<8} {'loop':<6} {'frames/s':>9} {'asleep':>7} {'repeats/s':>10} "
+          f"{'max latency ms':>15}")
+    for name, keys_at in (("idle", idle), ("taps", taps), ("held", held_right)):
+        for paced in (False, True):
+            env.start_game()
+            pacer = ms.FramePacer(ms.TARGET_FPS, ms.LATENCY_BUDGET)
+            end = env.clock.now + args.seconds
+            start = env.clock.now
+
+            frames = 0
+            asleep = 0.0
+            repeats = 0
+            last_repeat = right_key.next_time
+            pressed = []
+            pressed_at = None
+            max_latency = 0.0
+
+            while env.clock.now < end:
+                keys, press_time = keys_at(env.clock.now - start)
+                if keys != pressed:
+                    env.keyboard.release_all()
+                    env.keyboard.press(*keys)
+                    if keys:
+                        pressed_at = start + press_time
+                    pressed = keys
+
+                if paced:
+                    pacer.begin_frame()
+                game.update()
+                env.clock.advance(work)
+                if game.had_input and pressed_at is not None:
+                    max_latency = max(max_latency, env.clock.now - pressed_at)
+                    pressed_at = None
+                if paced:
+                    before = env.clock.now
+                    pacer.end_frame(game.had_input, game.is_held(), game.get_wake_time())
+                    asleep += env.clock.now - before
+
+                frames += 1
+                if right_key.next_time != last_repeat:
+                    repeats += 1
+                    last_repeat = right_key.next_time
+                # Keep the selection away from the right edge
+                if game.selector.x == game.selector.max_x:
+                    game.selector.x = 0
+
+            elapsed = env.clock.now - start
+            loop = "paced" if paced else "spin"
+            print(f"{name:<8} {loop:<6} {frames / elapsed:>9.0f} {asleep / elapsed:>7.0%} "
+                  f"{repeats / elapsed:>10.1f} {max_latency * 1000:>15.1f}")
+        print()
+
+    print(f"budget {ms.LATENCY_BUDGET * 1000:.0f} ms, target {ms.TARGET_FPS} fps")
+
+def run_tiles(args):
+    """Redraws every tile of a game in progress with the legacy draw_tile
+    and the cached one. Times the tile logic alone, with fill_rect doing
+    nothing, and counts the fill_rect calls separately: draw time on the
+    desktop is mostly the headless framebuffer, not the game."""
+    env = Env(args.seed)
+    ms = env.ms
+    game = ms.game
+    board, display = game.board, game.display
+    env.framebuffer.write_pixels = False
+
+    env.start_game()
+    rng = random.Random(args.seed)
+    board.uncover_tile(board.width // 2, board.height // 2)
+    for i in range(len(board.tiles)):
+        if board.tiles[i] & ms.Tile.MINED and rng.random() < 0.5:
+            board.flag_tile(i % board.width, i // board.width)
+        elif not board.tiles[i] & ms.Tile.MINED and rng.random() < 0.3:
+            board.uncover_tile(i % board.width, i // board.width)
+    cells = [(x, y) for y in range(board.height) for x in range(board.width)]
+
+    def draw_all(draw):
+        # The cached draw_tile skips tiles already on screen
+        display.invalidate()
+        start = time.perf_counter()
+        for x, y in cells:
+            draw(x, y)
+        return time.perf_counter() - start
+
+    def count_calls(draw):
+        env.framebuffer.reset_counters()
+        draw_all(draw)
+        return env.framebuffer.fill_rect_calls / len(cells)
+
+    legacy = lambda x, y: legacy_draw_tile(ms, display, board, x, y)
+    cached = lambda x, y: display.draw_tile(board, x, y)
+    ms.MinesweeperDisplay.TILE_COMMANDS.clear()
+    legacy_calls = count_calls(legacy)
+    current_calls = count_calls(cached)
+
+    # Runs alternate so both see the same machine load, and the fastest
+    # of each is kept, the others only add scheduling noise
+    counting_fill_rect = ms.fill_rect
+    ms.fill_rect = lambda x, y, width, height, color: None
+    legacy_walls, current_walls = [], []
+    for _ in range(args.repeat):
+        legacy_walls.append(draw_all(legacy))
+        current_walls.append(draw_all(cached))
+    ms.fill_rect = counting_fill_rect
+    legacy_us = min(legacy_walls) / len(cells) * 1e6
+    current_us = min(current_walls) / len(cells) * 1e6
+
+    print(f"{len(cells)} tiles, {board.uncovered_tiles_amount} uncovered, "
+          f"{len(ms.MinesweeperDisplay.TILE_COMMANDS)} visual states cached")
+    print(f"{'draw_tile':<10} {'logic us/tile':>14} {'fill_rect/tile':>15}")
+    print(f"{'legacy':<10} {legacy_us:>14.2f} {legacy_calls:>15.2f}")
+    print(f"{'cached':<10} {current_us:>14.2f} {current_calls:>15.2f}")
+    print(f"speedup    {legacy_us / current_us:>13.1f}x")
+
+def run_shadow(args):
+    """Plays the same random games with and without the shadow framebuffer,
+    checking after every frame that both screens match."""
+    plain = Env(args.seed)
+    shadowed = Env(args.seed)
+    shadow = shadowed.ms.ShadowFramebuffer()
+    shadow.install()
+    shadowed.ms.shadow = shadow
+
+    keys = (plain.ms.KEY_UP, plain.ms.KEY_DOWN, plain.ms.KEY_LEFT, plain.ms.KEY_RIGHT,
+            plain.ms.KEY_TOOLBOX, plain.ms.KEY_BACKSPACE)
+    ratios = []
+    calls_in = calls_out = pixels_in = pixels_changed = pixels_out = 0
+    frames = worse_frames = 0
+
+    for game in range(args.games):
+        rng = random.Random(args.seed + game)
+        for env in (plain, shadowed):
+            env.seed = args.seed + game
+            env.start_game()
+            env.framebuffer.reset_counters()
+
+        for _ in range(args.frames):
+            pressed = []
+            if rng.random() < 0.5:
+                pressed = [rng.choices(keys, (4, 4, 4, 4, 1, 1))[0]]
+
+            # Both games draw their mines from the shared random module
+            state = random.getstate()
+            results = []
+            for env in (plain, shadowed):
+                random.setstate(state)
+                env.keyboard.release_all()
+                env.keyboard.press(*pressed)
+                env.clock.advance(FRAME_TIME)
+                results.append(env.ms.game.update())
+
+            assert plain.framebuffer.pixels == shadowed.framebuffer.pixels, "screens differ"
+            frames += 1
+
+            requested_calls, requested_pixels, changed, calls, pixels = shadow.last_frame
+            calls_in += requested_calls
+            pixels_in += requested_pixels
+            pixels_changed += changed
+            calls_out += calls
+            pixels_out += pixels
+            if calls > requested_calls:
+                worse_frames += 1
+            if requested_pixels:
+                ratios.append(shadow.get_overdraw_ratio())
+
+            if results[0] != plain.ms.ProgramState.GAME:
+                break
+
+    print(f"{frames} frames over {args.games} games, screens identical")
+    print(f"{'':<22} {'requested':>10} {'flushed':>10}")
+    print(f"{'fill_rect calls':<22} {calls_in:>10} {calls_out:>10}")
+    print(f"{'pixels':<22} {pixels_in:>10} {pixels_out:>10}")
+    print(f"{'pixels changed':<22} {pixels_changed:>10}")
+    print(f"frames flushing more calls than requested: {worse_frames}")
+    if ratios:
+        print(f"overdraw ratio per drawing frame  p50 {statistics.median(ratios):.1f}  "
+              f"p95 {sorted(ratios)[int(0.95 * (len(ratios) - 1))]:.1f}  max {max(ratios):.1f}")
+
+def run_scroll(args):
+    """Scrolls the view over a large board, by one tile and by two, and
+    checks each result against a full repaint."""
+    env = Env(args.seed)
+    ms = env.ms
+    framebuffer = env.framebuffer
+    size = args.size
+
+    random.seed(args.seed)
+    board = ms.MinesweeperBoard(size, size, int(size * size * args.density))
+    display = ms.MinesweeperDisplay(0, ms.HUD_HEIGHT, ms.TILE_SIZE, ms.GRID_WIDTH, ms.GRID_HEIGHT)
+    center = size // 2 - ms.GRID_WIDTH // 2
+
+    def repaint():
+        display.invalidate()
+        display.scroll_to(board, display.camera_x, display.camera_y)
+
+    def measure(label):
+        display.camera_x = display.camera_y = center
+        framebuffer.reset_counters()
+        start = time.perf_counter()
+        repaint()
+        full_ms = (time.perf_counter() - start) * 1000
+        print(f"{label:<12} {'full repaint':<14} {framebuffer.fill_rect_calls:>10} "
+              f"{framebuffer.pixels_written:>10} {full_ms:>8.3f}")
+
+        for step in (1, 2):
+            calls = pixels = 0
+            walls = []
+            moves = ((step, 0), (0, step), (-step, 0), (0, -step))
+            for dx, dy in moves:
+                display.camera_x = display.camera_y = center
+                repaint()
+
+                framebuffer.reset_counters()
+                start = time.perf_counter()
+                display.scroll_to(board, center + dx, center + dy)
+                walls.append(time.perf_counter() - start)
+                calls += framebuffer.fill_rect_calls
+                pixels += framebuffer.pixels_written
+
+                scrolled = bytes(framebuffer.pixels)
+                repaint()
+                assert framebuffer.pixels == scrolled, "scroll differs from a full repaint"
+
+            scroll = f"{step} tile" + ("s" if step > 1 else "")
+            print(f"{label:<12} {scroll:<14} {calls / len(moves):>10.1f} "
+                  f"{pixels / len(moves):>10.0f} {statistics.median(walls) * 1000:>8.3f}")
+
+    print(f"{size}x{size} board, view {ms.GRID_WIDTH}x{ms.GRID_HEIGHT}, scrolling from the middle")
+    print(f"{'board':<12} {'scroll':<14} {'fill_rect':>10} {'pixels':>10} {'ms':>8}")
+    measure("covered")
+
+    # A game in progress: the first click, then clicks on safe tiles
+    rng = random.Random(args.seed)
+    board.uncover_tile(size // 2, size // 2)
+    for _ in range(size * size // 20):
+        i = rng.randrange(size * size)
+        if not board.tiles[i] & ms.Tile.MINED:
+            board.uncover_tile(i % size, i // size)
+    measure("in progress")
+
+    # A reveal draws only what is in view, however much it uncovers
+    sparse = ms.MinesweeperBoard(size, size, size * size // 100)
+    display.reset()
+    display.draw_dirty_tiles(sparse)
+    framebuffer.reset_counters()
+    start = time.perf_counter()
+    sparse.uncover_tile(size // 2, size // 2)
+    reveal_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    display.draw_dirty_tiles(sparse)
+    draw_ms = (time.perf_counter() - start) * 1000
+    print(f"first click on 1% mines reveals {sparse.uncovered_tiles_amount} tiles: "
+          f"uncover {reveal_ms:.1f} ms, draw {framebuffer.fill_rect_calls} fill_rect in {draw_ms:.2f} ms")
+
+def run_endless(args):
+    """Walks away from the start of an endless board, looking at a view's
+    worth of tiles each step, and reports the memory held as it goes.
+    `endless.py verify` checks that evicted chunks come back intact."""
+    ms = Env(args.seed).ms
+    Tile = ms.Tile
+    rng = random.Random(args.seed)
+    view_width, view_height = ms.GRID_WIDTH, ms.GRID_HEIGHT
+
+    board = ms.EndlessBoard(args.seed, args.density, args.budget)
+    start = time.perf_counter()
+    for cx in range(args.chunks):
+        board.build_chunk(cx, 0)
+    build_ms = (time.perf_counter() - start) / args.chunks * 1000
+    print(f"chunk build: {build_ms:.3f} ms")
+
+    def walk(click_every):
+        board = ms.EndlessBoard(args.seed, args.density, args.budget)
+        x = y = 0
+        checkpoints = {args.steps * k // 4 for k in range(1, 5)}
+
+        tracemalloc.start()
+        for step in range(1, args.steps + 1):
+            x += rng.randint(-1, 3)
+            y += rng.randint(-1, 2)
+            for ty in range(y, y + view_height):
+                for tx in range(x, x + view_width):
+                    board.get_tile(tx, ty)
+
+            if click_every and step % click_every == 0:
+                tx, ty = x + rng.randrange(view_width), y + rng.randrange(view_height)
+                if not board.get_tile(tx, ty) & Tile.MINED:
+                    board.uncover_tile(tx, ty)
+
+            if step in checkpoints:
+                retained, _ = tracemalloc.get_traced_memory()
+                print(f"{click_every or '-':>6} {step:>7} {abs(x) + abs(y):>9} "
+                      f"{len(board.chunks):>7} {len(board.saved):>6} "
+                      f"{board.get_memory_usage():>9} {retained:>10}")
+        tracemalloc.stop()
+
+    print(f"density {args.density:.0%}, budget {args.budget} bytes "
+          f"({ms.EndlessBoard.CHUNK_SIZE}x{ms.EndlessBoard.CHUNK_SIZE} chunks)")
+    print(f"{'clicks':>6} {'step':>7} {'distance':>9} {'chunks':>7} {'saved':>6} "
+          f"{'tile data':>9} {'retained':>10}")
+    walk(0)
+    walk(args.click_every)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    # Without a suite, run every render case
+    parser.set_defaults(run=run_render, cases=[], repeat=20, count_only=False)
+    suites = parser.add_subparsers(dest="suite")
+
+    render = suites.add_parser("render", help="draw-call cost of game operations")
+    render.add_argument("cases", nargs="*", help="substrings of case names to run")
+    render.add_argument("--repeat", type=int, default=20)
+    render.add_argument("--count-only", action="store_true",
+        help="count draws without writing pixels, timing only the game code")
+    render.set_defaults(run=run_render)
+
+    memory = suites.add_parser("memory", help="board layout allocations")
+    memory.set_defaults(run=run_memory)
+
+    flood = suites.add_parser("flood", help="flood-fill reveal on large boards")
+    flood.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    flood.add_argument("--density", type=float, default=0.01)
+    flood.add_argument("--legacy-limit", type=int, default=1000,
+        help="largest board the quadratic legacy fill runs on")
+    flood.set_defaults(run=run_flood)
+
+    mines = suites.add_parser("mines", help="mine placement at high density")
+    mines.add_argument("--repeat", type=int, default=5)
+    mines.set_defaults(run=run_mines)
+
+    noguess = suites.add_parser("noguess", help="no-guess layout pool and first click latency")
+    noguess.add_argument("--clicks", type=int, default=40)
+    noguess.set_defaults(run=run_noguess)
+
+    profile = suites.add_parser("profile", help="FrameProfiler report of a random game")
+    profile.add_argument("--frames", type=int, default=2000)
+    profile.set_defaults(run=run_profile)
+
+    pacing = suites.add_parser("pacing", help="frame rate, sleep and input latency of the game loop")
+    pacing.add_argument("--seconds", type=float, default=10.0)
+    pacing.add_argument("--work-ms", type=float, default=1.0,
+        help="simulated cost of one frame")
+    pacing.set_defaults(run=run_pacing)
+
+    tiles = suites.add_parser("tiles", help="per tile redraw cost, legacy and cached draw_tile")
+    tiles.add_argument("--repeat", type=int, default=20)
+    tiles.set_defaults(run=run_tiles)
+
+    shadow = suites.add_parser("shadow", help="shadow framebuffer flushes and overdraw")
+    shadow.add_argument("--frames", type=int, default=600)
+    shadow.add_argument("--games", type=int, default=5)
+    shadow.set_defaults(run=run_shadow)
+
+    scroll = suites.add_parser("scroll", help="viewport scrolling over a large board")
+    scroll.add_argument("--size", type=int, default=256)
+    scroll.add_argument("--density", type=float, default=0.12)
+    scroll.set_defaults(run=run_scroll)
+
+    endless = suites.add_parser("endless", help="chunked endless board memory while wandering")
+    endless.add_argument("--steps", type=int, default=1000)
+    endless.add_argument("--density", type=float, default=0.2)
+    endless.add_argument("--budget", type=int, default=4096,
+        help="bytes of built chunks to cache, the game's default")
+    endless.add_argument("--click-every", type=int, default=10,
+        help="steps between clicks in the second walk")
+    endless.add_argument("--chunks", type=int, default=200,
+        help="chunks built to time a build")
+    endless.set_defaults(run=run_endless)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
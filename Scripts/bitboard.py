@@ -0,0 +1,457 @@
+import argparse
+import random
+import statistics
+import time
+
+from headless import Backend
+
+# =====================
+# BITBOARD ENGINE
+# =====================
+# A MinesweeperBoard seen as Python ints used as bitsets, bit i being tile
+# i = y * width + x. Neighborhood queries over the whole board become a few
+# shifts, ANDs and popcounts running in C instead of per-tile Python loops.
+# `python bitboard.py verify` checks every query against the tile path.
+#
+#   python bitboard.py verify [--trials N]
+#   python bitboard.py bench [--repeat N]
+
+class BitBoard:
+    """Bitsets of the mined, uncovered and flagged tiles of a board.
+
+    Shifting by 1 moves tiles along a row and shifting by width moves them
+    across rows. The edge masks drop what a horizontal shift carries over
+    into the next row, and the full mask what falls off the bottom."""
+
+    width: int
+    height: int
+
+    # Every tile, and every tile but the first or the last column
+    full: int
+    not_left: int
+    not_right: int
+    # Per neighbor kind, the 8 neighbors of a tile as a 3 row window
+    # starting at index - width - 1
+    neighbor_windows: list[int]
+
+    mined: int
+    uncovered: int
+    flagged: int
+
+    # (width, height) -> masks and windows
+    MASKS = {}
+
+    def __init__(self, board, Tile):
+        self.board = board
+        self.Tile = Tile
+        self.width = board.width
+        self.height = board.height
+
+        masks = BitBoard.MASKS.get((self.width, self.height))
+        if masks is None:
+            masks = BitBoard.build_masks(board)
+            BitBoard.MASKS[(self.width, self.height)] = masks
+        self.full, self.not_left, self.not_right, self.neighbor_windows = masks
+
+        # Byte -> b"1" or b"0" per state bit, for bytes.translate
+        self.tables = {
+            bit: bytes(b"1"[0] if byte & bit else b"0"[0] for byte in range(256))
+            for bit in (Tile.MINED, Tile.UNCOVERED, Tile.FLAGGED)
+        }
+        self.mined = None
+        self.mine_counts = None
+        self.sync()
+
+    @staticmethod
+    def build_masks(board):
+        w, h = board.width, board.height
+        full = (1 << (w * h)) - 1
+
+        row = (1 << w) - 1
+        rows = sum(row << (y * w) for y in range(h))
+        not_left = rows & ~sum(1 << (y * w) for y in range(h))
+        not_right = rows & ~sum(1 << (y * w + w - 1) for y in range(h))
+
+        neighbor_windows = [
+            sum(1 << (w + 1 + offset) for offset in offsets)
+            for offsets in board.neighbor_offsets
+        ]
+        return full, not_left, not_right, neighbor_windows
+
+    # --- SYNCING ---
+
+    def get_bits(self, bit) -> int:
+        # One character per tile, last tile first, parsed in C
+        digits = self.board.tiles.translate(self.tables[bit])
+        return int(digits[::-1], 2)
+
+    def sync(self) -> None:
+        """Rebuilds every bitset from the board's tiles."""
+        Tile = self.Tile
+        mined = self.get_bits(Tile.MINED)
+        if mined != self.mined:
+            self.mine_counts = None
+        self.mined = mined
+        self.uncovered = self.get_bits(Tile.UNCOVERED)
+        self.flagged = self.get_bits(Tile.FLAGGED)
+
+    def update(self, indices) -> None:
+        """Refreshes the uncovered and flagged bits of the given tiles, the
+        result of uncover_tile or a flag_tile call. Mines are placed on the
+        first click, so sync once after it."""
+        tiles = self.board.tiles
+        Tile = self.Tile
+        uncovered, flagged = self.uncovered, self.flagged
+
+        for i in indices:
+            bit = 1 << i
+            if tiles[i] & Tile.UNCOVERED:
+                uncovered |= bit
+            else:
+                uncovered &= ~bit
+            if tiles[i] & Tile.FLAGGED:
+                flagged |= bit
+            else:
+                flagged &= ~bit
+
+        self.uncovered, self.flagged = uncovered, flagged
+
+    # --- SHIFTS ---
+
+    def east(self, b) -> int:
+        return (b << 1) & self.not_left
+
+    def west(self, b) -> int:
+        return (b >> 1) & self.not_right
+
+    def south(self, b) -> int:
+        return (b << self.width) & self.full
+
+    def north(self, b) -> int:
+        return b >> self.width
+
+    def dilate(self, b) -> int:
+        """Tiles in b or next to a tile in b."""
+        row = b | self.east(b) | self.west(b)
+        return row | self.north(row) | self.south(row)
+
+    def neighborhood(self, b) -> int:
+        """Tiles next to a tile in b, but not in it."""
+        return self.dilate(b) & ~b
+
+    def neighbor_mask(self, i) -> int:
+        """The 8 (or fewer, on edges) tiles around tile i."""
+        window = self.neighbor_windows[self.board.neighbor_kinds[i]]
+        shift = i - self.width - 1
+        return window << shift if shift >= 0 else window >> -shift
+
+    # --- COUNTING ---
+
+    @staticmethod
+    def count(b) -> int:
+        return b.bit_count()
+
+    @staticmethod
+    def indices(b):
+        """Iterates over the set tiles of b, lowest index first."""
+        while b:
+            low = b & -b
+            yield low.bit_length() - 1
+            b ^= low
+
+    def neighbor_counts(self, b) -> list[int]:
+        """Per tile count of neighbors in b, bit sliced: bit i of planes[k]
+        is bit k of tile i's count. The 8 shifted copies of b go through
+        a ripple carry adder, all tiles at once."""
+        east, west = self.east(b), self.west(b)
+        shifted = (
+            east, west,
+            self.north(b), self.north(east), self.north(west),
+            self.south(b), self.south(east), self.south(west),
+        )
+
+        planes = [0, 0, 0, 0]
+        for carry in shifted:
+            for k in range(4):
+                if not carry:
+                    break
+                planes[k], carry = planes[k] ^ carry, planes[k] & carry
+        return planes
+
+    def count_equals(self, planes, n) -> int:
+        """Tiles whose bit sliced count is n."""
+        result = self.full
+        for k, plane in enumerate(planes):
+            result &= plane if n >> k & 1 else ~plane
+        return result
+
+    def count_at(self, planes, i) -> int:
+        return sum((plane >> i & 1) << k for k, plane in enumerate(planes))
+
+    def count_around(self, b, i) -> int:
+        """Neighbors of tile i in b."""
+        return (b & self.neighbor_mask(i)).bit_count()
+
+    def get_mine_counts(self) -> list[int]:
+        """Bit sliced neighboring mine counts, cached until the mines change."""
+        if self.mine_counts is None:
+            self.mine_counts = self.neighbor_counts(self.mined)
+        return self.mine_counts
+
+    # --- FRONTIER ---
+
+    def unknown(self) -> int:
+        """Covered, unflagged tiles."""
+        return self.full & ~(self.uncovered | self.flagged)
+
+    def numbers(self) -> int:
+        """Uncovered tiles with a mine around them."""
+        return self.uncovered & ~self.mined & self.dilate(self.mined)
+
+    def frontier(self) -> int:
+        """Unknown tiles next to an uncovered number."""
+        return self.unknown() & self.dilate(self.numbers())
+
+    def active_numbers(self) -> int:
+        """Uncovered numbers that still touch an unknown tile, the numbers
+        a solver reasons from."""
+        return self.numbers() & self.dilate(self.unknown())
+
+    def interior(self) -> int:
+        """Unknown tiles no number says anything about."""
+        return self.unknown() & ~self.dilate(self.numbers())
+
+    def constraints(self) -> list[tuple[int, int, int]]:
+        """(number index, unknown neighbors, mines among them) for every
+        active number, flags counted as mines."""
+        unknown = self.unknown()
+        flagged = self.flagged
+        tiles = self.board.tiles
+        count_mask = self.Tile.MINE_COUNT_MASK
+
+        result = []
+        for i in self.indices(self.active_numbers()):
+            mask = self.neighbor_mask(i)
+            mines = (tiles[i] & count_mask) - (flagged & mask).bit_count()
+            result.append((i, unknown & mask, mines))
+        return result
+
+# =====================
+# TILE PATH
+# =====================
+# The same queries as per-tile loops over MinesweeperBoard.tiles, the way
+# solver.py and MineProbabilities walk the board. They are the reference
+# for verify and the baseline for bench.
+
+def tile_unknown(board, Tile) -> set:
+    blocked = Tile.UNCOVERED | Tile.FLAGGED
+    return {i for i, tile in enumerate(board.tiles) if not tile & blocked}
+
+def tile_numbers(board, Tile) -> set:
+    return {
+        i for i, tile in enumerate(board.tiles)
+        if tile & Tile.UNCOVERED and tile & Tile.MINE_COUNT_MASK and not tile & Tile.MINED
+    }
+
+def tile_frontier(board, Tile) -> set:
+    tiles = board.tiles
+    blocked = Tile.UNCOVERED | Tile.FLAGGED
+    frontier = set()
+    for i in tile_numbers(board, Tile):
+        for j in board.neighbors(i):
+            if not tiles[j] & blocked:
+                frontier.add(j)
+    return frontier
+
+def tile_active_numbers(board, Tile) -> set:
+    tiles = board.tiles
+    blocked = Tile.UNCOVERED | Tile.FLAGGED
+    return {
+        i for i in tile_numbers(board, Tile)
+        if any(not tiles[j] & blocked for j in board.neighbors(i))
+    }
+
+def tile_constraints(board, Tile) -> list[tuple[int, set, int]]:
+    tiles = board.tiles
+    result = []
+    for i in sorted(tile_active_numbers(board, Tile)):
+        cells = set()
+        flagged = 0
+        for j in board.neighbors(i):
+            if tiles[j] & Tile.FLAGGED:
+                flagged += 1
+            elif not tiles[j] & Tile.UNCOVERED:
+                cells.add(j)
+        result.append((i, cells, (tiles[i] & Tile.MINE_COUNT_MASK) - flagged))
+    return result
+
+def tile_neighbor_counts(board, Tile, bit) -> list[int]:
+    tiles = board.tiles
+    return [
+        sum(1 for j in board.neighbors(i) if tiles[j] & bit)
+        for i in range(len(tiles))
+    ]
+
+def as_set(bitboard: BitBoard, b) -> set:
+    return set(bitboard.indices(b))
+
+# =====================
+# DIFFERENTIAL CHECK
+# =====================
+
+def play_randomly(board, ms, rng, moves) -> None:
+    """A random mix of uncovers and flags, mostly on safe tiles so games
+    last long enough to build a frontier."""
+    Tile = ms.Tile
+    w, h = board.width, board.height
+    board.uncover_tile(rng.randrange(w), rng.randrange(h))
+
+    for _ in range(moves):
+        if board.game_state != ms.GameState.PLAYING:
+            return
+        i = rng.randrange(w * h)
+        tile = board.tiles[i]
+        if tile & Tile.UNCOVERED:
+            continue
+        if tile & Tile.MINED:
+            if rng.random() < 0.5:
+                board.flag_tile(i % w, i // w)
+            elif rng.random() < 0.05:
+                board.uncover_tile(i % w, i // w)
+        elif rng.random() < 0.9:
+            board.uncover_tile(i % w, i // w)
+        else:
+            board.flag_tile(i % w, i // w)
+
+def verify(trials, seed):
+    ms = Backend().load_game()
+    Tile = ms.Tile
+    rng = random.Random(seed)
+    checked = 0
+
+    for trial in range(trials):
+        width, height = rng.randint(1, 24), rng.randint(1, 16)
+        mine_amount = rng.randint(0, ms.MinesweeperBoard.get_max_mine_amount(width, height))
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+
+        random.seed(rng.random())
+        play_randomly(board, ms, rng, rng.randint(0, 60))
+        bitboard = BitBoard(board, Tile)
+
+        # Incremental updates land on the same bits as a full sync
+        if board.game_state == ms.GameState.PLAYING:
+            i = rng.randrange(width * height)
+            revealed = board.uncover_tile(i % width, i // width)
+            bitboard.update(revealed)
+            j = rng.randrange(width * height)
+            board.flag_tile(j % width, j // width)
+            bitboard.update((j,))
+
+            synced = BitBoard(board, Tile)
+            assert (bitboard.uncovered, bitboard.flagged) == (synced.uncovered, synced.flagged), ("update", trial)
+
+        mine_counts = [tile & Tile.MINE_COUNT_MASK for tile in board.tiles]
+        planes = bitboard.get_mine_counts()
+        assert [bitboard.count_at(planes, i) for i in range(width * height)] == mine_counts, ("counts", trial)
+        for n in range(9):
+            expected = {i for i, count in enumerate(mine_counts) if count == n}
+            assert as_set(bitboard, bitboard.count_equals(planes, n)) == expected, ("count_equals", trial)
+
+        flag_counts = tile_neighbor_counts(board, Tile, Tile.FLAGGED)
+        assert [bitboard.count_around(bitboard.flagged, i) for i in range(width * height)] == flag_counts, ("around", trial)
+
+        for i in range(width * height):
+            assert as_set(bitboard, bitboard.neighbor_mask(i)) == set(board.neighbors(i)), ("mask", trial)
+
+        around_flags = {j for i in bitboard.indices(bitboard.flagged) for j in board.neighbors(i)}
+        expected = around_flags - as_set(bitboard, bitboard.flagged)
+        assert as_set(bitboard, bitboard.neighborhood(bitboard.flagged)) == expected, ("neighborhood", trial)
+
+        assert as_set(bitboard, bitboard.unknown()) == tile_unknown(board, Tile), ("unknown", trial)
+        assert as_set(bitboard, bitboard.numbers()) == tile_numbers(board, Tile), ("numbers", trial)
+        assert as_set(bitboard, bitboard.frontier()) == tile_frontier(board, Tile), ("frontier", trial)
+        assert as_set(bitboard, bitboard.active_numbers()) == tile_active_numbers(board, Tile), ("active", trial)
+        assert as_set(bitboard, bitboard.interior()) == tile_unknown(board, Tile) - tile_frontier(board, Tile)
+
+        constraints = [(i, as_set(bitboard, cells), mines) for i, cells, mines in bitboard.constraints()]
+        assert constraints == tile_constraints(board, Tile), ("constraints", trial)
+        checked += 1
+
+    print(f"{trials} trials, {checked} board states match the tile path")
+
+# =====================
+# BENCHMARK
+# =====================
+
+def time_median(operation, repeat) -> float:
+    walls = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        walls.append(time.perf_counter() - start)
+    return statistics.median(walls)
+
+def bench(repeat, seed):
+    ms = Backend().load_game()
+    Tile = ms.Tile
+
+    configs = (
+        ("expert", 30, 16, 99),
+        ("100x100", 100, 100, 2000),
+        ("500x500", 500, 500, 50000),
+    )
+
+    print(f"{'board':<10} {'query':<16} {'tile ms':>10} {'bitboard ms':>12} {'speedup':>8}")
+    for label, width, height, mine_amount in configs:
+        rng = random.Random(seed)
+        random.seed(seed)
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+        play_randomly(board, ms, rng, width * height // 4)
+        bitboard = BitBoard(board, Tile)
+
+        queries = (
+            ("sync", None, bitboard.sync),
+            ("unknown count",
+                lambda: len(tile_unknown(board, Tile)),
+                lambda: bitboard.unknown().bit_count()),
+            ("frontier",
+                lambda: tile_frontier(board, Tile),
+                bitboard.frontier),
+            ("active numbers",
+                lambda: tile_active_numbers(board, Tile),
+                bitboard.active_numbers),
+            ("constraints",
+                lambda: tile_constraints(board, Tile),
+                bitboard.constraints),
+            ("flag counts",
+                lambda: tile_neighbor_counts(board, Tile, Tile.FLAGGED),
+                lambda: bitboard.neighbor_counts(bitboard.flagged)),
+        )
+
+        for name, tile_path, bit_path in queries:
+            bit_ms = time_median(bit_path, repeat) * 1000
+            if tile_path is None:
+                print(f"{label:<10} {name:<16} {'-':>10} {bit_ms:>12.3f} {'-':>8}")
+                continue
+            tile_ms = time_median(tile_path, repeat) * 1000
+            print(f"{label:<10} {name:<16} {tile_ms:>10.3f} {bit_ms:>12.3f} {tile_ms / bit_ms:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bitboard engine")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = commands.add_parser("verify", help="differential check against the tile path")
+    verify_parser.add_argument("--trials", type=int, default=300)
+
+    bench_parser = commands.add_parser("bench", help="query times against the tile path")
+    bench_parser.add_argument("--repeat", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == "verify":
+        verify(args.trials, args.seed)
+    else:
+        bench(args.repeat, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import random
+
+from headless import Backend
+
+# =====================
+# ENDLESS BOARD
+# =====================
+# Checks EndlessBoard, the unbounded board the game plays when ENDLESS is
+# set: evicted chunks must come back exactly as a board that never evicts
+# has them. `bench.py endless` reports the memory held while wandering.
+#
+#   python endless.py [--seed S] verify [--trials N] [--budget B]
+
+def verify(trials, budget, seed):
+    """Plays the same clicks, chords and flags on a board within the
+    budget and on one that never evicts, then compares every tile the
+    player touched and their surroundings. The budgeted board must stay
+    within its chunk cap after every action."""
+    ms = Backend().load_game()
+    Tile, EndlessBoard = ms.Tile, ms.EndlessBoard
+    # Redraw marks are dropped with evicted chunks
+    state_mask = ~Tile.DIRTY
+    rng = random.Random(seed)
+    size = EndlessBoard.CHUNK_SIZE
+    max_cached = 0
+
+    for trial in range(trials):
+        board_seed = rng.randrange(1 << 30)
+        density = rng.uniform(EndlessBoard.MIN_DENSITY, 0.3)
+        board = EndlessBoard(board_seed, density, budget)
+        unbounded = EndlessBoard(board_seed, density, 1 << 30)
+
+        # A walk away from the start, clicking, chording and flagging around it
+        x = y = 0
+        touched = []
+        for _ in range(rng.randint(10, 60)):
+            x += rng.randint(-size, size)
+            y += rng.randint(-size, size)
+            tx, ty = x + rng.randint(-4, 4), y + rng.randint(-4, 4)
+
+            roll = rng.random()
+            if roll < 0.3:
+                board.flag_tile(tx, ty)
+                unbounded.flag_tile(tx, ty)
+            elif roll < 0.45:
+                revealed = board.chord_tile(tx, ty)
+                assert revealed == unbounded.chord_tile(tx, ty), ("chords differ", trial)
+            elif not unbounded.get_tile(tx, ty) & Tile.MINED:
+                revealed = board.uncover_tile(tx, ty)
+                assert revealed == unbounded.uncover_tile(tx, ty), ("reveals differ", trial)
+            touched.append((tx, ty))
+
+            assert len(board.chunks) <= board.max_chunks, ("over the chunk cap", trial)
+            max_cached = max(max_cached, len(board.chunks))
+
+        for tx, ty in touched:
+            for ny in range(ty - size, ty + size):
+                for nx in range(tx - size, tx + size):
+                    assert (board.get_tile(nx, ny) & state_mask
+                            == unbounded.get_tile(nx, ny) & state_mask), \
+                        ("chunk differs after eviction", trial, nx, ny)
+
+        assert board.uncovered_tiles_amount == unbounded.uncovered_tiles_amount
+        assert board.flags_placed == unbounded.flags_placed
+        assert board.game_state == unbounded.game_state
+
+    print(f"{trials} trials match a board that never evicts, "
+          f"at most {max_cached} chunks cached")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked endless board")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = commands.add_parser("verify", help="evicting board against one that never evicts")
+    verify_parser.add_argument("--trials", type=int, default=40)
+    verify_parser.add_argument("--budget", type=int, default=2304,
+        help="bytes of built chunks to cache, 9 chunks by default")
+
+    args = parser.parse_args()
+    verify(args.trials, args.budget, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+# =====================
+# HEADLESS BACKEND
+# =====================
+# Pure-Python stand-ins for the calculator's kandinsky, ion and time
+# modules, so the game can be driven and profiled on a desktop machine.
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 320, 222
+
+GAME_PATH = Path(__file__).with_name("minesweeper.py")
+
+# Key codes as exposed by the NumWorks ion module
+KEY_CODES = {
+    "KEY_LEFT": 0, "KEY_UP": 1, "KEY_DOWN": 2, "KEY_RIGHT": 3,
+    "KEY_OK": 4, "KEY_BACK": 5, "KEY_HOME": 6, "KEY_ONOFF": 8,
+    "KEY_SHIFT": 12, "KEY_ALPHA": 13, "KEY_XNT": 14, "KEY_VAR": 15,
+    "KEY_TOOLBOX": 16, "KEY_BACKSPACE": 17, "KEY_EXP": 18, "KEY_LN": 19,
+    "KEY_LOG": 20, "KEY_IMAGINARY": 21, "KEY_COMMA": 22, "KEY_POWER": 23,
+    "KEY_SINE": 24, "KEY_COSINE": 25, "KEY_TANGENT": 26, "KEY_PI": 27,
+    "KEY_SQRT": 28, "KEY_SQUARE": 29, "KEY_SEVEN": 30, "KEY_EIGHT": 31,
+    "KEY_NINE": 32, "KEY_LEFTPARENTHESIS": 33, "KEY_RIGHTPARENTHESIS": 34,
+    "KEY_FOUR": 36, "KEY_FIVE": 37, "KEY_SIX": 38, "KEY_MULTIPLICATION": 39,
+    "KEY_DIVISION": 40, "KEY_ONE": 42, "KEY_TWO": 43, "KEY_THREE": 44,
+    "KEY_PLUS": 45, "KEY_MINUS": 46, "KEY_ZERO": 48, "KEY_DOT": 49,
+    "KEY_EE": 50, "KEY_ANS": 51, "KEY_EXE": 52,
+}
+
+class Framebuffer:
+    """RGB framebuffer behind kandinsky.fill_rect, with draw-call counters."""
+
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height * 3)
+        # When False, draws are only counted, to time the game code alone
+        self.write_pixels = True
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.fill_rect_calls = 0
+        self.pixels_written = 0
+
+    def fill_rect(self, x, y, width, height, color):
+        self.fill_rect_calls += 1
+
+        # Clip to the screen like the firmware does
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        self.pixels_written += (x1 - x0) * (y1 - y0)
+        if not self.write_pixels:
+            return
+
+        span = bytes(color[:3]) * (x1 - x0)
+        stride = self.width * 3
+        for row in range(y0, y1):
+            start = row * stride + x0 * 3
+            self.pixels[start:start + len(span)] = span
+
+    def set_pixel(self, x, y, color):
+        self.fill_rect(x, y, 1, 1, color)
+
+    def get_pixel(self, x, y):
+        start = (y * self.width + x) * 3
+        return tuple(self.pixels[start:start + 3])
+
+class Keyboard:
+    """Scriptable ion.keydown: keys stay down until released."""
+
+    def __init__(self):
+        self.pressed = set()
+
+    def press(self, *key_codes):
+        self.pressed.update(key_codes)
+
+    def release(self, *key_codes):
+        self.pressed.difference_update(key_codes)
+
+    def release_all(self):
+        self.pressed.clear()
+
+    def keydown(self, key_code) -> bool:
+        return key_code in self.pressed
+
+class Clock:
+    """Virtual time.monotonic/time.sleep: sleeping advances time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class Backend:
+    framebuffer: Framebuffer
+    keyboard: Keyboard
+    clock: Clock
+
+    def __init__(self):
+        self.framebuffer = Framebuffer()
+        self.keyboard = Keyboard()
+        self.clock = Clock()
+
+    def install(self):
+        """Registers the kandinsky and ion stand-ins in sys.modules."""
+        kandinsky = types.ModuleType("kandinsky")
+        kandinsky.fill_rect = self.framebuffer.fill_rect
+        kandinsky.set_pixel = self.framebuffer.set_pixel
+        kandinsky.get_pixel = self.framebuffer.get_pixel
+        kandinsky.color = lambda r, g, b: (r, g, b)
+        sys.modules["kandinsky"] = kandinsky
+
+        ion = types.ModuleType("ion")
+        ion.keydown = self.keyboard.keydown
+        for name, code in KEY_CODES.items():
+            setattr(ion, name, code)
+        sys.modules["ion"] = ion
+
+    def load_game(self, path=GAME_PATH):
+        """Imports minesweeper.py against this backend without starting it."""
+        self.install()
+
+        spec = importlib.util.spec_from_file_location("minesweeper", path)
+        module = importlib.util.module_from_spec(spec)
+        # Checked by the script before it enters the menu loop
+        module.HEADLESS = True
+        spec.loader.exec_module(module)
+
+        # `from time import *` bound the real clock, swap in the virtual one
+        module.monotonic = self.clock.monotonic
+        module.sleep = self.clock.sleep
+
+        return module
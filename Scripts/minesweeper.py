@@ -11,17 +11,77 @@ from math import *
 SCREEN_WIDTH, SCREEN_HEIGHT = 320, 222
 
 HUD_HEIGHT = 22
+# Tiles visible on screen
 GRID_WIDTH, GRID_HEIGHT = 16, 10
 TILE_SIZE = 20
 
+# Boards larger than the grid scroll with the selection
+BOARD_WIDTH, BOARD_HEIGHT = GRID_WIDTH, GRID_HEIGHT
+# Tiles the view scrolls by. A scroll repaints the whole view, an even
+# step only skips slots that still look the same, like covered areas
+SCROLL_STEP = 2
+# Tiles kept between the selection and the edge of the view
+SCROLL_MARGIN = 1
+
 MINE_AMOUNT = 25
 
+# Deal only boards that can be solved without guessing, see LayoutPool
+NO_GUESS = False
+
+# Play an unbounded board instead, with mines made as the player wanders.
+# It can't be won, the HUD counts flags placed. See EndlessBoard
+ENDLESS = False
+
+# Time every frame of a game and print percentiles when it ends, see FrameProfiler
+PROFILE = False
+
+# Frame pacing of the game and menu loops, see FramePacer
+TARGET_FPS = 60
+# Longest wait, in seconds, from a key press to its result on screen
+LATENCY_BUDGET = 0.05
+
+# Draw into an off-screen copy of the screen and send only the changed
+# pixels each frame, see ShadowFramebuffer. Needs a byte per screen pixel
+SHADOW_FRAMEBUFFER = False
+
+# Keep a compact log of each game's inputs, to play it again exactly.
+# Each log is printed as a line of hex when its game ends, for
+# `python replay.py import`. Not with ENDLESS. See ReplayRecorder
+RECORD = False
+
 best_score = -1
 
 # =====================
 # INPUT
 # =====================
 
+class InputFrame:
+    """The state of every bound key and the clock, sampled once at the
+    start of a frame. The input keys read this snapshot instead of calling
+    keydown and monotonic themselves, so a frame costs one scan per bound
+    key and every key sees the same instant."""
+    # Above the highest ion key code
+    KEY_CODE_LIMIT = 64
+
+    def __init__(self):
+        self.key_codes = []
+        # Key code -> 1 while down
+        self.down = bytearray(InputFrame.KEY_CODE_LIMIT)
+        self.now = 0.0
+
+    def bind(self, key_code) -> None:
+        if key_code not in self.key_codes:
+            self.key_codes.append(key_code)
+
+    def sample(self) -> "InputFrame":
+        self.now = monotonic()
+        down = self.down
+        for key_code in self.key_codes:
+            down[key_code] = 1 if keydown(key_code) else 0
+        return self
+
+input_frame = InputFrame()
+
 class TapInputKey:
     key_code: int
     is_down: bool
@@ -29,9 +89,10 @@ class TapInputKey:
     def __init__(self, key_code):
         self.key_code = key_code
         self.is_down = False
+        input_frame.bind(key_code)
     
-    def is_triggered(self) -> bool:
-        if keydown(self.key_code):
+    def is_triggered(self, frame: InputFrame) -> bool:
+        if frame.down[self.key_code]:
             if not self.is_down:
                 self.is_down = True
                 return True
@@ -55,13 +116,14 @@ class RepeatingInputKey:
         
         self.is_down = False
         self.next_time: float = 0.0
+        input_frame.bind(key_code)
 
-    def is_triggered(self) -> bool:
-        now = monotonic()
+    def is_triggered(self, frame: InputFrame) -> bool:
+        now = frame.now
 
         is_triggered = False
 
-        if keydown(self.key_code):
+        if frame.down[self.key_code]:
             if not self.is_down:
                 # Instant trigger on tap
                 is_triggered = True
@@ -81,6 +143,7 @@ class RepeatingInputKey:
         return is_triggered
 
 class DPadSelector:
+    # max_x and max_y are None for a selector without bounds
     def __init__(self, max_x, max_y):
         self.UP_KEY = RepeatingInputKey(KEY_UP, 0.25, 0.05)
         self.DOWN_KEY = RepeatingInputKey(KEY_DOWN, 0.25, 0.05)
@@ -92,23 +155,42 @@ class DPadSelector:
         self.max_x = max_x
         self.max_y = max_y
     
-    def update(self):
+    def update(self, frame: InputFrame):
         dx, dy = 0, 0
 
-        if self.UP_KEY.is_triggered(): dy -= 1
-        if self.DOWN_KEY.is_triggered(): dy += 1
-        if self.LEFT_KEY.is_triggered(): dx -= 1
-        if self.RIGHT_KEY.is_triggered(): dx += 1
+        if self.UP_KEY.is_triggered(frame): dy -= 1
+        if self.DOWN_KEY.is_triggered(frame): dy += 1
+        if self.LEFT_KEY.is_triggered(frame): dx -= 1
+        if self.RIGHT_KEY.is_triggered(frame): dx += 1
 
-        self.x = Util.clamp(self.x + dx, 0, self.max_x)
-        self.y = Util.clamp(self.y + dy, 0, self.max_y)
+        if self.max_x is None:
+            self.x += dx
+            self.y += dy
+        else:
+            self.x = Util.clamp(self.x + dx, 0, self.max_x)
+            self.y = Util.clamp(self.y + dy, 0, self.max_y)
 
         return (self.x, self.y)
 
+    def is_held(self) -> bool:
+        return (self.UP_KEY.is_down or self.DOWN_KEY.is_down
+                or self.LEFT_KEY.is_down or self.RIGHT_KEY.is_down)
+
+    def get_next_repeat(self) -> float:
+        """Earliest time a held key repeats, None when no key is held."""
+        next_repeat = None
+        for key in (self.UP_KEY, self.DOWN_KEY, self.LEFT_KEY, self.RIGHT_KEY):
+            if key.is_down and (next_repeat is None or key.next_time < next_repeat):
+                next_repeat = key.next_time
+        return next_repeat
+
 class MinesweeperInputs:
     UNCOVER_KEY = TapInputKey(KEY_TOOLBOX)
     FLAG_KEY = TapInputKey(KEY_BACKSPACE)
     OK_KEY = TapInputKey(KEY_OK)
+    # Same key object as OK_KEY, so the press that starts a game from the
+    # menu is already seen and does not chord on the first frame
+    CHORD_KEY = OK_KEY
 
 # =====================
 # UTIL
@@ -124,24 +206,68 @@ class Util:
 # =====================
 
 class Tile:
-    def __init__(self):
-        self.is_mined = False
-        self.neighboring_mine_count = 0
-
-        self.is_uncovered = False
-        self.is_flagged = False
-        # Start with true to draw once at beginning
-        self.needs_redraw = True
+    # A tile is one byte of MinesweeperBoard.tiles: the low nibble holds
+    # the neighboring mine count and the high nibble the state flags
+    MINE_COUNT_MASK = 0x0F
+    MINED = 0x10
+    UNCOVERED = 0x20
+    FLAGGED = 0x40
+    # Already queued in MinesweeperBoard.dirty_tiles
+    DIRTY = 0x80
 
 class GameState:
     PLAYING = 0
     WON = 1
     LOST = 2
 
+class ChangeSet:
+    """The tiles one board action changed, sent to the board's
+    subscribers. indices[n] went from old_states[n] to new_states[n],
+    packed Tile bytes without DIRTY. borders are uncovered tiles next to a
+    newly uncovered one: their own state is the same, but the border they
+    drew on that side is gone.
+
+    A reset covers every tile at once and is sent with is_reset set and
+    nothing listed. Mines placed by the first click are not listed either,
+    they only show through the states of the tiles it uncovers."""
+    indices: list[int]
+    old_states: bytes
+    new_states: bytes
+    borders: list[int]
+    is_reset: bool
+
+    def __init__(self, indices, old_states, new_states, borders=(), is_reset=False):
+        self.indices = indices
+        self.old_states = old_states
+        self.new_states = new_states
+        self.borders = borders
+        self.is_reset = is_reset
+
 class MinesweeperBoard:
     width: int
     height: int
-    tiles: list[list[Tile]]
+    # Row-major, index = y * width + x
+    tiles: bytearray
+    # Indices waiting for a redraw, drained by MinesweeperDisplay
+    dirty_tiles: list[int]
+    # Set on reset, every tile is redrawn
+    full_redraw: bool
+    # Per tile, the flagged tiles around it. Kept by flag_tile so a chord
+    # is checked without looking at the neighbors
+    flagged_neighbors: bytearray
+    # Called with a ChangeSet after every action that changes tiles
+    subscribers: list
+
+    # Per tile edge kind, and per kind the index offsets of its 8 and its
+    # 4 direct neighbors. See build_neighbor_tables
+    neighbor_kinds: bytes
+    neighbor_offsets: list[tuple[int, ...]]
+    side_offsets: list[tuple[int, ...]]
+
+    # (width, height) -> neighbor tables, shared by boards and kept across resets
+    NEIGHBOR_TABLES = {}
+    # Bits of a neighbor kind, the board edges a tile touches
+    EDGE_LEFT, EDGE_RIGHT, EDGE_TOP, EDGE_BOTTOM = 1, 2, 4, 8
 
     game_state: GameState
     mine_amount: int
@@ -150,11 +276,34 @@ class MinesweeperBoard:
     flags_left: int
 
     is_first_click: bool
+    # Mines come from layout_pool instead of generate_mines
+    no_guess: bool
+
+    def __init__(self, width, height, mine_amount, no_guess=False):
+        max_mine_amount = MinesweeperBoard.get_max_mine_amount(width, height)
+        if not 0 <= mine_amount <= max_mine_amount:
+            raise ValueError(
+                "mine_amount must be between 0 and " + str(max_mine_amount)
+            )
 
-    def __init__(self, width, height, mine_amount):
         self.width = width
         self.height = height
-        self.tiles = [[Tile() for _ in range(width)] for _ in range(height)]
+        self.tiles = bytearray(width * height)
+        self.flagged_neighbors = bytearray(width * height)
+        self.dirty_tiles = []
+        self.full_redraw = True
+        self.subscribers = []
+
+        # Used to clear the board in place
+        self.blank_row = bytes(width)
+
+        tables = MinesweeperBoard.NEIGHBOR_TABLES.get((width, height))
+        if tables is None:
+            tables = MinesweeperBoard.build_neighbor_tables(width, height)
+            MinesweeperBoard.NEIGHBOR_TABLES[(width, height)] = tables
+        self.neighbor_kinds, self.neighbor_offsets, self.side_offsets = tables
+
+        self.mine_probabilities = MineProbabilities(self)
 
         self.game_state = GameState.PLAYING
         self.mine_amount = mine_amount
@@ -163,6 +312,10 @@ class MinesweeperBoard:
         self.flags_left = mine_amount
 
         self.is_first_click = True
+
+        self.no_guess = no_guess
+        if no_guess:
+            layout_pool.add_config(width, height, mine_amount)
     
     # --- ACCESS TILES ---
 
@@ -171,134 +324,1283 @@ class MinesweeperBoard:
         within_y = y >= 0 and y < self.height
         return within_x and within_y
    
-    def get_tile(self, x, y) -> Tile:
+    def get_tile(self, x, y) -> int:
+        """Returns the packed Tile byte at (x, y), None when out of bounds."""
         if self.is_within_bounds(x, y):
-            return self.tiles[y][x]
+            return self.tiles[y * self.width + x]
         else:
             return None
-        
-    # --- GENERATING MINES ---
+
+    # --- NEIGHBORS ---
+
+    @staticmethod
+    def build_neighbor_tables(width, height):
+        LEFT, RIGHT = MinesweeperBoard.EDGE_LEFT, MinesweeperBoard.EDGE_RIGHT
+        TOP, BOTTOM = MinesweeperBoard.EDGE_TOP, MinesweeperBoard.EDGE_BOTTOM
+
+        # A tile's kind is the set of board edges it touches, so edge and
+        # corner tiles get offset lists without the out of bounds neighbors
+        neighbor_offsets = []
+        side_offsets = []
+        for kind in range(16):
+            dxs = [dx for dx in (-1, 0, 1)
+                   if not (dx < 0 and kind & LEFT or dx > 0 and kind & RIGHT)]
+            dys = [dy for dy in (-1, 0, 1)
+                   if not (dy < 0 and kind & TOP or dy > 0 and kind & BOTTOM)]
+
+            neighbor_offsets.append(tuple(
+                dy * width + dx for dy in dys for dx in dxs if dx or dy
+            ))
+            side_offsets.append(tuple(
+                dy * width + dx for dy in dys for dx in dxs if (dx == 0) != (dy == 0)
+            ))
+
+        if width == 1:
+            row = bytes([LEFT | RIGHT])
+        else:
+            row = bytes([LEFT]) + bytes(width - 2) + bytes([RIGHT])
+        top_row = bytes(kind | TOP for kind in row)
+        bottom_row = bytes(kind | BOTTOM for kind in row)
+
+        if height == 1:
+            neighbor_kinds = bytes(kind | TOP | BOTTOM for kind in row)
+        else:
+            neighbor_kinds = top_row + row * (height - 2) + bottom_row
+
+        return neighbor_kinds, neighbor_offsets, side_offsets
+
+    def neighbors(self, i):
+        """Iterates over the indices of the tiles around index i."""
+        for offset in self.neighbor_offsets[self.neighbor_kinds[i]]:
+            yield i + offset
 
     def get_neighbors(self, x, y) -> list[tuple[int, int]]:
-        adj_pos = [
-            (x + 1, y), (x - 1, y), # Left / Right
-            (x, y + 1), (x, y - 1), # Top / Bottom
-            (x - 1, y + 1), (x - 1, y - 1), # Leftmost corners
-            (x + 1, y + 1), (x + 1, y - 1) # Rightmost corners
-        ]
+        w = self.width
+        return [(j % w, j // w) for j in self.neighbors(y * w + x)]
+
+    # --- REDRAW TRACKING ---
+
+    def mark_index_dirty(self, i) -> None:
+        tiles = self.tiles
+        if not tiles[i] & Tile.DIRTY:
+            tiles[i] |= Tile.DIRTY
+            self.dirty_tiles.append(i)
+
+    def mark_dirty(self, x, y) -> None:
+        self.mark_index_dirty(y * self.width + x)
+
+    def mark_uncover_dirty(self, indices) -> None:
+        # An uncovered tile draws a border on each side facing a covered
+        # tile, so uncovering also changes the borders of its direct neighbors
+        tiles = self.tiles
+        append = self.dirty_tiles.append
+        dirty = Tile.DIRTY
+        kinds = self.neighbor_kinds
+        side_offsets = self.side_offsets
+
+        for i in indices:
+            if not tiles[i] & dirty:
+                tiles[i] |= dirty
+                append(i)
+            for offset in side_offsets[kinds[i]]:
+                j = i + offset
+                if not tiles[j] & dirty:
+                    tiles[j] |= dirty
+                    append(j)
+        
+    # --- CHANGE SETS ---
 
-        valid_adj_pos = []
+    def subscribe(self, callback) -> None:
+        """Calls callback with a ChangeSet after every uncover, chord,
+        flag and reset. Without subscribers no change set is built."""
+        self.subscribers.append(callback)
 
-        for pos in adj_pos:
-            x, y = pos
-            if self.is_within_bounds(x, y):
-                valid_adj_pos.append(pos)
+    def unsubscribe(self, callback) -> None:
+        self.subscribers.remove(callback)
 
-        return valid_adj_pos
+    def publish(self, change: ChangeSet) -> None:
+        for callback in self.subscribers:
+            callback(change)
 
-    def generate_mines(self, first_click_x, first_click_y) -> None:
-        counter: int = 0
-
-        while counter < self.mine_amount:
-            x = randint(0, self.width - 1)
-            y = randint(0, self.height - 1)
-            tile = self.get_tile(x, y)
-           
-            if tile.is_mined:
-                continue
-            
-            # Don't place mines around clicked area
-            if abs(first_click_x - x) <= 1 and abs(first_click_y - y) <= 1:
-                continue
+    def get_uncover_changes(self, revealed) -> ChangeSet:
+        """The ChangeSet of a reveal, in time linear in its size."""
+        tiles = self.tiles
+        uncovered = Tile.UNCOVERED
+        state_mask = ~Tile.DIRTY
+
+        covered = ~uncovered
+
+        new_states = bytes([tiles[i] & state_mask for i in revealed])
+        old_states = bytes([state & covered for state in new_states])
+
+        # Uncovered direct neighbors from before the reveal, each once
+        seen = set(revealed)
+        borders = []
+        kinds = self.neighbor_kinds
+        side_offsets = self.side_offsets
+        for i in revealed:
+            for offset in side_offsets[kinds[i]]:
+                j = i + offset
+                if tiles[j] & uncovered and j not in seen:
+                    seen.add(j)
+                    borders.append(j)
+
+        return ChangeSet(revealed, old_states, new_states, borders)
 
-            tile.is_mined = True
+    # --- GENERATING MINES ---
 
-            # Increment neighboring mine counter
-            for nx, ny in self.get_neighbors(x, y):
-                tile = self.get_tile(nx, ny)
-                tile.neighboring_mine_count += 1
+    @staticmethod
+    def get_max_mine_amount(width, height) -> int:
+        # The first click clears up to a 3x3 area
+        return max(width * height - 9, 0)
 
-            counter += 1
+    def generate_mines(self, first_click_x, first_click_y) -> None:
+        tiles = self.tiles
+        first_click = first_click_y * self.width + first_click_x
+
+        # Every tile outside the clicked area, highest index last
+        safe_zone = [first_click]
+        safe_zone.extend(self.neighbors(first_click))
+        eligible = list(range(len(tiles)))
+        for i in sorted(safe_zone, reverse=True):
+            eligible.pop(i)
+
+        # Partial Fisher-Yates shuffle: the first mine_amount entries
+        # become a sample without replacement
+        last = len(eligible) - 1
+        for n in range(self.mine_amount):
+            k = randint(n, last)
+            i = eligible[k]
+            eligible[k] = eligible[n]
+            eligible[n] = i
+
+        self.place_mines(eligible[:self.mine_amount])
+
+    def place_mines(self, indices) -> None:
+        """Mines the tiles at indices and counts them around, in one pass
+        over the mines."""
+        tiles = self.tiles
+        mined = Tile.MINED
+        kinds = self.neighbor_kinds
+        neighbor_offsets = self.neighbor_offsets
+        for i in indices:
+            tiles[i] |= mined
+            for offset in neighbor_offsets[kinds[i]]:
+                tiles[i + offset] += 1
+
+    def place_no_guess_mines(self, first_click_x, first_click_y) -> None:
+        w, h, mine_amount = self.width, self.height, self.mine_amount
+
+        mines = layout_pool.take(w, h, mine_amount, first_click_x, first_click_y)
+        if mines is None:
+            # The pool ran dry, an ordinary safe first click beats a wait
+            self.generate_mines(first_click_x, first_click_y)
+        else:
+            self.place_mines(mines)
 
     # --- PLAYER ACTIONS ---
 
-    def uncover_tile(self, start_x, start_y):
-        tile = self.get_tile(start_x, start_y)
+    def uncover_tile(self, start_x, start_y) -> list[int]:
+        """Reveals the tile and floods through empty tiles. Returns the
+        indices of the revealed tiles, in reveal order."""
+        tiles = self.tiles
+        start = start_y * self.width + start_x
 
         # Can't uncover
-        if tile.is_uncovered or tile.is_flagged:
-            return
+        if tiles[start] & (Tile.UNCOVERED | Tile.FLAGGED):
+            return []
 
         # Generate mines on first click
         if self.is_first_click:
-            self.generate_mines(start_x, start_y)
+            if self.no_guess:
+                self.place_no_guess_mines(start_x, start_y)
+            else:
+                self.generate_mines(start_x, start_y)
             self.is_first_click = False
 
-        queue = [(start_x, start_y)]
-        visited = set()
+        return self.flood([start])
+
+    def can_chord(self, x, y) -> bool:
+        """Whether (x, y) is an uncovered number with as many flags
+        around it as mines."""
+        i = y * self.width + x
+        tile = self.tiles[i]
+        count = tile & Tile.MINE_COUNT_MASK
+        return bool(tile & Tile.UNCOVERED) and count > 0 and self.flagged_neighbors[i] == count
+
+    def chord_tile(self, x, y) -> list[int]:
+        """Uncovers every unflagged tile around a satisfied number, all in
+        one flood. Returns the indices of the revealed tiles."""
+        if not self.can_chord(x, y):
+            return []
+
+        tiles = self.tiles
+        blocked = Tile.UNCOVERED | Tile.FLAGGED
+        seeds = [j for j in self.neighbors(y * self.width + x) if not tiles[j] & blocked]
+        if not seeds:
+            return []
+
+        return self.flood(seeds)
+
+    def flood(self, seeds) -> list[int]:
+        """Uncovers the seeds, covered and unflagged tiles, and floods
+        through empty tiles from all of them together. Returns the indices
+        of the revealed tiles, in reveal order."""
+        tiles = self.tiles
+
+        # Tiles are marked uncovered when queued, so none is queued twice.
+        # The queue is consumed by index and doubles as the result
+        blocked = Tile.UNCOVERED | Tile.FLAGGED
+        uncovered = Tile.UNCOVERED
+        for i in seeds:
+            tiles[i] |= uncovered
+        revealed = list(seeds)
+        head = 0
+
+        # Lose if mine hit. Only seeds can be mined, flooding stops at
+        # numbered tiles before reaching any mine
+        mined = Tile.MINED
+        for i in seeds:
+            if tiles[i] & mined:
+                self.mark_uncover_dirty(revealed)
+                self.uncovered_tiles_amount += len(revealed)
+                self.game_state = GameState.LOST
+                if self.subscribers:
+                    self.publish(self.get_uncover_changes(revealed))
+                return revealed
 
-        while queue:
-            x, y = queue.pop(0)
+        count_mask = Tile.MINE_COUNT_MASK
+        append = revealed.append
+        kinds = self.neighbor_kinds
+        neighbor_offsets = self.neighbor_offsets
 
-            if (x, y) in visited:
-                continue
-            visited.add((x, y))
+        while head < len(revealed):
+            i = revealed[head]
+            head += 1
 
-            tile = self.get_tile(x, y)
-
-            if tile.is_uncovered or tile.is_flagged:
+            # Expand only if empty
+            if tiles[i] & count_mask:
                 continue
 
-            tile.is_uncovered = True
-            tile.needs_redraw = True
-            self.uncovered_tiles_amount += 1
+            for offset in neighbor_offsets[kinds[i]]:
+                j = i + offset
+                if not tiles[j] & blocked:
+                    tiles[j] |= uncovered
+                    append(j)
 
-            # Lose if mine hit
-            if tile.is_mined:
-                self.game_state = GameState.LOST
-                return
-
-            # Expand only if empty
-            if tile.neighboring_mine_count == 0:
-                for nx, ny in self.get_neighbors(x, y):
-                    queue.append((nx, ny))
+        self.mark_uncover_dirty(revealed)
+        self.uncovered_tiles_amount += len(revealed)
 
         # Win check
         if self.is_game_won():
             self.game_state = GameState.WON
 
+        if self.subscribers:
+            self.publish(self.get_uncover_changes(revealed))
+
+        return revealed
+
     def flag_tile(self, x, y) -> None:
-        tile = self.get_tile(x, y)
+        i = y * self.width + x
+        tile = self.tiles[i]
 
-        if tile.is_uncovered:
+        if tile & Tile.UNCOVERED:
             return
 
+        flagged_neighbors = self.flagged_neighbors
+
         # Remove flag
-        if tile.is_flagged:
-            tile.is_flagged = False
+        if tile & Tile.FLAGGED:
+            self.tiles[i] = tile & ~Tile.FLAGGED
             self.flags_left += 1
+            for j in self.neighbors(i):
+                flagged_neighbors[j] -= 1
         
         # Place flag
         else:
             # Can't place more flags
             if self.flags_left == 0:
                 return
-            tile.is_flagged = True
+            self.tiles[i] = tile | Tile.FLAGGED
             self.flags_left -= 1
+            for j in self.neighbors(i):
+                flagged_neighbors[j] += 1
         
-        tile.needs_redraw = True
+        self.mark_index_dirty(i)
+
+        if self.subscribers:
+            state_mask = ~Tile.DIRTY
+            self.publish(ChangeSet(
+                [i], bytes([tile & state_mask]), bytes([self.tiles[i] & state_mask])
+            ))
     
     def reset(self) -> None:
-        self.tiles = [[Tile() for _ in range(self.width)] for _ in range(self.height)]
+        # Clear in place, the buffer is reused across games
+        tiles = self.tiles
+        w = self.width
+        blank_row = self.blank_row
+        flagged_neighbors = self.flagged_neighbors
+        for start in range(0, len(tiles), w):
+            tiles[start:start + w] = blank_row
+            flagged_neighbors[start:start + w] = blank_row
+
+        self.dirty_tiles.clear()
+        self.full_redraw = True
+
         self.game_state = GameState.PLAYING
         self.uncovered_tiles_amount = 0
         self.flags_left = self.mine_amount
         self.is_first_click = True
+
+        if self.subscribers:
+            self.publish(ChangeSet([], b"", b"", is_reset=True))
     
+    def is_untouched(self) -> bool:
+        """Nothing uncovered or flagged since reset."""
+        return self.uncovered_tiles_amount == 0 and self.flags_left == self.mine_amount
+
     def is_game_won(self) -> bool:
         tiles_amount: int = self.width * self.height
         return (tiles_amount - self.mine_amount == self.uncovered_tiles_amount)
 
+    # --- HINTS ---
+
+    def get_mine_probabilities(self) -> list[float]:
+        """Exact mine probability of every tile, see MineProbabilities."""
+        return self.mine_probabilities.solve()
+
+class MineProbabilities:
+    """Exact mine probabilities from what the player can see, with flags
+    counted as mines.
+
+    The covered tiles next to uncovered numbers form the frontier. It is
+    split into components that share no number, and each component's
+    mine layouts are enumerated on their own, counted per amount of mines
+    used. Cells next to the same numbers are enumerated as one group, by
+    how many of them are mined. The components are then combined, each
+    total weighted by the ways to place the remaining mines in the
+    interior tiles.
+
+    Component results are memoized by their constraints, so after a move
+    only the components it touched are enumerated again. The constraints
+    themselves are kept from the board's change sets, rebuilt only around
+    the tiles that changed. The first solve subscribes to the board, so
+    games that never ask pay nothing.
+
+    `python probabilities.py verify` checks the results against brute
+    force enumeration on small boards.
+    """
+    CACHE_SIZE = 256
+    # Search nodes enumerate_component visits between yields
+    NODES_PER_STEP = 500
+
+    def __init__(self, board: MinesweeperBoard):
+        self.board = board
+        # Component constraints -> (groups of interchangeable cells,
+        # layouts by mine amount, per group mined cells by mine amount)
+        self.component_cache = {}
+        # Number tile index -> (covered unflagged cells, mines among them),
+        # None until the first solve subscribes to the board
+        self.constraints = None
+        # Tiles changed since the constraints were last brought up to date
+        self.changed = []
+
+    @staticmethod
+    def comb(n, k) -> int:
+        if k < 0 or k > n:
+            return 0
+        k = min(k, n - k)
+        result = 1
+        for i in range(k):
+            result = result * (n - i) // (i + 1)
+        return result
+
+    @staticmethod
+    def convolve(a: list[int], b: list[int]) -> list[int]:
+        result = [0] * (len(a) + len(b) - 1)
+        for i in range(len(a)):
+            if a[i]:
+                for j in range(len(b)):
+                    result[i + j] += a[i] * b[j]
+        return result
+
+    def on_change(self, change: ChangeSet) -> None:
+        if change.is_reset:
+            # Everything is covered again, no number constrains anything
+            self.constraints = {}
+            self.changed.clear()
+        else:
+            self.changed.extend(change.indices)
+
+    def get_constraint(self, i) -> tuple[tuple[int, ...], int]:
+        """(covered unflagged cells, mines among them) of the number at
+        i, None when i is not a number touching a covered tile."""
+        board = self.board
+        tiles = board.tiles
+        tile = tiles[i]
+        count = tile & Tile.MINE_COUNT_MASK
+        if not tile & Tile.UNCOVERED or tile & Tile.MINED or count == 0:
+            return None
+
+        cells = []
+        for offset in board.neighbor_offsets[board.neighbor_kinds[i]]:
+            neighbor = tiles[i + offset]
+            if neighbor & Tile.FLAGGED:
+                count -= 1
+            elif not neighbor & Tile.UNCOVERED:
+                cells.append(i + offset)
+
+        if not cells:
+            return None
+        return (tuple(cells), count)
+
+    def get_constraints(self) -> list[tuple[tuple[int, ...], int]]:
+        """(covered unflagged cells, mines among them) per frontier number."""
+        board = self.board
+        constraints = self.constraints
+
+        if constraints is None:
+            # First call: every tile, then only what change sets report
+            board.subscribe(self.on_change)
+            constraints = self.constraints = {}
+            stale = range(len(board.tiles))
+        else:
+            # A tile's change only affects itself and the numbers around it
+            stale = set()
+            for i in self.changed:
+                stale.add(i)
+                stale.update(board.neighbors(i))
+            self.changed.clear()
+
+        for i in stale:
+            constraint = self.get_constraint(i)
+            if constraint is None:
+                constraints.pop(i, None)
+            else:
+                constraints[i] = constraint
+
+        return list(constraints.values())
+
+    def get_components(self, constraints) -> list[tuple]:
+        """Groups constraints that share cells, each group sorted."""
+        by_cell = {}
+        for n, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                by_cell.setdefault(cell, []).append(n)
+
+        seen = [False] * len(constraints)
+        components = []
+        for n in range(len(constraints)):
+            if seen[n]:
+                continue
+            seen[n] = True
+            group = [n]
+            head = 0
+            while head < len(group):
+                for cell in constraints[group[head]][0]:
+                    for other in by_cell[cell]:
+                        if not seen[other]:
+                            seen[other] = True
+                            group.append(other)
+                head += 1
+            components.append(tuple(sorted(constraints[k] for k in group)))
+
+        return components
+
+    def solve_component(self, component):
+        cached = self.component_cache.get(component)
+        if cached is None:
+            for _ in self.enumerate_component(component):
+                pass
+            cached = self.component_cache[component]
+        return cached
+
+    def enumerate_component(self, component):
+        """Enumerates the component's layouts into component_cache,
+        yielding every NODES_PER_STEP search nodes so callers can spread
+        the work over frames. Does nothing if it is already cached."""
+        if component in self.component_cache:
+            return
+
+        # Cells touching the same constraints are interchangeable, so
+        # each such group is one variable: how many of its cells are
+        # mined, m of g in comb(g, m) ways. Groups are in order of first
+        # appearance, which keeps constraints tight early
+        cell_group = {}
+        for k, (constraint_cells, _) in enumerate(component):
+            for cell in constraint_cells:
+                cell_group.setdefault(cell, []).append(k)
+        group_index = {}
+        groups = []
+        group_constraints = []
+        for constraint_cells, _ in component:
+            for cell in constraint_cells:
+                key = tuple(cell_group[cell])
+                n = group_index.get(key)
+                if n is None:
+                    n = group_index[key] = len(groups)
+                    groups.append([])
+                    group_constraints.append(key)
+                if cell not in groups[n]:
+                    groups[n].append(cell)
+
+        size = len(groups)
+        sizes = [len(cells) for cells in groups]
+        ways = [[self.comb(g, m) for m in range(g + 1)] for g in sizes]
+        # Cells in the groups after each one, the most mines they can add
+        later_cells = [0] * (size + 1)
+        for n in range(size - 1, -1, -1):
+            later_cells[n] = later_cells[n + 1] + sizes[n]
+
+        need = [mines for _, mines in component]
+        placed = [0] * len(component)
+        open_cells = [len(constraint_cells) for constraint_cells, _ in component]
+
+        cells_amount = later_cells[0]
+        layouts = [0] * (cells_amount + 1)
+        # Per group, mined cells summed over its layouts, by mine amount
+        group_mined = [[0] * size for _ in range(cells_amount + 1)]
+
+        # Iterative backtracking, choice is -1 untried, else the mines in
+        # the group. weight[n] is the layouts the choices before n stand
+        # for. A group's mined counts come from the layouts its subtree
+        # added, compared with snapshot when it was entered
+        choice = [-1] * size
+        weight = [1] * (size + 1)
+        snapshot = [None] * size
+        mines = 0
+        pos = 0
+        nodes = 0
+        while pos >= 0:
+            nodes += 1
+            if nodes == MineProbabilities.NODES_PER_STEP:
+                nodes = 0
+                yield
+
+            if pos == size:
+                layouts[mines] += weight[size]
+                pos -= 1
+                continue
+
+            g = sizes[pos]
+            value = choice[pos]
+            if value >= 0:
+                for k in group_constraints[pos]:
+                    placed[k] -= value
+                    open_cells[k] += g
+                previous = snapshot[pos]
+                if previous is not None:
+                    snapshot[pos] = None
+                    for j in range(len(previous)):
+                        added = layouts[mines + j] - previous[j]
+                        if added:
+                            group_mined[mines + j][pos] += added * value
+                mines -= value
+                if value == g:
+                    choice[pos] = -1
+                    pos -= 1
+                    continue
+
+            value += 1
+            choice[pos] = value
+            mines += value
+            is_valid = True
+            for k in group_constraints[pos]:
+                open_cells[k] -= g
+                placed[k] += value
+                if placed[k] > need[k] or placed[k] + open_cells[k] < need[k]:
+                    is_valid = False
+            if is_valid:
+                if value:
+                    snapshot[pos] = layouts[mines:mines + later_cells[pos + 1] + 1]
+                weight[pos + 1] = weight[pos] * ways[pos][value]
+                pos += 1
+
+        cache = self.component_cache
+        if len(cache) >= self.CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[component] = (groups, layouts, group_mined)
+
+    def solve(self) -> list[float]:
+        """Returns the mine probability of each tile by index: 0.0 for
+        uncovered tiles, 1.0 for flags. Returns None when no layout agrees
+        with the numbers and flags."""
+        board = self.board
+        tiles = board.tiles
+        tiles_amount = len(tiles)
+
+        if board.is_first_click:
+            return [board.mine_amount / tiles_amount] * tiles_amount
+
+        mines_left = board.mine_amount
+        unknown = 0
+        for tile in tiles:
+            if tile & Tile.FLAGGED or tile & Tile.UNCOVERED and tile & Tile.MINED:
+                mines_left -= 1
+            elif not tile & Tile.UNCOVERED:
+                unknown += 1
+
+        results = [
+            self.solve_component(component)
+            for component in self.get_components(self.get_constraints())
+        ]
+        interior = unknown - sum(len(cells) for groups, _, _ in results for cells in groups)
+
+        # Layout counts of every component but one, via prefix and suffix products
+        prefix = [[1]]
+        for _, layouts, _ in results:
+            prefix.append(self.convolve(prefix[-1], layouts))
+        suffix = [[1]]
+        for _, layouts, _ in reversed(results):
+            suffix.append(self.convolve(suffix[-1], layouts))
+        suffix.reverse()
+
+        frontier = prefix[-1]
+        # Ways to place the rest of the mines in the interior, by mines
+        # on the frontier: C(interior, j) stepped down to C(interior, j - 1)
+        interior_ways = [0] * len(frontier)
+        j = min(mines_left, interior)
+        ways = self.comb(interior, j)
+        for f in range(mines_left - j, min(len(frontier), mines_left + 1)):
+            interior_ways[f] = ways
+            ways = ways * j // (interior - j + 1)
+            j -= 1
+
+        total = 0
+        interior_mined = 0
+        for f in range(len(frontier)):
+            total += frontier[f] * interior_ways[f]
+            # C(interior - 1, j - 1) = C(interior, j) * j / interior
+            if interior:
+                interior_mined += frontier[f] * (interior_ways[f] * (mines_left - f) // interior)
+        if total == 0:
+            return None
+
+        probabilities = [0.0] * tiles_amount
+        for i in range(tiles_amount):
+            if tiles[i] & Tile.FLAGGED:
+                probabilities[i] = 1.0
+            elif not tiles[i] & Tile.UNCOVERED:
+                probabilities[i] = interior_mined / total
+
+        for n, (groups, layouts, group_mined) in enumerate(results):
+            rest = self.convolve(prefix[n], suffix[n + 1])
+
+            # Weight of every layout using k mines in this component
+            weights = []
+            for k in range(len(layouts)):
+                weight = 0
+                if layouts[k]:
+                    for f in range(len(rest)):
+                        weight += rest[f] * interior_ways[k + f]
+                weights.append(weight)
+
+            # A group's cells share its mined count evenly
+            for c in range(len(groups)):
+                mined = 0
+                for k in range(len(layouts)):
+                    if group_mined[k][c]:
+                        mined += group_mined[k][c] * weights[k]
+                probability = mined / (total * len(groups[c]))
+                for cell in groups[c]:
+                    probabilities[cell] = probability
+
+        return probabilities
+
+class LayoutPool:
+    """Mine layouts that can be solved from the first click without ever
+    guessing, generated ahead of time so a no-guess first click does not
+    wait on generation.
+
+    A layout is checked by playing it from its first click, each round
+    uncovering every tile with a mine probability of 0 and flagging every
+    tile with 1. It passes if that wins the game.
+
+    Clicking any empty tile of the first click's opening reveals the same
+    opening, so a layout serves every click on one of those tiles, in any
+    of its four mirrorings. The pool is full once every tile of the top
+    left quarter, which stands for its mirrors, is covered by
+    LAYOUTS_PER_CELL layouts. A click on a full pool always finds one.
+
+    The pool has no thread to fill it: fill_step does a bounded step of
+    work, and MenuManager.update calls it on idle frames. A first click
+    that finds no layout gets ordinary mines instead of waiting.
+    """
+    LAYOUTS_PER_CELL = 1
+
+    def __init__(self):
+        # (width, height, mines) -> list of (mines, opening) bitmasks by
+        # tile index, as generated
+        self.layouts = {}
+        # (width, height, mines) -> per top left quarter tile, how many
+        # layouts cover it
+        self.coverage = {}
+        # (width, height, mines) of the boards played in no-guess mode
+        self.configs = []
+
+        # The attempt fill_step is working on, a generator
+        self.attempt = None
+        self.scratch = None
+        # Quarter tile the last attempt was for, the next starts after it
+        self.last_cell = -1
+
+    def add_config(self, width, height, mine_amount) -> None:
+        config = (width, height, mine_amount)
+        if config not in self.configs:
+            self.configs.append(config)
+            self.layouts[config] = []
+            self.coverage[config] = bytearray(((width + 1) // 2) * ((height + 1) // 2))
+
+    # --- BITMASKS ---
+
+    @staticmethod
+    def to_bits(size, indices) -> bytes:
+        bits = bytearray((size + 7) >> 3)
+        for i in indices:
+            bits[i >> 3] |= 1 << (i & 7)
+        return bytes(bits)
+
+    @staticmethod
+    def has_bit(bits, i) -> bool:
+        return bits[i >> 3] >> (i & 7) & 1
+
+    # --- USING LAYOUTS ---
+
+    def take(self, width, height, mine_amount, x, y) -> list[int]:
+        """Removes a pooled layout whose opening contains (x, y) in some
+        mirroring. Returns its mine indices mirrored for that click, None
+        if there is none."""
+        config = (width, height, mine_amount)
+        entries = self.layouts.get(config, ())
+
+        for n in range(len(entries)):
+            mines, opening = entries[n]
+            for flip_x in (False, True):
+                for flip_y in (False, True):
+                    sx = width - 1 - x if flip_x else x
+                    sy = height - 1 - y if flip_y else y
+                    if LayoutPool.has_bit(opening, sy * width + sx):
+                        entries.pop(n)
+                        self.count_coverage(config, opening, -1)
+                        return LayoutPool.flip(mines, width, height, flip_x, flip_y)
+        return None
+
+    @staticmethod
+    def flip(mines, width, height, flip_x, flip_y) -> list[int]:
+        indices = []
+        for i in range(width * height):
+            if LayoutPool.has_bit(mines, i):
+                x, y = i % width, i // width
+                if flip_x:
+                    x = width - 1 - x
+                if flip_y:
+                    y = height - 1 - y
+                indices.append(y * width + x)
+        return indices
+
+    def count_coverage(self, config, opening, amount) -> None:
+        """Adds amount to the coverage of every quarter tile the opening
+        reaches, once per layout."""
+        width, height, _ = config
+        quarter_width = (width + 1) // 2
+        coverage = self.coverage[config]
+
+        cells = set()
+        for i in range(width * height):
+            if LayoutPool.has_bit(opening, i):
+                x, y = i % width, i // width
+                x = min(x, width - 1 - x)
+                y = min(y, height - 1 - y)
+                cells.add(y * quarter_width + x)
+        for cell in cells:
+            coverage[cell] += amount
+
+    # --- GENERATING LAYOUTS ---
+
+    def get_missing_cell(self) -> tuple:
+        """(config, x, y) of a quarter tile with fewer than
+        LAYOUTS_PER_CELL layouts, taken in turn after the last attempt's
+        so a hard tile does not hold up the rest. None when full."""
+        for config in self.configs:
+            coverage = self.coverage[config]
+            size = len(coverage)
+            for n in range(1, size + 1):
+                cell = (self.last_cell + n) % size
+                if coverage[cell] < LayoutPool.LAYOUTS_PER_CELL:
+                    self.last_cell = cell
+                    quarter_width = (config[0] + 1) // 2
+                    return config, cell % quarter_width, cell // quarter_width
+        return None
+
+    def get_scratch(self, width, height, mine_amount) -> MinesweeperBoard:
+        scratch = self.scratch
+        if scratch is None or (scratch.width, scratch.height, scratch.mine_amount) != (width, height, mine_amount):
+            scratch = MinesweeperBoard(width, height, mine_amount)
+            self.scratch = scratch
+        return scratch
+
+    def play_certain_moves(self, board: MinesweeperBoard, probabilities) -> bool:
+        """Uncovers every tile with a mine probability of 0 and flags every
+        tile with 1. Returns whether there was any."""
+        tiles = board.tiles
+        w = board.width
+        moved = False
+        for i in range(len(tiles)):
+            if tiles[i] & (Tile.UNCOVERED | Tile.FLAGGED):
+                continue
+            if probabilities[i] == 0.0:
+                board.uncover_tile(i % w, i // w)
+                moved = True
+            elif probabilities[i] == 1.0:
+                board.flag_tile(i % w, i // w)
+                moved = True
+        return moved
+
+    def play_attempt(self, config, x, y):
+        """Deals a layout on the scratch board, clicks (x, y) and plays
+        certain moves until it is won or needs a guess. Pools the layout
+        if won. Yields between bounded pieces of work."""
+        board = self.get_scratch(*config)
+        board.reset()
+        revealed = board.uncover_tile(x, y)
+        yield
+
+        solver = board.mine_probabilities
+        while board.game_state == GameState.PLAYING:
+            # Every component enumerated in steps, then combined at once
+            for component in solver.get_components(solver.get_constraints()):
+                for _ in solver.enumerate_component(component):
+                    yield
+            probabilities = solver.solve()
+            yield
+
+            if probabilities is None or not self.play_certain_moves(board, probabilities):
+                return
+            yield
+
+        if board.game_state == GameState.WON:
+            tiles = board.tiles
+            size = len(tiles)
+            mines = LayoutPool.to_bits(size, [i for i in range(size) if tiles[i] & Tile.MINED])
+            opening = LayoutPool.to_bits(size, [i for i in revealed if not tiles[i] & Tile.MINE_COUNT_MASK])
+            self.layouts[config].append((mines, opening))
+            self.count_coverage(config, opening, 1)
+
+    def fill_step(self) -> bool:
+        """Does one bounded step of work towards filling the pool. Returns
+        False when the pool is already full."""
+        if self.attempt is None:
+            missing = self.get_missing_cell()
+            if missing is None:
+                return False
+            self.attempt = self.play_attempt(*missing)
+
+        try:
+            next(self.attempt)
+        except StopIteration:
+            self.attempt = None
+        return True
+
+layout_pool = LayoutPool()
+
+class EndlessBoard:
+    """An unbounded board split into square chunks, played when ENDLESS is
+    set. A chunk's mines come from a hash of the seed and its coordinates,
+    so any chunk can be built again at any time and only the player's
+    uncovered and flagged tiles need keeping. Built chunks are cached up to
+    a byte budget, and the least recently used one is evicted as soon as
+    another is built, floods included. An evicted chunk that holds player
+    state is packed to two bitsets and rebuilt from them when it is next
+    visited.
+
+    Coordinates are unbounded in both directions. The 3x3 area around
+    (0, 0) never holds a mine, the player starts there. There is no mine
+    total, so the game is never won and flags are unlimited."""
+    CHUNK_SHIFT = 4
+    CHUNK_SIZE = 1 << CHUNK_SHIFT
+    CHUNK_MASK = CHUNK_SIZE - 1
+    CHUNK_TILES = CHUNK_SIZE * CHUNK_SIZE
+    # Packed player state of an evicted chunk: an uncovered and a flagged bitset
+    STATE_BYTES = CHUNK_TILES // 4
+
+    # Below this, openings join into one infinite region and a single
+    # click would never stop revealing
+    MIN_DENSITY = 0.15
+    # Enough cached chunks for a view spanning four chunks and its edges
+    MIN_CACHED_CHUNKS = 9
+
+    # (x, y) key -> packed Tile bytes
+    chunks: dict
+    # (x, y) key -> value of use_count when the chunk was last used
+    last_used: dict
+    # (x, y) key -> packed player state of an evicted chunk
+    saved: dict
+    max_chunks: int
+    # (x, y) positions waiting for a redraw, drained by EndlessDisplay
+    dirty_tiles: list[tuple[int, int]]
+    # Set on reset, every tile is redrawn
+    full_redraw: bool
+
+    game_state: GameState
+    uncovered_tiles_amount: int
+    flags_placed: int
+
+    def __init__(self, seed=None, density=0.2, memory_budget=4096):
+        if not EndlessBoard.MIN_DENSITY <= density < 1:
+            raise ValueError(
+                "density must be between " + str(EndlessBoard.MIN_DENSITY) + " and 1"
+            )
+
+        # A tile is mined when its random 32-bit draw is below this
+        self.threshold = int(density * 4294967296)
+        # Bytes of built chunks kept around, packed state is not counted
+        self.max_chunks = max(
+            memory_budget // EndlessBoard.CHUNK_TILES, EndlessBoard.MIN_CACHED_CHUNKS
+        )
+
+        self.chunks = {}
+        self.last_used = {}
+        self.saved = {}
+        self.dirty_tiles = []
+
+        self.reset(seed)
+
+    # --- GENERATING CHUNKS ---
+
+    def hash_chunk(self, cx, cy) -> int:
+        """Mixes the seed and chunk coordinates into a nonzero 32-bit state."""
+        h = (self.seed * 0x9E3779B1 + cx * 0x85EBCA77 + cy * 0xC2B2AE3D) & 0xFFFFFFFF
+        h = ((h ^ (h >> 16)) * 0x7FEB352D) & 0xFFFFFFFF
+        h = ((h ^ (h >> 15)) * 0x846CA68B) & 0xFFFFFFFF
+        h ^= h >> 16
+        return h or 1
+
+    def generate_chunk_mines(self, cx, cy) -> bytearray:
+        """MINED bits of chunk (cx, cy), the same on every call."""
+        size = EndlessBoard.CHUNK_SIZE
+        mines = bytearray(EndlessBoard.CHUNK_TILES)
+        threshold = self.threshold
+        mined = Tile.MINED
+
+        # One xorshift32 draw per tile, in row-major order
+        state = self.hash_chunk(cx, cy)
+        for i in range(EndlessBoard.CHUNK_TILES):
+            state ^= (state << 13) & 0xFFFFFFFF
+            state ^= state >> 17
+            state ^= (state << 5) & 0xFFFFFFFF
+            if state < threshold:
+                mines[i] = mined
+
+        # The starting area lies across the four chunks around (0, 0)
+        if -1 <= cx <= 0 and -1 <= cy <= 0:
+            shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+            for y in (-1, 0, 1):
+                for x in (-1, 0, 1):
+                    if x >> shift == cx and y >> shift == cy:
+                        mines[(y & mask) * size + (x & mask)] = 0
+
+        return mines
+
+    def build_chunk(self, cx, cy) -> bytearray:
+        """Packed Tile bytes of chunk (cx, cy), with the mine counts of its
+        edge tiles taken from the neighboring chunks."""
+        size = EndlessBoard.CHUNK_SIZE
+        last = size - 1
+        padded = size + 2
+
+        # The chunk's mines inside a one tile ring of its neighbors' mines.
+        # A neighbor already built lends its MINED bits instead of
+        # generating all of its tiles for the few on the ring
+        mined = Tile.MINED
+        grid = bytearray(padded * padded)
+        for ny in (-1, 0, 1):
+            rows = (last,) if ny < 0 else (0,) if ny > 0 else range(size)
+            for nx in (-1, 0, 1):
+                start, stop = (last, size) if nx < 0 else (0, 1) if nx > 0 else (0, size)
+                column = start + 1 + nx * size
+                built = self.chunks.get((cx + nx, cy + ny)) if nx or ny else None
+
+                if built is None:
+                    mines = self.generate_chunk_mines(cx + nx, cy + ny)
+                    for row in rows:
+                        at = (row + 1 + ny * size) * padded + column
+                        grid[at:at + stop - start] = mines[row * size + start:row * size + stop]
+                else:
+                    for row in rows:
+                        at = (row + 1 + ny * size) * padded + column - start
+                        for x in range(row * size + start, row * size + stop):
+                            grid[at + x - row * size] = built[x] & mined
+
+        # MINED is 0x10, so the sum of the 8 neighbors shifted down is the count
+        tiles = bytearray(EndlessBoard.CHUNK_TILES)
+        i = 0
+        for y in range(1, size + 1):
+            above = (y - 1) * padded
+            row = y * padded
+            below = (y + 1) * padded
+            for x in range(1, size + 1):
+                tiles[i] = grid[row + x] | (
+                    grid[above + x - 1] + grid[above + x] + grid[above + x + 1]
+                    + grid[row + x - 1] + grid[row + x + 1]
+                    + grid[below + x - 1] + grid[below + x] + grid[below + x + 1]
+                ) >> 4
+                i += 1
+
+        return tiles
+
+    # --- CHUNK CACHE ---
+
+    def get_chunk(self, cx, cy) -> bytearray:
+        """Returns the packed Tile bytes of chunk (cx, cy), building it if
+        needed, and marks it most recently used. Building one over the
+        budget evicts another, so earlier results may no longer be cached:
+        changes to them are lost once they are."""
+        key = (cx, cy)
+        self.use_count += 1
+        self.last_used[key] = self.use_count
+
+        tiles = self.chunks.get(key)
+        if tiles is None:
+            tiles = self.build_chunk(cx, cy)
+            state = self.saved.pop(key, None)
+            if state is not None:
+                self.unpack_state(tiles, state)
+            self.chunks[key] = tiles
+            if len(self.chunks) > self.max_chunks:
+                self.evict()
+        return tiles
+
+    def pack_state(self, tiles) -> bytes:
+        """Uncovered and flagged bitsets of a chunk, None when it has neither."""
+        half = EndlessBoard.STATE_BYTES // 2
+        packed = bytearray(EndlessBoard.STATE_BYTES)
+        for i in range(EndlessBoard.CHUNK_TILES):
+            tile = tiles[i]
+            if tile & Tile.UNCOVERED:
+                packed[i >> 3] |= 1 << (i & 7)
+            if tile & Tile.FLAGGED:
+                packed[half + (i >> 3)] |= 1 << (i & 7)
+        return bytes(packed) if any(packed) else None
+
+    def unpack_state(self, tiles, state) -> None:
+        half = EndlessBoard.STATE_BYTES // 2
+        for i in range(EndlessBoard.CHUNK_TILES):
+            bit = 1 << (i & 7)
+            if state[i >> 3] & bit:
+                tiles[i] |= Tile.UNCOVERED
+            if state[half + (i >> 3)] & bit:
+                tiles[i] |= Tile.FLAGGED
+
+    def evict(self) -> None:
+        """Drops least recently used chunks down to the budget, keeping
+        the player state of those that have any. The chunk used last is
+        never dropped. DIRTY marks are not kept, their positions stay in
+        dirty_tiles."""
+        chunks = self.chunks
+        last_used = self.last_used
+        while len(chunks) > self.max_chunks:
+            key = min(chunks, key=last_used.__getitem__)
+            del last_used[key]
+            state = self.pack_state(chunks.pop(key))
+            if state is not None:
+                self.saved[key] = state
+
+    def get_memory_usage(self) -> int:
+        """Bytes of tile data held: built chunks plus packed player state."""
+        return (len(self.chunks) * EndlessBoard.CHUNK_TILES
+                + len(self.saved) * EndlessBoard.STATE_BYTES)
+
+    # --- ACCESS TILES ---
+
+    def get_tile(self, x, y) -> int:
+        """Returns the packed Tile byte at (x, y)."""
+        shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+        tiles = self.get_chunk(x >> shift, y >> shift)
+        return tiles[(y & mask) << shift | (x & mask)]
+
+    def is_untouched(self) -> bool:
+        """Nothing uncovered or flagged since reset."""
+        return self.uncovered_tiles_amount == 0 and self.flags_placed == 0
+
+    # --- REDRAW TRACKING ---
+
+    # Marks are only kept in cached chunks, so neither marking nor clearing
+    # builds one. An uncached position is listed every time it is marked
+
+    def mark_dirty(self, x, y) -> None:
+        shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+        tiles = self.chunks.get((x >> shift, y >> shift))
+        if tiles is None:
+            self.dirty_tiles.append((x, y))
+            return
+
+        i = (y & mask) << shift | (x & mask)
+        if not tiles[i] & Tile.DIRTY:
+            tiles[i] |= Tile.DIRTY
+            self.dirty_tiles.append((x, y))
+
+    def mark_uncover_dirty(self, revealed) -> None:
+        # Uncovering also changes the borders of the direct neighbors,
+        # see MinesweeperBoard.mark_uncover_dirty
+        mark_dirty = self.mark_dirty
+        for x, y in revealed:
+            mark_dirty(x, y)
+            mark_dirty(x, y - 1)
+            mark_dirty(x, y + 1)
+            mark_dirty(x - 1, y)
+            mark_dirty(x + 1, y)
+
+    def clear_dirty(self, x, y) -> None:
+        shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+        tiles = self.chunks.get((x >> shift, y >> shift))
+        if tiles is not None:
+            tiles[(y & mask) << shift | (x & mask)] &= ~Tile.DIRTY
+
+    # --- PLAYER ACTIONS ---
+
+    def uncover_tile(self, start_x, start_y) -> list[tuple[int, int]]:
+        """Reveals the tile and floods through empty tiles, across chunk
+        edges. Returns the revealed (x, y) positions, in reveal order."""
+        # Can't uncover
+        if self.get_tile(start_x, start_y) & (Tile.UNCOVERED | Tile.FLAGGED):
+            return []
+
+        return self.flood([(start_x, start_y)])
+
+    def chord_tile(self, x, y) -> list[tuple[int, int]]:
+        """Uncovers every unflagged tile around an uncovered number with
+        as many flags around it as mines, all in one flood. Returns the
+        revealed (x, y) positions."""
+        tile = self.get_tile(x, y)
+        count = tile & Tile.MINE_COUNT_MASK
+        if not tile & Tile.UNCOVERED or count == 0:
+            return []
+
+        # Flags are not counted ahead like on MinesweeperBoard
+        blocked = Tile.UNCOVERED | Tile.FLAGGED
+        flags = 0
+        seeds = []
+        for ny in (y - 1, y, y + 1):
+            for nx in (x - 1, x, x + 1):
+                neighbor = self.get_tile(nx, ny)
+                if neighbor & Tile.FLAGGED:
+                    flags += 1
+                elif not neighbor & blocked:
+                    seeds.append((nx, ny))
+        if flags != count or not seeds:
+            return []
+
+        return self.flood(seeds)
+
+    def flood(self, seeds) -> list[tuple[int, int]]:
+        """Uncovers the seeds, covered and unflagged positions, and floods
+        through empty tiles from all of them together, see
+        MinesweeperBoard.flood. Returns the revealed (x, y) positions, in
+        reveal order."""
+        shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+        blocked = Tile.UNCOVERED | Tile.FLAGGED
+        uncovered = Tile.UNCOVERED
+        get_chunk = self.get_chunk
+
+        # Lose if mine hit. Only seeds can be mined, flooding stops at
+        # numbered tiles before reaching any mine
+        lost = False
+        for x, y in seeds:
+            tiles = get_chunk(x >> shift, y >> shift)
+            i = (y & mask) << shift | (x & mask)
+            tiles[i] |= uncovered
+            if tiles[i] & Tile.MINED:
+                lost = True
+        revealed = list(seeds)
+
+        if lost:
+            self.mark_uncover_dirty(revealed)
+            self.uncovered_tiles_amount += len(revealed)
+            self.game_state = GameState.LOST
+            return revealed
+
+        count_mask = Tile.MINE_COUNT_MASK
+        append = revealed.append
+        steps = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+        offsets = [dy * EndlessBoard.CHUNK_SIZE + dx for dx, dy in steps]
+
+        # Tiles away from their chunk's edge reach all their neighbors
+        # through the chunk's own bytes, edge tiles look each one up
+        chunk_key = None
+        head = 0
+        while head < len(revealed):
+            x, y = revealed[head]
+            head += 1
+
+            key = (x >> shift, y >> shift)
+            if key != chunk_key:
+                chunk_key = key
+                tiles = get_chunk(x >> shift, y >> shift)
+            local_x, local_y = x & mask, y & mask
+            i = local_y << shift | local_x
+
+            # Expand only if empty
+            if tiles[i] & count_mask:
+                continue
+
+            if 0 < local_x < mask and 0 < local_y < mask:
+                for n in range(8):
+                    j = i + offsets[n]
+                    if not tiles[j] & blocked:
+                        tiles[j] |= uncovered
+                        dx, dy = steps[n]
+                        append((x + dx, y + dy))
+            else:
+                for dx, dy in steps:
+                    nx, ny = x + dx, y + dy
+                    other = get_chunk(nx >> shift, ny >> shift)
+                    j = (ny & mask) << shift | (nx & mask)
+                    if not other[j] & blocked:
+                        other[j] |= uncovered
+                        append((nx, ny))
+                # The lookups may have evicted this chunk, fetch it again
+                chunk_key = None
+
+        self.mark_uncover_dirty(revealed)
+        self.uncovered_tiles_amount += len(revealed)
+        return revealed
+
+    def flag_tile(self, x, y) -> None:
+        shift, mask = EndlessBoard.CHUNK_SHIFT, EndlessBoard.CHUNK_MASK
+        tiles = self.get_chunk(x >> shift, y >> shift)
+        i = (y & mask) << shift | (x & mask)
+        tile = tiles[i]
+
+        if tile & Tile.UNCOVERED:
+            return
+
+        # Flags are unlimited, there is no mine total to count down from
+        if tile & Tile.FLAGGED:
+            tiles[i] = tile & ~Tile.FLAGGED
+            self.flags_placed -= 1
+        else:
+            tiles[i] = tile | Tile.FLAGGED
+            self.flags_placed += 1
+
+        self.mark_dirty(x, y)
+
+    def reset(self, seed=None) -> None:
+        """Starts a new board, from a random seed when none is given."""
+        if seed is None:
+            seed = randint(0, 0x3FFFFFFF)
+        self.seed = seed
+        self.chunks.clear()
+        self.last_used.clear()
+        self.use_count = 0
+        self.saved.clear()
+
+        self.dirty_tiles.clear()
+        self.full_redraw = True
+
+        self.game_state = GameState.PLAYING
+        self.uncovered_tiles_amount = 0
+        self.flags_placed = 0
+
 # =====================
 # RENDERING
 # =====================
@@ -306,236 +1608,281 @@ class MinesweeperBoard:
 # --- Util ---
 
 class SpriteLibrary:
-    CLOCK_SPRITE = (20, 20, bytes([
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b11110000, 0b00000000,
-        0b00000011, 0b11111100, 0b00000000,
-        0b00000111, 0b00001110, 0b00000000,
-        0b00001100, 0b00000011, 0b00000000,
-        0b00011000, 0b01100001, 0b10000000,
-        0b00011000, 0b01100001, 0b10000000,
-        0b00110000, 0b01100000, 0b11000000,
-        0b00110000, 0b01111110, 0b11000000,
-        0b00110000, 0b01111110, 0b11000000,
-        0b00110000, 0b00000000, 0b11000000,
-        0b00011000, 0b00000001, 0b10000000,
-        0b00011000, 0b00000001, 0b10000000,
-        0b00001100, 0b00000011, 0b00000000,
-        0b00000111, 0b00001110, 0b00000000,
-        0b00000011, 0b11111100, 0b00000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00000000, 0b00000000, 0b00000000
-    ]))
-
-    FLAG_SPRITE = (20, 20, bytes([
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00001111, 0b10000000, 0b00000000,
-        0b00001111, 0b11111000, 0b00000000,
-        0b00001111, 0b11111111, 0b00000000,
-        0b00001111, 0b11111111, 0b11000000,
-        0b00001111, 0b11111111, 0b11000000,
-        0b00001111, 0b11111111, 0b00000000,
-        0b00001111, 0b11110000, 0b00000000,
-        0b00001111, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00001100, 0b00000000, 0b00000000,
-        0b00011110, 0b00000000, 0b00000000,
-        0b00011110, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000
-    ]))
-
-    MINE_SPRITE = (20, 20, bytes([
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b11110000, 0b00000000,
-        0b00000011, 0b11111100, 0b00000000,
-        0b00000111, 0b11111110, 0b00000000,
-        0b00001111, 0b11111111, 0b00000000,
-        0b00011111, 0b11111111, 0b10000000,
-        0b00011111, 0b11111111, 0b10000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00111111, 0b11111111, 0b11000000,
-        0b00011111, 0b11111111, 0b10000000,
-        0b00011111, 0b11111111, 0b10000000,
-        0b00001111, 0b11111111, 0b00000000,
-        0b00000111, 0b11111110, 0b00000000,
-        0b00000011, 0b11111100, 0b00000000,
-        0b00000000, 0b11110000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000,
-        0b00000000, 0b00000000, 0b00000000
-    ]))
+    # --- BEGIN GENERATED SPRITES ---
+    # Generated by png_to_text.py from Assets/Sprites, do not edit
+    CLOCK_SPRITE = (20, 20, (
+        (8, 2, 4, 2),
+        (6, 3, 8, 1),
+        (5, 4, 3, 1),
+        (12, 4, 3, 1),
+        (4, 5, 1, 3),
+        (5, 5, 1, 1),
+        (14, 5, 2, 1),
+        (3, 6, 1, 8),
+        (9, 6, 2, 5),
+        (15, 6, 2, 2),
+        (2, 8, 2, 4),
+        (16, 8, 2, 4),
+        (11, 9, 4, 2),
+        (4, 12, 1, 3),
+        (15, 12, 2, 2),
+        (5, 14, 1, 2),
+        (14, 14, 1, 2),
+        (15, 14, 1, 1),
+        (6, 15, 2, 4),
+        (12, 15, 2, 4),
+        (8, 16, 6, 3),
+        (2, 17, 16, 2),
+    ))
+
+    FLAG_SPRITE = (20, 20, (
+        (4, 2, 2, 16),
+        (6, 3, 3, 7),
+        (9, 4, 4, 5),
+        (13, 5, 3, 4),
+        (16, 6, 2, 2),
+        (9, 9, 3, 1),
+        (6, 10, 2, 1),
+        (3, 16, 4, 2),
+    ))
+
+    MINE_SPRITE = (20, 20, (
+        (8, 2, 4, 16),
+        (6, 3, 8, 14),
+        (5, 4, 10, 12),
+        (4, 5, 12, 10),
+        (3, 6, 14, 8),
+        (2, 8, 16, 4),
+    ))
+
+    ARROW_SPRITE = (7, 7, (
+        (1, 0, 1, 7),
+        (2, 1, 1, 5),
+        (3, 2, 1, 3),
+        (4, 3, 1, 1),
+    ))
+
+    MINESWEEPER_SPRITE = (51, 7, (
+        (0, 0, 1, 6),
+        (4, 0, 1, 6),
+        (6, 0, 1, 1),
+        (1, 1, 1, 1),
+        (3, 1, 2, 1),
+        (8, 1, 1, 5),
+        (9, 1, 2, 1),
+        (14, 1, 2, 1),
+        (19, 1, 2, 1),
+        (22, 1, 1, 4),
+        (26, 1, 1, 4),
+        (29, 1, 2, 1),
+        (34, 1, 2, 1),
+        (38, 1, 1, 6),
+        (39, 1, 2, 1),
+        (44, 1, 2, 1),
+        (48, 1, 1, 5),
+        (50, 1, 1, 1),
+        (2, 2, 1, 1),
+        (6, 2, 1, 4),
+        (11, 2, 1, 4),
+        (13, 2, 1, 3),
+        (16, 2, 1, 2),
+        (18, 2, 1, 1),
+        (28, 2, 1, 3),
+        (31, 2, 1, 2),
+        (33, 2, 1, 3),
+        (36, 2, 1, 2),
+        (41, 2, 1, 2),
+        (43, 2, 1, 3),
+        (46, 2, 1, 2),
+        (49, 2, 1, 1),
+        (14, 3, 3, 1),
+        (19, 3, 1, 1),
+        (24, 3, 1, 2),
+        (29, 3, 3, 1),
+        (34, 3, 3, 1),
+        (44, 3, 3, 1),
+        (20, 4, 1, 1),
+        (39, 4, 2, 1),
+        (14, 5, 2, 1),
+        (18, 5, 2, 1),
+        (23, 5, 1, 1),
+        (25, 5, 1, 1),
+        (29, 5, 2, 1),
+        (34, 5, 2, 1),
+        (44, 5, 2, 1),
+    ))
+
+    PLAY_SPRITE = (16, 7, (
+        (0, 0, 1, 6),
+        (1, 0, 2, 1),
+        (5, 0, 1, 6),
+        (3, 1, 1, 2),
+        (8, 1, 2, 1),
+        (12, 1, 1, 3),
+        (15, 1, 1, 5),
+        (10, 2, 1, 4),
+        (1, 3, 2, 1),
+        (8, 3, 3, 1),
+        (7, 4, 1, 1),
+        (13, 4, 3, 1),
+        (8, 5, 3, 1),
+        (13, 6, 2, 1),
+    ))
+
+    QUIT_SPRITE = (15, 7, (
+        (1, 0, 3, 1),
+        (11, 0, 1, 1),
+        (13, 0, 1, 5),
+        (0, 1, 1, 4),
+        (4, 1, 1, 4),
+        (6, 1, 1, 4),
+        (9, 1, 1, 5),
+        (14, 1, 1, 1),
+        (11, 2, 1, 4),
+        (1, 5, 3, 1),
+        (7, 5, 3, 1),
+        (14, 5, 1, 1),
+        (3, 6, 2, 1),
+    ))
+
+    RESET_SCORE_SPRITE = (48, 7, (
+        (0, 0, 1, 6),
+        (1, 0, 2, 1),
+        (19, 0, 1, 5),
+        (3, 1, 1, 2),
+        (6, 1, 2, 1),
+        (11, 1, 2, 1),
+        (15, 1, 2, 1),
+        (20, 1, 1, 1),
+        (27, 1, 2, 1),
+        (31, 1, 3, 1),
+        (36, 1, 2, 1),
+        (40, 1, 1, 5),
+        (42, 1, 1, 1),
+        (45, 1, 2, 1),
+        (5, 2, 1, 3),
+        (8, 2, 1, 2),
+        (10, 2, 1, 1),
+        (14, 2, 1, 3),
+        (17, 2, 1, 2),
+        (26, 2, 1, 1),
+        (30, 2, 1, 3),
+        (35, 2, 1, 3),
+        (38, 2, 1, 3),
+        (41, 2, 1, 1),
+        (44, 2, 1, 3),
+        (47, 2, 1, 2),
+        (1, 3, 2, 1),
+        (6, 3, 3, 1),
+        (11, 3, 1, 1),
+        (15, 3, 3, 1),
+        (27, 3, 1, 1),
+        (45, 3, 3, 1),
+        (3, 4, 1, 2),
+        (12, 4, 1, 1),
+        (28, 4, 1, 1),
+        (6, 5, 2, 1),
+        (10, 5, 2, 1),
+        (15, 5, 2, 1),
+        (20, 5, 1, 1),
+        (26, 5, 2, 1),
+        (31, 5, 3, 1),
+        (36, 5, 2, 1),
+        (45, 5, 2, 1),
+    ))
 
     NUMBER_SPRITES = [
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b01111000
-    ])),
-    (6, 9, bytes([
-        0b11110000,
-        0b00110000,
-        0b00110000,
-        0b00110000,
-        0b00110000,
-        0b00110000,
-        0b00110000,
-        0b00110000,
-        0b11111100
-    ])),
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b00001100,
-        0b00001100,
-        0b00011000,
-        0b00110000,
-        0b01100000,
-        0b11000000,
-        0b11111100
-    ])),
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b00001100,
-        0b00001100,
-        0b00111000,
-        0b00001100,
-        0b00001100,
-        0b11001100,
-        0b01111000
-    ])),
-    (6, 9, bytes([
-        0b00111100,
-        0b00101100,
-        0b01101100,
-        0b01001100,
-        0b11001100,
-        0b11111100,
-        0b00001100,
-        0b00001100,
-        0b00001100
-    ])),
-    (6, 9, bytes([
-        0b11111100,
-        0b11001100,
-        0b11000000,
-        0b11000000,
-        0b11111000,
-        0b00001100,
-        0b00001100,
-        0b11001100,
-        0b01111000
-    ])),
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b11000000,
-        0b11000000,
-        0b11111000,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b01111000
-    ])),
-    (6, 9, bytes([
-        0b11111100,
-        0b11001100,
-        0b00001100,
-        0b00011000,
-        0b00011000,
-        0b00110000,
-        0b00110000,
-        0b01100000,
-        0b01100000
-    ])),
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b01111000,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b01111000
-    ])),
-    (6, 9, bytes([
-        0b01111000,
-        0b11001100,
-        0b11001100,
-        0b11001100,
-        0b01111100,
-        0b00001100,
-        0b00001100,
-        0b11001100,
-        0b01111000
-    ]))]
-
-    MINESWEEPER_SPRITE = (51, 7, bytes([
-        0b10001010, 0b00000000, 0b00000000, 0b00000000, 0b00000000, 0b00000000, 0b00000000,
-        0b11011000, 0b11100011, 0b00011010, 0b00100110, 0b00110011, 0b10001100, 0b10100000,
-        0b10101010, 0b10010100, 0b10100010, 0b00101001, 0b01001010, 0b01010010, 0b11000000,
-        0b10001010, 0b10010111, 0b10010010, 0b10101111, 0b01111010, 0b01011110, 0b10000000,
-        0b10001010, 0b10010100, 0b00001010, 0b10101000, 0b01000011, 0b10010000, 0b10000000,
-        0b10001010, 0b10010011, 0b00110001, 0b01000110, 0b00110010, 0b00001100, 0b10000000,
-        0b00000000, 0b00000000, 0b00000000, 0b00000000, 0b00000010, 0b00000000, 0b00000000
-    ]))
-
-    PLAY_SPRITE = (16, 7, bytes([
-        0b11100100, 0b00000000,
-        0b10010100, 0b11001001,
-        0b10010100, 0b00101001,
-        0b11100100, 0b11101001,
-        0b10000101, 0b00100111,
-        0b10000100, 0b11100001,
-        0b00000000, 0b00000110
-    ]))
-
-    RESET_SCORE_SPRITE = (48, 7, bytes([
-        0b11100000, 0b00000000, 0b00010000, 0b00000000, 0b00000000, 0b00000000,
-        0b10010011, 0b00011001, 0b10011000, 0b00011001, 0b11001100, 0b10100110,
-        0b10010100, 0b10100010, 0b01010000, 0b00100010, 0b00010010, 0b11001001,
-        0b11100111, 0b10010011, 0b11010000, 0b00010010, 0b00010010, 0b10001111,
-        0b10010100, 0b00001010, 0b00010000, 0b00001010, 0b00010010, 0b10001000,
-        0b10010011, 0b00110001, 0b10001000, 0b00110001, 0b11001100, 0b10000110,
-        0b00000000, 0b00000000, 0b00000000, 0b00000000, 0b00000000, 0b00000000
-    ]))
-
-    QUIT_SPRITE = (15, 7, bytes([
-        0b01110000, 0b00010100,
-        0b10001010, 0b01000110,
-        0b10001010, 0b01010100,
-        0b10001010, 0b01010100,
-        0b10001010, 0b01010100,
-        0b01110001, 0b11010010,
-        0b00011000, 0b00000000
-    ]))
-
-    ARROW_SPRITE = (7, 7, bytes([
-        0b01000000,
-        0b01100000,
-        0b01110000,
-        0b01111000,
-        0b01110000,
-        0b01100000,
-        0b01000000
-    ]))
+        (6, 9, (
+            (1, 0, 1, 9),
+            (2, 0, 3, 1),
+            (0, 1, 2, 7),
+            (4, 1, 2, 7),
+            (2, 8, 3, 1),
+        )),
+        (6, 9, (
+            (0, 0, 4, 1),
+            (2, 1, 2, 8),
+            (0, 8, 6, 1),
+        )),
+        (6, 9, (
+            (1, 0, 4, 1),
+            (0, 1, 2, 1),
+            (4, 1, 2, 3),
+            (3, 4, 1, 2),
+            (4, 4, 1, 1),
+            (2, 5, 1, 2),
+            (1, 6, 1, 3),
+            (0, 7, 2, 2),
+            (2, 8, 4, 1),
+        )),
+        (6, 9, (
+            (1, 0, 4, 1),
+            (0, 1, 2, 1),
+            (4, 1, 1, 8),
+            (5, 1, 1, 3),
+            (2, 4, 3, 1),
+            (5, 5, 1, 3),
+            (0, 7, 2, 1),
+            (1, 8, 4, 1),
+        )),
+        (6, 9, (
+            (2, 0, 4, 1),
+            (2, 1, 1, 2),
+            (4, 1, 2, 8),
+            (1, 2, 1, 4),
+            (0, 4, 2, 2),
+            (2, 5, 4, 1),
+        )),
+        (6, 9, (
+            (0, 0, 2, 5),
+            (2, 0, 4, 1),
+            (4, 1, 2, 1),
+            (2, 4, 3, 1),
+            (4, 5, 2, 3),
+            (0, 7, 2, 1),
+            (1, 8, 4, 1),
+        )),
+        (6, 9, (
+            (1, 0, 1, 9),
+            (2, 0, 3, 1),
+            (0, 1, 2, 7),
+            (4, 1, 2, 1),
+            (2, 4, 3, 1),
+            (4, 5, 2, 3),
+            (2, 8, 3, 1),
+        )),
+        (6, 9, (
+            (0, 0, 6, 1),
+            (0, 1, 2, 1),
+            (4, 1, 1, 4),
+            (5, 1, 1, 2),
+            (3, 3, 1, 4),
+            (2, 5, 1, 4),
+            (1, 7, 2, 2),
+        )),
+        (6, 9, (
+            (1, 0, 1, 9),
+            (2, 0, 3, 1),
+            (0, 1, 2, 3),
+            (4, 1, 1, 8),
+            (5, 1, 1, 3),
+            (2, 4, 3, 1),
+            (0, 5, 2, 3),
+            (5, 5, 1, 3),
+            (2, 8, 3, 1),
+        )),
+        (6, 9, (
+            (1, 0, 1, 5),
+            (2, 0, 3, 1),
+            (0, 1, 2, 3),
+            (4, 1, 2, 7),
+            (2, 4, 4, 1),
+            (0, 7, 2, 1),
+            (1, 8, 4, 1),
+        ))
+    ]
+
+    # --- END GENERATED SPRITES ---
 
     COLORS = {
         # --- GAME ---
@@ -571,10 +1918,28 @@ class SpriteLibrary:
         "menu_arrow" : (75, 8, 67) # Purple
     }
 
+    # (id(sprite), scale) -> (sprite, compiled rects), see get_sprite_rects
+    RECT_CACHE = {}
+    RECT_CACHE_SIZE = 24
+
+    # scale -> compiled rects of the 10 digits, kept out of the bounded cache
+    DIGIT_RECTS = {}
+
     @staticmethod
-    def draw_sprite(x, y, sprite, color, scale=1):
+    def compile_sprite(sprite, scale=1) -> list[tuple[int, int, int, int]]:
+        """Turns the sprite into scaled (dx, dy, w, h) rects. Rect-list
+        sprites from png_to_text.py are scaled as is, bitmaps give one rect
+        per horizontal run of set bits."""
         width, height, data = sprite
+
+        if isinstance(data, tuple):
+            return [
+                (x * scale, y * scale, w * scale, h * scale)
+                for x, y, w, h in data
+            ]
+
         bytes_per_row = (width + 7) // 8
+        rects = []
 
         for row in range(height):
             row_offset = row * bytes_per_row
@@ -597,13 +1962,56 @@ class SpriteLibrary:
 
                 run_len = col - run_start
 
-                fill_rect(
-                    x + run_start * scale,
-                    y + row * scale,
+                rects.append((
+                    run_start * scale,
+                    row * scale,
                     run_len * scale,
-                    scale,
-                    color
-                )
+                    scale
+                ))
+
+        return rects
+
+    @staticmethod
+    def get_sprite_rects(sprite, scale=1) -> list[tuple[int, int, int, int]]:
+        # Sprites are nested tuples, and hashing one walks all of it on
+        # every lookup. The id is hashed instead, and the entry keeps the
+        # sprite so a reused id can't return another sprite's rects
+        cache = SpriteLibrary.RECT_CACHE
+        key = (id(sprite), scale)
+        entry = cache.get(key)
+        if entry is not None and entry[0] is sprite:
+            return entry[1]
+
+        # Drops the oldest entry where dicts keep insertion order. MicroPython
+        # doesn't promise that, there any entry goes, which still bounds it
+        if len(cache) >= SpriteLibrary.RECT_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        rects = SpriteLibrary.compile_sprite(sprite, scale)
+        cache[key] = (sprite, rects)
+        return rects
+
+    @staticmethod
+    def get_digit_rects(scale=1) -> list[list[tuple[int, int, int, int]]]:
+        digit_rects = SpriteLibrary.DIGIT_RECTS.get(scale)
+
+        if digit_rects is None:
+            digit_rects = [
+                SpriteLibrary.compile_sprite(sprite, scale)
+                for sprite in SpriteLibrary.NUMBER_SPRITES
+            ]
+            SpriteLibrary.DIGIT_RECTS[scale] = digit_rects
+
+        return digit_rects
+
+    @staticmethod
+    def draw_rects(x, y, rects, color):
+        for dx, dy, w, h in rects:
+            fill_rect(x + dx, y + dy, w, h, color)
+
+    @staticmethod
+    def draw_sprite(x, y, sprite, color, scale=1):
+        for dx, dy, w, h in SpriteLibrary.get_sprite_rects(sprite, scale):
+            fill_rect(x + dx, y + dy, w, h, color)
     
     @staticmethod
     def erase_sprite(x, y, sprite, bg_color, scale=1):
@@ -612,10 +2020,10 @@ class SpriteLibrary:
 
     @staticmethod
     def draw_digit(x, y, digit, color, scale=1):
-        SpriteLibrary.draw_sprite(
-            x, y, 
-            SpriteLibrary.NUMBER_SPRITES[digit],
-            color, scale
+        SpriteLibrary.draw_rects(
+            x, y,
+            SpriteLibrary.get_digit_rects(scale)[digit],
+            color
         )
     
     @staticmethod
@@ -628,6 +2036,7 @@ class SpriteLibrary:
 
 class NumberDisplayer:
     digits: list[int]
+    num: int
 
     def __init__(self, x, y, color, bg_color, scale, spacing, max_digits):
         self.x = x
@@ -638,11 +2047,23 @@ class NumberDisplayer:
         self.spacing = spacing
         self.max_digits = max_digits
         self.digits =[-1 for _ in range(max_digits)]
+        self.num = -1
+
+        # Compiled once, drawn directly on every digit change
+        self.digit_rects = SpriteLibrary.get_digit_rects(scale)
+        digit_width, digit_height, _ = SpriteLibrary.NUMBER_SPRITES[0]
+        self.digit_width = digit_width * scale
+        self.digit_height = digit_height * scale
     
     def update(self, num):
         if num < 0:
             num = 0
 
+        # Most frames show the same number
+        if num == self.num:
+            return
+        self.num = num
+
         num_str = str(num)
 
         while len(num_str) < self.max_digits:
@@ -653,27 +2074,330 @@ class NumberDisplayer:
             pos_y = self.y
             new_digit = int(num_str[i])
             if self.digits[i] != new_digit:
-                SpriteLibrary.erase_digit(pos_x, pos_y, self.bg_color, self.scale)
-                SpriteLibrary.draw_digit(pos_x, pos_y, new_digit, self.color, self.scale)
+                fill_rect(pos_x, pos_y, self.digit_width, self.digit_height, self.bg_color)
+                SpriteLibrary.draw_rects(pos_x, pos_y, self.digit_rects[new_digit], self.color)
                 self.digits[i] = new_digit
 
+# --- Shadow framebuffer ---
+
+class ShadowFramebuffer:
+    """An off-screen copy of the screen under fill_rect.
+
+    While installed, fill_rect only paints the target copy, one palette
+    index per pixel, and remembers the call and the dirty span of each
+    row. flush then compares the target with what was last sent to the
+    screen and draws only the changed pixels.
+
+    Changes are sent as row spans: per row, each run of one color is cut
+    down to the part between its first and last changed pixel, and
+    identical runs on consecutive rows are merged into one rect. Groups of
+    requested calls that no later call painted over, like a tile's
+    background and sprite, are flushed on their own, and sent as
+    requested when that takes fewer calls than their row spans. A frame
+    whose rects still outnumber its calls sends the calls as requested.
+
+    The requested and changed pixels of each flush give the frame's
+    overdraw ratio.
+    """
+    # Palette index of pixels the screen state is not known for
+    UNKNOWN = 255
+
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+
+        self.target = bytearray([ShadowFramebuffer.UNKNOWN]) * (width * height)
+        self.flushed = bytearray(self.target)
+
+        # Color -> palette index, and back
+        self.palette = {}
+        self.colors = []
+
+        # (x0, y0, x1, y1, row span) of each fill_rect since the last flush
+        self.calls = []
+        # Dirty spans per row, and dirty rows, as [start, end)
+        self.dirty_x0 = [width] * height
+        self.dirty_x1 = [0] * height
+        self.dirty_y0 = height
+        self.dirty_y1 = 0
+
+        self.draw = None
+        self.reset_counters()
+        self.last_frame = (0, 0, 0, 0, 0)
+
+    def reset_counters(self):
+        self.requested_calls = 0
+        self.requested_pixels = 0
+
+    def install(self):
+        global fill_rect
+        if self.draw is not None:
+            return
+        self.draw = fill_rect
+        fill_rect = self.fill_rect
+
+    def uninstall(self):
+        global fill_rect
+        if self.draw is None:
+            return
+        self.flush()
+        fill_rect = self.draw
+        self.draw = None
+
+    # --- DRAWING ---
+
+    def get_color_index(self, color) -> int:
+        color = tuple(color)
+        index = self.palette.get(color)
+        if index is None:
+            index = len(self.colors)
+            if index >= ShadowFramebuffer.UNKNOWN:
+                raise ValueError("too many colors for the shadow framebuffer")
+            self.palette[color] = index
+            self.colors.append(color)
+        return index
+
+    def fill_rect(self, x, y, width, height, color):
+        # Clip to the screen like the firmware does
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        self.requested_calls += 1
+        self.requested_pixels += (x1 - x0) * (y1 - y0)
+
+        span = bytes([self.get_color_index(color)]) * (x1 - x0)
+        self.calls.append((x0, y0, x1, y1, span))
+        target = self.target
+        dirty_x0, dirty_x1 = self.dirty_x0, self.dirty_x1
+        w = self.width
+
+        for row in range(y0, y1):
+            start = row * w
+            target[start + x0:start + x1] = span
+            if x0 < dirty_x0[row]:
+                dirty_x0[row] = x0
+            if x1 > dirty_x1[row]:
+                dirty_x1[row] = x1
+
+        if y0 < self.dirty_y0:
+            self.dirty_y0 = y0
+        if y1 > self.dirty_y1:
+            self.dirty_y1 = y1
+
+    # --- FLUSHING ---
+
+    def get_spans(self, row, x0, x1) -> tuple[set, int]:
+        """Returns the (x, width, palette index) of the changed runs of a
+        row between x0 and x1, and the changed pixel count. Marks them
+        flushed."""
+        target, flushed = self.target, self.flushed
+        start = row * self.width
+        spans = set()
+        changed = 0
+        if x0 >= x1 or target[start + x0:start + x1] == flushed[start + x0:start + x1]:
+            return spans, changed
+
+        x = start + x0
+        end = start + x1
+        while x < end:
+            index = target[x]
+            first = last = -1
+            while x < end and target[x] == index:
+                if flushed[x] != index:
+                    if first < 0:
+                        first = x
+                    last = x
+                    changed += 1
+                x += 1
+            if first >= 0:
+                spans.add((first - start, last + 1 - first, index))
+
+        flushed[start + x0:end] = target[start + x0:end]
+        return spans, changed
+
+    def get_group_end(self, calls, n) -> int:
+        """A group is a call and the calls right after it that lie inside
+        its rect, like a tile's background and its sprite. Returns the
+        index after the group starting at n."""
+        x0, y0, x1, y1, _ = calls[n]
+        end = n + 1
+        while end < len(calls):
+            cx0, cy0, cx1, cy1, _ = calls[end]
+            if cx0 < x0 or cy0 < y0 or cx1 > x1 or cy1 > y1:
+                break
+            end += 1
+        return end
+
+    def is_group_intact(self, group) -> bool:
+        """Whether drawing the group as requested gives the target, that
+        is no later call painted over its rect."""
+        x0, y0, x1, y1, span = group[0]
+        target = self.target
+        w = self.width
+        for row in range(y0, y1):
+            line = bytearray(span)
+            for cx0, cy0, cx1, cy1, call_span in group:
+                if cy0 <= row < cy1:
+                    line[cx0 - x0:cx1 - x0] = call_span
+            start = row * w
+            if target[start + x0:start + x1] != line:
+                return False
+        return True
+
+    def flush_group(self, group) -> tuple[list, int]:
+        """The rects that draw the changes inside an intact group's rect,
+        as row spans or as the requested calls, whichever are fewer.
+        Returns them as (x, y, width, height, palette index), and the
+        changed pixel count."""
+        x0, y0, x1, y1, _ = group[0]
+        rects = []
+        changed = 0
+        # (x, width, palette index) -> [first row, rows]
+        open_rects = {}
+        for row in range(y0, y1 + 1):
+            spans = ()
+            if row < y1:
+                spans, row_changed = self.get_spans(row, x0, x1)
+                changed += row_changed
+            for key in list(open_rects):
+                if key not in spans:
+                    first_row, rows = open_rects.pop(key)
+                    rects.append((key[0], first_row, key[1], rows, key[2]))
+            for key in spans:
+                rect = open_rects.get(key)
+                if rect is None:
+                    open_rects[key] = [row, 1]
+                else:
+                    rect[1] += 1
+
+        if len(rects) > len(group):
+            rects = ShadowFramebuffer.get_call_rects(group)
+        return rects, changed
+
+    @staticmethod
+    def get_call_rects(calls) -> list[tuple]:
+        return [(x0, y0, x1 - x0, y1 - y0, span[0]) for x0, y0, x1, y1, span in calls]
+
+    def flush(self):
+        """Draws what changed since the last flush on the screen."""
+        draw = self.draw or fill_rect
+        colors = self.colors
+        # (x, y, width, height, palette index) to draw
+        rects = []
+        changed = 0
+
+        # Groups still showing as drawn, each flushed on its own
+        requested = self.calls
+        n = 0
+        while n < len(requested):
+            end = self.get_group_end(requested, n)
+            group = requested[n:end]
+            if self.is_group_intact(group):
+                group_rects, group_changed = self.flush_group(group)
+                rects.extend(group_rects)
+                changed += group_changed
+            n = end
+
+        # Then row spans for what later calls painted over
+        # (x, width, palette index) -> [first row, rows]
+        open_rects = {}
+        dirty_x0, dirty_x1 = self.dirty_x0, self.dirty_x1
+        for row in range(self.dirty_y0, self.dirty_y1 + 1):
+            spans = ()
+            if row < self.dirty_y1:
+                spans, row_changed = self.get_spans(row, dirty_x0[row], dirty_x1[row])
+                changed += row_changed
+                dirty_x0[row] = self.width
+                dirty_x1[row] = 0
+
+            # Rects not continued on this row are complete
+            for key in list(open_rects):
+                if key not in spans:
+                    first_row, rows = open_rects.pop(key)
+                    rects.append((key[0], first_row, key[1], rows, key[2]))
+
+            for key in spans:
+                rect = open_rects.get(key)
+                if rect is None:
+                    open_rects[key] = [row, 1]
+                else:
+                    rect[1] += 1
+
+        self.dirty_y0 = self.height
+        self.dirty_y1 = 0
+
+        # Drawing everything as requested also gives the target
+        if len(rects) > len(requested):
+            rects = ShadowFramebuffer.get_call_rects(requested)
+        requested.clear()
+
+        pixels = 0
+        for x, y, width, height, index in rects:
+            draw(x, y, width, height, colors[index])
+            pixels += width * height
+
+        self.last_frame = (self.requested_calls, self.requested_pixels, changed, len(rects), pixels)
+        self.reset_counters()
+
+    def get_overdraw_ratio(self) -> float:
+        """Pixels drawn per pixel changed in the last flushed frame."""
+        requested_pixels, changed = self.last_frame[1], self.last_frame[2]
+        return requested_pixels / max(changed, 1)
+
 # --- Game + Menu --- 
 
 class MinesweeperDisplay:
     BORDER_WEIGHT: int = 2
 
-    def __init__(self, offset_x, offset_y, tile_size):
+    # A tile looks the same wherever it is drawn for the same visual state
+    # key (see get_tile_key), so its fill_rect calls are built once per key
+    # as (x, y, width, height, color) relative to the tile
+    TILE_COMMANDS = {}
+    TILE_COMMANDS_SIZE = 128
+
+    # Visual state key bits, the mine count goes above them
+    ODD = 0x01
+    UNCOVERED = 0x02
+    BORDER_TOP = 0x04
+    BORDER_BOTTOM = 0x08
+    BORDER_LEFT = 0x10
+    BORDER_RIGHT = 0x20
+    MINE = 0x40
+    FLAG = 0x80
+    NUMBER_SHIFT = 8
+
+    def __init__(self, offset_x, offset_y, tile_size, view_width=GRID_WIDTH, view_height=GRID_HEIGHT):
         self.offset_x = offset_x
         self.offset_y = offset_y
         self.tile_size = tile_size
+
+        # The view shows view_width x view_height tiles of the board,
+        # starting at the camera tile
+        self.view_width = view_width
+        self.view_height = view_height
+        self.camera_x = 0
+        self.camera_y = 0
+
+        # Visual state key last drawn in each view slot, -1 when unknown
+        self.slot_keys = [-1] * (view_width * view_height)
+
+    def reset(self):
+        self.camera_x = 0
+        self.camera_y = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Forgets what the view shows, so every tile is drawn again."""
+        slot_keys = self.slot_keys
+        for slot in range(len(slot_keys)):
+            slot_keys[slot] = -1
     
     # --- HELPERS ---
 
-    def get_bg_color(self, board: MinesweeperBoard, x, y):
-        tile = board.get_tile(x, y)
-        toggle: bool = (x + y) % 2 == 0
-
-        if tile.is_uncovered:
+    def get_bg_color(self, is_uncovered, toggle):
+        if is_uncovered:
             if toggle:
                 return SpriteLibrary.COLORS["uncovered_1"]
             else:
@@ -694,98 +2418,318 @@ class MinesweeperDisplay:
         else:
             return SpriteLibrary.COLORS["num_4_and_up"]
 
-    def get_tile_borders(self, board: MinesweeperBoard, x, y):
-        borders = [False, False, False, False]
-
-        up_tile = board.get_tile(x, y - 1)
-        down_tile = board.get_tile(x, y + 1)
-        left_tile = board.get_tile(x - 1, y)
-        right_tile = board.get_tile(x + 1, y)
-
-        if up_tile and not up_tile.is_uncovered:
-            borders[0] = True
-        if down_tile and not down_tile.is_uncovered:
-            borders[1] = True
-        if left_tile and not left_tile.is_uncovered:
-            borders[2] = True
-        if right_tile and not right_tile.is_uncovered:
-            borders[3] = True
-        
-        return borders
+    def get_tile_key(self, board: MinesweeperBoard, x, y) -> int:
+        """Everything that decides how the tile looks: checkerboard parity,
+        covered or not, a border on each side facing a covered tile, and
+        the number, flag or mine on it."""
+        w = board.width
+        i = y * w + x
+        tiles = board.tiles
+        tile = tiles[i]
+
+        key = (x + y) & 1
+        if tile & Tile.UNCOVERED:
+            key |= MinesweeperDisplay.UNCOVERED
+
+            kind = board.neighbor_kinds[i]
+            if not kind & MinesweeperBoard.EDGE_TOP and not tiles[i - w] & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_TOP
+            if not kind & MinesweeperBoard.EDGE_BOTTOM and not tiles[i + w] & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_BOTTOM
+            if not kind & MinesweeperBoard.EDGE_LEFT and not tiles[i - 1] & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_LEFT
+            if not kind & MinesweeperBoard.EDGE_RIGHT and not tiles[i + 1] & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_RIGHT
+
+            if tile & Tile.MINED:
+                key |= MinesweeperDisplay.MINE
+            else:
+                key |= (tile & Tile.MINE_COUNT_MASK) << MinesweeperDisplay.NUMBER_SHIFT
+
+        if tile & Tile.FLAGGED:
+            key |= MinesweeperDisplay.FLAG
+
+        return key
+
+    def build_tile_commands(self, key) -> list[tuple]:
+        t = self.tile_size
+        is_uncovered = key & MinesweeperDisplay.UNCOVERED
+
+        # Background
+        bg_color = self.get_bg_color(is_uncovered, not key & MinesweeperDisplay.ODD)
+        commands = [(0, 0, t, t, bg_color)]
+
+        # Borders
+        if is_uncovered:
+            border_color = SpriteLibrary.COLORS["uncovered_border"]
+            w = self.BORDER_WEIGHT
+
+            if key & MinesweeperDisplay.BORDER_TOP:
+                commands.append((0, 0, t, w, border_color))
+            if key & MinesweeperDisplay.BORDER_BOTTOM:
+                commands.append((0, t - w, t, w, border_color))
+            if key & MinesweeperDisplay.BORDER_LEFT:
+                commands.append((0, 0, w, t, border_color))
+            if key & MinesweeperDisplay.BORDER_RIGHT:
+                commands.append((t - w, 0, w, t, border_color))
+
+        # Number
+        num = key >> MinesweeperDisplay.NUMBER_SHIFT
+        if num:
+            num_color = self.get_num_color(num)
+            for dx, dy, w, h in SpriteLibrary.get_digit_rects(1)[num]:
+                commands.append((7 + dx, 6 + dy, w, h, num_color))
+
+        # Flag
+        if key & MinesweeperDisplay.FLAG:
+            flag_color = SpriteLibrary.COLORS["flag"]
+            for dx, dy, w, h in SpriteLibrary.get_sprite_rects(SpriteLibrary.FLAG_SPRITE, 1):
+                commands.append((dx, dy, w, h, flag_color))
+
+        # Mine
+        if key & MinesweeperDisplay.MINE:
+            mine_color = SpriteLibrary.COLORS["mine"]
+            for dx, dy, w, h in SpriteLibrary.get_sprite_rects(SpriteLibrary.MINE_SPRITE, 1):
+                commands.append((dx, dy, w, h, mine_color))
+
+        return commands
+
+    def get_tile_commands(self, key) -> list[tuple]:
+        cache = MinesweeperDisplay.TILE_COMMANDS
+        commands = cache.get(key)
+
+        if commands is None:
+            if len(cache) >= MinesweeperDisplay.TILE_COMMANDS_SIZE:
+                del cache[next(iter(cache))]
+            commands = self.build_tile_commands(key)
+            cache[key] = commands
+
+        return commands
+
+    # --- SCROLLING ---
+
+    def follow(self, board: MinesweeperBoard, x, y) -> bool:
+        """Scrolls the view by SCROLL_STEP tiles until (x, y) is at least
+        SCROLL_MARGIN tiles from its edges. Returns True if it scrolled."""
+        camera_x = self.get_camera_axis(x, self.camera_x, self.view_width, board.width)
+        camera_y = self.get_camera_axis(y, self.camera_y, self.view_height, board.height)
+
+        if camera_x == self.camera_x and camera_y == self.camera_y:
+            return False
+        self.scroll_to(board, camera_x, camera_y)
+        return True
+
+    def get_camera_axis(self, pos, camera, view_size, board_size) -> int:
+        max_camera = max(board_size - view_size, 0)
+        margin = min(SCROLL_MARGIN, (view_size - 1) // 2)
+
+        while pos < camera + margin and camera > 0:
+            camera -= SCROLL_STEP
+        while pos > camera + view_size - 1 - margin and camera < max_camera:
+            camera += SCROLL_STEP
+        return Util.clamp(camera, 0, max_camera)
+
+    def scroll_to(self, board: MinesweeperBoard, camera_x, camera_y):
+        """Moves the view. Screen contents can't be moved, so this is a
+        repaint of the whole view. Each slot keeps the key it was drawn
+        with, and slots whose new tile looks the same are skipped. That
+        only saves much over covered areas, with an even step."""
+        self.camera_x = camera_x
+        self.camera_y = camera_y
+
+        view_width, view_height = self.get_view_size(board)
+        for y in range(camera_y, camera_y + view_height):
+            for x in range(camera_x, camera_x + view_width):
+                self.draw_tile(board, x, y)
+
+    def get_view_size(self, board: MinesweeperBoard) -> tuple[int, int]:
+        """Tiles shown across and down, fewer on a board smaller than the view."""
+        return min(self.view_width, board.width), min(self.view_height, board.height)
 
     # --- DRAWING TILES ---
 
     def draw_dirty_tiles(self, board: MinesweeperBoard):
-        for y in range(board.height):
-            for x in range(board.width):
-                tile = board.get_tile(x, y)
+        if board.full_redraw:
+            self.draw_full_view(board)
 
-                if tile.needs_redraw:
-                    self.draw_tile(board, x, y)
-                    tile.needs_redraw = False
+        # The board already includes neighbors whose borders changed
+        dirty_tiles = board.dirty_tiles
+        if not dirty_tiles:
+            return
 
-                    # Redraw neighbors for border updates
-                    for nx, ny in board.get_neighbors(x, y):
-                        self.draw_tile(board, nx, ny)
+        tiles = board.tiles
+        not_dirty = ~Tile.DIRTY
 
-    def draw_tile(self, board: MinesweeperBoard, x, y):
-        tile = board.get_tile(x, y)
-        screen_x = self.offset_x + x * self.tile_size
-        screen_y = self.offset_y + y * self.tile_size
+        # More tiles than the view holds, only clear their marks and
+        # redraw the view, which skips slots that still look the same
+        if len(dirty_tiles) > len(self.slot_keys):
+            for i in dirty_tiles:
+                tiles[i] &= not_dirty
+            dirty_tiles.clear()
+            self.scroll_to(board, self.camera_x, self.camera_y)
+            return
 
-        # Draw background
-        bg_color = self.get_bg_color(board, x, y)
+        w = board.width
+        for i in dirty_tiles:
+            tiles[i] &= not_dirty
+            self.draw_tile(board, i % w, i // w)
+        dirty_tiles.clear()
+
+    def draw_full_view(self, board: MinesweeperBoard):
+        self.invalidate()
+        if board.is_untouched():
+            # Nothing uncovered or flagged yet, a plain checkerboard
+            self.draw_covered_board(board)
+        else:
+            self.scroll_to(board, self.camera_x, self.camera_y)
+        board.full_redraw = False
+
+    def draw_covered_board(self, board: MinesweeperBoard):
+        """First paint of a fresh board: the whole grid in the first
+        covered color, then one rect per tile of the second. No fewer rects
+        can draw a checkerboard, the last one drawn always shows a single
+        tile."""
+        t = self.tile_size
+        view_width, view_height = self.get_view_size(board)
+        camera_x, camera_y = self.camera_x, self.camera_y
 
         fill_rect(
-            screen_x, screen_y,
-            self.tile_size, self.tile_size,
-            bg_color
+            self.offset_x, self.offset_y,
+            view_width * t, view_height * t,
+            SpriteLibrary.COLORS["covered_1"]
         )
 
-        # Draw borders
-        if tile.is_uncovered:
-            borders = self.get_tile_borders(board, x, y)
-            border_color = SpriteLibrary.COLORS["uncovered_border"]
-            w = self.BORDER_WEIGHT
+        color = SpriteLibrary.COLORS["covered_2"]
+        slot_keys = self.slot_keys
+        for vy in range(view_height):
+            y = camera_y + vy
+            screen_y = self.offset_y + vy * t
+            row = vy * self.view_width
+            for vx in range(view_width):
+                # A covered tile's key is its parity
+                slot_keys[row + vx] = (camera_x + vx + y) & 1
+            for vx in range((camera_x + y + 1) % 2, view_width, 2):
+                fill_rect(self.offset_x + vx * t, screen_y, t, t, color)
 
-            if borders[0]:
-                fill_rect(screen_x, screen_y, self.tile_size, w, border_color) # Top
-            if borders[1]:
-                fill_rect(screen_x, screen_y + self.tile_size - w, self.tile_size, w, border_color) # Bottom
-            if borders[2]:
-                fill_rect(screen_x, screen_y, w, self.tile_size, border_color) # Left
-            if borders[3]:
-                fill_rect(screen_x + self.tile_size - w, screen_y, w, self.tile_size, border_color) # Right
-
-        # Draw number
-        if tile.is_uncovered and tile.neighboring_mine_count > 0 and not tile.is_mined:
-            num = tile.neighboring_mine_count
-            num_color = self.get_num_color(num)
-            num_sprite = SpriteLibrary.NUMBER_SPRITES[num]
-            SpriteLibrary.draw_sprite(screen_x + 7, screen_y + 6, num_sprite, num_color, 1)
+    def draw_tile(self, board: MinesweeperBoard, x, y):
+        # Tiles outside the view are drawn when scrolled to
+        view_x = x - self.camera_x
+        view_y = y - self.camera_y
+        if not (0 <= view_x < self.view_width and 0 <= view_y < self.view_height):
+            return
 
-        # Draw flag
-        if tile.is_flagged:
-            SpriteLibrary.draw_sprite(screen_x, screen_y, SpriteLibrary.FLAG_SPRITE, SpriteLibrary.COLORS["flag"], 1)
-        
-        # Draw mine
-        if tile.is_uncovered and tile.is_mined:
-            SpriteLibrary.draw_sprite(screen_x, screen_y, SpriteLibrary.MINE_SPRITE, SpriteLibrary.COLORS["mine"], 1)
+        # Already on screen
+        key = self.get_tile_key(board, x, y)
+        slot = view_y * self.view_width + view_x
+        if self.slot_keys[slot] == key:
+            return
+        self.slot_keys[slot] = key
+
+        screen_x = self.offset_x + view_x * self.tile_size
+        screen_y = self.offset_y + view_y * self.tile_size
+
+        for dx, dy, w, h, color in self.get_tile_commands(key):
+            fill_rect(screen_x + dx, screen_y + dy, w, h, color)
 
     def draw_selection_border(self, x, y):
         t = self.tile_size
         w = self.BORDER_WEIGHT
         color = SpriteLibrary.COLORS["selection_border"]
 
+        # The tile under the border has to be drawn again to erase it
+        view_x = x - self.camera_x
+        view_y = y - self.camera_y
+        self.slot_keys[view_y * self.view_width + view_x] = -1
+
         # Convert to screen coords
-        x = self.offset_x + x * t
-        y = self.offset_y + y * t
+        x = self.offset_x + view_x * t
+        y = self.offset_y + view_y * t
 
         fill_rect(x, y, t, w, color) # Top
         fill_rect(x, y + t - w, t, w, color) # Bottom
         fill_rect(x, y, w, t, color) # Left
         fill_rect(x + t - w, y, w, t, color) # Right
 
+class EndlessDisplay(MinesweeperDisplay):
+    """MinesweeperDisplay for an EndlessBoard. Tiles are looked up by
+    position, and the camera goes anywhere. It starts with (0, 0) in the
+    middle of the view."""
+
+    def reset(self):
+        self.camera_x = -(self.view_width // 2)
+        self.camera_y = -(self.view_height // 2)
+        self.invalidate()
+
+    def get_tile_key(self, board: EndlessBoard, x, y) -> int:
+        """See MinesweeperDisplay.get_tile_key. Every tile has four sides."""
+        tile = board.get_tile(x, y)
+
+        key = (x + y) & 1
+        if tile & Tile.UNCOVERED:
+            key |= MinesweeperDisplay.UNCOVERED
+
+            if not board.get_tile(x, y - 1) & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_TOP
+            if not board.get_tile(x, y + 1) & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_BOTTOM
+            if not board.get_tile(x - 1, y) & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_LEFT
+            if not board.get_tile(x + 1, y) & Tile.UNCOVERED:
+                key |= MinesweeperDisplay.BORDER_RIGHT
+
+            if tile & Tile.MINED:
+                key |= MinesweeperDisplay.MINE
+            else:
+                key |= (tile & Tile.MINE_COUNT_MASK) << MinesweeperDisplay.NUMBER_SHIFT
+
+        if tile & Tile.FLAGGED:
+            key |= MinesweeperDisplay.FLAG
+
+        return key
+
+    def follow(self, board: EndlessBoard, x, y) -> bool:
+        camera_x = self.get_camera_axis(x, self.camera_x, self.view_width)
+        camera_y = self.get_camera_axis(y, self.camera_y, self.view_height)
+
+        if camera_x == self.camera_x and camera_y == self.camera_y:
+            return False
+        self.scroll_to(board, camera_x, camera_y)
+        return True
+
+    def get_camera_axis(self, pos, camera, view_size) -> int:
+        # Like MinesweeperDisplay.get_camera_axis, with no board edge to stop at
+        margin = min(SCROLL_MARGIN, (view_size - 1) // 2)
+
+        while pos < camera + margin:
+            camera -= SCROLL_STEP
+        while pos > camera + view_size - 1 - margin:
+            camera += SCROLL_STEP
+        return camera
+
+    def get_view_size(self, board: EndlessBoard) -> tuple[int, int]:
+        return self.view_width, self.view_height
+
+    def draw_dirty_tiles(self, board: EndlessBoard):
+        if board.full_redraw:
+            self.draw_full_view(board)
+
+        dirty_tiles = board.dirty_tiles
+        if not dirty_tiles:
+            return
+
+        # Tiles outside the view are only unmarked, draw_tile skips them
+        for x, y in dirty_tiles:
+            board.clear_dirty(x, y)
+
+        if len(dirty_tiles) > len(self.slot_keys):
+            dirty_tiles.clear()
+            self.scroll_to(board, self.camera_x, self.camera_y)
+            return
+
+        for x, y in dirty_tiles:
+            self.draw_tile(board, x, y)
+        dirty_tiles.clear()
+
 class Hud:
     WIDTH = SCREEN_WIDTH
     HEIGHT = HUD_HEIGHT
@@ -903,6 +2847,240 @@ class MenuDisplay:
     def update_best_score(self, best_score: int):
         self.best_score_drawer.update(best_score)
 
+# =====================
+# PROFILING
+# =====================
+
+class FrameProfiler:
+    """Opt-in timings of MinesweeperManager.update.
+
+    Each frame records the time spent in every phase, and the fill_rect
+    calls and pixels drawn, into ring buffers of the last HISTORY frames.
+    dump prints their p50/p95/p99.
+
+    Counting draws swaps the module's fill_rect for a counting wrapper
+    while installed. Without a profiler the game keeps the plain fill_rect
+    and update only tests `if profiler` once per phase.
+    """
+    PHASES = ("input", "actions", "tiles", "selection", "hud", "flush")
+    INPUT, ACTIONS, TILES, SELECTION, HUD, FLUSH = 0, 1, 2, 3, 4, 5
+
+    HISTORY = 256
+
+    def __init__(self, clock=None, history=HISTORY):
+        # The headless backend passes a real clock, its monotonic is virtual
+        self.clock = clock or monotonic
+        self.history = history
+
+        self.frame_times = [0.0] * history
+        self.phase_times = [[0.0] * history for _ in self.PHASES]
+        self.fill_rects = [0] * history
+        self.pixels = [0] * history
+        self.reset()
+
+        self.draw = None
+
+    def reset(self):
+        """Forgets the recorded frames."""
+        self.head = 0
+        self.frames = 0
+
+        self.frame_start = 0.0
+        self.phase_start = 0.0
+        self.frame_fill_rects = 0
+        self.frame_pixels = 0
+
+    # --- DRAW COUNTERS ---
+
+    def install(self):
+        global fill_rect
+        if self.draw is not None:
+            return
+        self.draw = fill_rect
+
+        def counting_fill_rect(x, y, width, height, color):
+            self.frame_fill_rects += 1
+            self.frame_pixels += width * height
+            self.draw(x, y, width, height, color)
+
+        fill_rect = counting_fill_rect
+
+    def uninstall(self):
+        global fill_rect
+        if self.draw is None:
+            return
+        fill_rect = self.draw
+        self.draw = None
+
+    # --- RECORDING ---
+
+    def begin_frame(self):
+        now = self.clock()
+        self.frame_start = now
+        self.phase_start = now
+        self.frame_fill_rects = 0
+        self.frame_pixels = 0
+
+    def end_phase(self, phase):
+        now = self.clock()
+        self.phase_times[phase][self.head] = now - self.phase_start
+        self.phase_start = now
+
+    def end_frame(self):
+        head = self.head
+        self.frame_times[head] = self.clock() - self.frame_start
+        self.fill_rects[head] = self.frame_fill_rects
+        self.pixels[head] = self.frame_pixels
+
+        self.head = (head + 1) % self.history
+        self.frames += 1
+
+    # --- REPORTING ---
+
+    def get_recorded(self, ring) -> list:
+        """The values of a ring buffer that hold recorded frames."""
+        return ring[:min(self.frames, self.history)]
+
+    @staticmethod
+    def percentile(values, p):
+        # Nearest rank
+        ordered = sorted(values)
+        rank = max(int(p * len(ordered) + 0.999999) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def get_percentiles(self, ring) -> tuple:
+        values = self.get_recorded(ring)
+        return tuple(self.percentile(values, p) for p in (0.5, 0.95, 0.99))
+
+    def dump(self):
+        if not self.frames:
+            return
+
+        recorded = min(self.frames, self.history)
+        print("frames " + str(self.frames) + ", last " + str(recorded))
+        print("{:<10}{:>9}{:>9}{:>9}".format("ms", "p50", "p95", "p99"))
+
+        rows = [("frame", self.frame_times)]
+        for phase in range(len(self.PHASES)):
+            rows.append((self.PHASES[phase], self.phase_times[phase]))
+        for name, ring in rows:
+            p50, p95, p99 = self.get_percentiles(ring)
+            print("{:<10}{:>9.3f}{:>9.3f}{:>9.3f}".format(name, p50 * 1000, p95 * 1000, p99 * 1000))
+
+        for name, ring in (("fill_rect", self.fill_rects), ("pixels", self.pixels)):
+            p50, p95, p99 = self.get_percentiles(ring)
+            print("{:<10}{:>9}{:>9}{:>9}".format(name, p50, p95, p99))
+
+# =====================
+# REPLAY
+# =====================
+
+class ReplayRecorder:
+    """Records each game as a compact binary log that replay.py plays
+    back. Every number is a varint, 7 bits per byte, low bits first.
+
+    A log is VERSION, the RNG seed, width, height, mine amount and
+    no-guess flag, then the mined indices as gaps from the previous one,
+    then the events. The mines are logged instead of trusting the seed, as
+    MicroPython and CPython draw different numbers from the same seed,
+    and a no-guess layout comes from the pool.
+
+    An event is (frames since the last event << ACTION_BITS | action), x,
+    y. MOVE is the selection moving to (x, y). The END event holds the
+    game state and the time taken where x and y would be. An event is
+    usually 3 bytes.
+
+    Logs only live in memory, so with print_logs each one is also printed
+    when its game ends, as TEXT_PREFIX and the log in hex. replay.py
+    imports those lines from a copy of the console."""
+    VERSION = 1
+    MOVE, UNCOVER, FLAG, CHORD, END = 0, 1, 2, 3, 4
+    ACTION_BITS = 3
+    # Finished logs kept, the oldest is dropped first
+    MAX_LOGS = 16
+    TEXT_PREFIX = "replay "
+
+    logs: list[bytes]
+    seed: int
+    events: bytearray
+    # Updates since the game started, and at the last event
+    frame: int
+    last_frame: int
+
+    def __init__(self, print_logs=False):
+        self.print_logs = print_logs
+        self.logs = []
+        self.seed = 0
+        self.events = bytearray()
+        self.frame = 0
+        self.last_frame = 0
+
+    @staticmethod
+    def write_varint(buffer: bytearray, value) -> None:
+        while value >= 0x80:
+            buffer.append(value & 0x7F | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    @staticmethod
+    def read_varint(data, pos) -> tuple[int, int]:
+        """Returns the varint at data[pos] and the position after it."""
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value, pos
+            shift += 7
+
+    def begin(self) -> None:
+        """Seeds the RNG for a new game and starts its log."""
+        self.seed = getrandbits(30)
+        seed(self.seed)
+        self.events = bytearray()
+        self.frame = 0
+        self.last_frame = 0
+
+    def record(self, action, x, y) -> None:
+        write = ReplayRecorder.write_varint
+        events = self.events
+        write(events, (self.frame - self.last_frame) << ReplayRecorder.ACTION_BITS | action)
+        write(events, x)
+        write(events, y)
+        self.last_frame = self.frame
+
+    def end(self, board: MinesweeperBoard, time_taken) -> bytes:
+        """Finishes the log of the game on board and keeps it in logs."""
+        self.record(ReplayRecorder.END, board.game_state, time_taken)
+
+        write = ReplayRecorder.write_varint
+        log = bytearray()
+        for value in (ReplayRecorder.VERSION, self.seed, board.width, board.height,
+                      board.mine_amount, int(board.no_guess)):
+            write(log, value)
+
+        tiles = board.tiles
+        previous = 0
+        for i in range(len(tiles)):
+            if tiles[i] & Tile.MINED:
+                write(log, i - previous)
+                previous = i
+
+        log.extend(self.events)
+        log = bytes(log)
+
+        self.logs.append(log)
+        if len(self.logs) > ReplayRecorder.MAX_LOGS:
+            del self.logs[0]
+        if self.print_logs:
+            print(ReplayRecorder.to_text(log))
+        return log
+
+    @staticmethod
+    def to_text(log: bytes) -> str:
+        return ReplayRecorder.TEXT_PREFIX + "".join("%02x" % byte for byte in log)
+
 # =====================
 # PROGRAM FLOW
 # =====================
@@ -912,22 +3090,101 @@ class ProgramState:
     MENU = 1
     QUIT = 2
 
+class FramePacer:
+    """Sleeps between the frames of a loop instead of spinning.
+
+    While a key is held, frames run at the target frame rate, waking early
+    for a key repeat so RepeatingInputKey timing is kept. With nothing held,
+    the loop polls less often: just often enough that a press, plus the
+    frame reacting to it, stays within the latency budget. A loop can also
+    ask to wake for a timed change, like the HUD clock ticking.
+
+    The input to pixel latency of frames reacting to input is measured as
+    the time from the previous poll, the earliest the press could have
+    landed, to the end of the frame.
+    """
+    # Wake times are checked with `now > time`, wake just after them
+    WAKE_MARGIN = 0.001
+
+    def __init__(self, fps, latency_budget):
+        self.frame_time = 1 / fps
+        self.latency_budget = latency_budget
+
+        self.poll_time = 0.0
+        self.prev_poll_time = 0.0
+        # Work time of the last frame that reacted to input
+        self.work_time = 0.0
+
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.over_budget = 0
+
+    def begin_frame(self):
+        self.prev_poll_time = self.poll_time
+        self.poll_time = monotonic()
+
+    def end_frame(self, had_input, held, wake_time=None):
+        """Sleeps until the next frame is due. had_input tells whether this
+        frame reacted to input, held whether a key is still down."""
+        now = monotonic()
+
+        if had_input:
+            self.work_time = now - self.poll_time
+            self.latency = now - self.prev_poll_time
+            if self.latency > self.max_latency:
+                self.max_latency = self.latency
+            if self.latency > self.latency_budget:
+                self.over_budget += 1
+
+        if held:
+            interval = self.frame_time
+        else:
+            interval = max(self.latency_budget - self.work_time, self.frame_time)
+
+        deadline = self.poll_time + interval
+        if wake_time is not None and wake_time + self.WAKE_MARGIN < deadline:
+            deadline = wake_time + self.WAKE_MARGIN
+
+        if deadline > now:
+            sleep(deadline - now)
+
 class MinesweeperManager:
-    selector = DPadSelector(GRID_WIDTH -   1, GRID_HEIGHT - 1)
+    if ENDLESS:
+        selector = DPadSelector(None, None)
+
+        board = EndlessBoard()
+        display = EndlessDisplay(0, HUD_HEIGHT, TILE_SIZE, GRID_WIDTH, GRID_HEIGHT)
+    else:
+        selector = DPadSelector(BOARD_WIDTH - 1, BOARD_HEIGHT - 1)
 
-    board = MinesweeperBoard(GRID_WIDTH, GRID_HEIGHT, MINE_AMOUNT)
-    display = MinesweeperDisplay(0, HUD_HEIGHT, TILE_SIZE)
+        board = MinesweeperBoard(BOARD_WIDTH, BOARD_HEIGHT, MINE_AMOUNT, NO_GUESS)
+        display = MinesweeperDisplay(0, HUD_HEIGHT, TILE_SIZE, GRID_WIDTH, GRID_HEIGHT)
 
     hud = Hud()
 
+    # A FrameProfiler when profiling, None otherwise
+    profiler = None
+    # A ReplayRecorder when recording, None otherwise
+    recorder = None
+
     start_time: float
     time_taken: int
 
+    # Whether the last update reacted to input, for FramePacer
+    had_input: bool
+    # The selection border is on screen since reset
+    selection_drawn: bool
+
     def reset(self):
         self.start_time = monotonic()
         self.time_taken = 0
+        self.had_input = False
+        self.selection_drawn = False
 
+        if self.recorder:
+            self.recorder.begin()
         self.board.reset()
+        self.display.reset()
         self.display.draw_dirty_tiles(self.board)
 
         self.selector.x = 0
@@ -935,46 +3192,116 @@ class MinesweeperManager:
 
         self.hud.reset()
 
+        if shadow:
+            shadow.flush()
+        if self.profiler:
+            self.profiler.reset()
+
     def update(self) -> ProgramState:
-        now = monotonic()
-        self.time_taken = int(now - self.start_time)
+        profiler = self.profiler
+        if profiler: profiler.begin_frame()
+
+        recorder = self.recorder
+        if recorder: recorder.frame += 1
 
         # INPUT
+        frame = input_frame.sample()
+        self.time_taken = int(frame.now - self.start_time)
+
         prev_x, prev_y = self.selector.x, self.selector.y
-        self.selector.update()
+        self.selector.update(frame)
         x, y = self.selector.x, self.selector.y
+        if profiler: profiler.end_phase(FrameProfiler.INPUT)
+
+        moved = x != prev_x or y != prev_y
+        self.had_input = moved
+        if recorder and moved: recorder.record(ReplayRecorder.MOVE, x, y)
 
         # ACTIONS
-        if MinesweeperInputs.FLAG_KEY.is_triggered():
+        if MinesweeperInputs.FLAG_KEY.is_triggered(frame):
             self.board.flag_tile(x, y)
+            self.had_input = True
+            if recorder: recorder.record(ReplayRecorder.FLAG, x, y)
         
-        if MinesweeperInputs.UNCOVER_KEY.is_triggered():
+        if MinesweeperInputs.UNCOVER_KEY.is_triggered(frame):
             self.board.uncover_tile(x, y)
+            self.had_input = True
+            if recorder: recorder.record(ReplayRecorder.UNCOVER, x, y)
+
+        # OK on anything but a satisfied number changes nothing
+        if MinesweeperInputs.CHORD_KEY.is_triggered(frame) and self.board.chord_tile(x, y):
+            self.had_input = True
+            if recorder: recorder.record(ReplayRecorder.CHORD, x, y)
+        if profiler: profiler.end_phase(FrameProfiler.ACTIONS)
 
         # RENDER
-        if x != prev_x or y != prev_y:
+        if moved:
             # Erase prev selection border
-            self.board.get_tile(prev_x, prev_y).needs_redraw = True
+            self.board.mark_dirty(prev_x, prev_y)
+            # Scroll to keep the selection in view
+            if self.display.follow(self.board, x, y):
+                self.selection_drawn = False
+
+        # The border is only drawn again when it moved or its tile is redrawn
+        redraw_selection = (
+            moved or not self.selection_drawn or self.board.full_redraw
+            or self.board.get_tile(x, y) & Tile.DIRTY
+        )
         
         self.display.draw_dirty_tiles(self.board)
-        self.display.draw_selection_border(x, y)
+        if profiler: profiler.end_phase(FrameProfiler.TILES)
+        if redraw_selection:
+            self.display.draw_selection_border(x, y)
+            self.selection_drawn = True
+        if profiler: profiler.end_phase(FrameProfiler.SELECTION)
         
         # UPDATE HUD
-        self.hud.update_flags_left(self.board.flags_left)
+        if ENDLESS:
+            # Two digits on the HUD
+            self.hud.update_flags_left(min(self.board.flags_placed, 99))
+        else:
+            self.hud.update_flags_left(self.board.flags_left)
         self.hud.update_time_taken(self.time_taken)
+        if profiler: profiler.end_phase(FrameProfiler.HUD)
+
+        if shadow:
+            shadow.flush()
+        if profiler:
+            profiler.end_phase(FrameProfiler.FLUSH)
+            profiler.end_frame()
         
         # CHECK GAME STATE
+        if recorder and self.board.game_state != GameState.PLAYING:
+            recorder.end(self.board, self.time_taken)
+
         if self.board.game_state == GameState.WON:
+            if profiler: profiler.dump()
             self.win()
             return ProgramState.MENU
         
         elif self.board.game_state == GameState.LOST:
+            if profiler: profiler.dump()
             self.lose()
             return ProgramState.MENU
         
         return ProgramState.GAME
     
+    def is_held(self) -> bool:
+        return (self.selector.is_held() or MinesweeperInputs.FLAG_KEY.is_down
+                or MinesweeperInputs.UNCOVER_KEY.is_down
+                or MinesweeperInputs.CHORD_KEY.is_down)
+
+    def get_wake_time(self) -> float:
+        """The next key repeat, or else the next tick of the HUD clock."""
+        next_tick = self.start_time + self.time_taken + 1
+        next_repeat = self.selector.get_next_repeat()
+        if next_repeat is not None and next_repeat < next_tick:
+            return next_repeat
+        return next_tick
+
     def win(self):
+        global best_score
+
         # Update high score
         current_score: int = floor(self.time_taken)
         current_written_score: int = best_score
@@ -991,24 +3318,42 @@ class MenuManager:
     selector = DPadSelector(0, 2) # 3 options
     menu_display = MenuDisplay()
 
+    # Whether the last update reacted to input or filled the layout pool,
+    # for FramePacer
+    had_input = False
+    is_busy = False
+
     def reset(self):
         self.selector.y = 0
         self.menu_display.reset()
 
         if best_score != -1:
             self.menu_display.update_best_score(best_score)
+
+        if shadow:
+            shadow.flush()
     
     def update(self) -> ProgramState:
-        self.selector.update()
+        global best_score
+
+        frame = input_frame.sample()
+
+        prev_pos = self.selector.y
+        self.selector.update(frame)
 
         selector_pos = self.selector.y
 
         self.menu_display.update_selector_pos(selector_pos)
+        self.had_input = selector_pos != prev_pos
+        self.is_busy = False
+        result = ProgramState.MENU
+
+        if MinesweeperInputs.OK_KEY.is_triggered(frame):
+            self.had_input = True
 
-        if MinesweeperInputs.OK_KEY.is_triggered():
             if selector_pos == 0:
                 # Start game
-                return ProgramState.GAME
+                result = ProgramState.GAME
 
             elif self.selector.y == 1:
                 # Reset best score
@@ -1017,16 +3362,42 @@ class MenuManager:
 
             elif self.selector.y == 2:
                 # Quit
-                return ProgramState.QUIT
+                result = ProgramState.QUIT
+
+        elif selector_pos == prev_pos:
+            # Idle frame, prepare no-guess layouts for the next games
+            self.is_busy = layout_pool.fill_step()
+
+        if shadow:
+            shadow.flush()
                 
-        return ProgramState.MENU
+        return result
+
+    def is_held(self) -> bool:
+        # Filling the pool keeps the frame rate up, like a held key
+        return self.selector.is_held() or MinesweeperInputs.OK_KEY.is_down or self.is_busy
+
+# Installed before the profiler, which then counts the draws requested
+shadow = None
+if SHADOW_FRAMEBUFFER:
+    shadow = ShadowFramebuffer()
+    shadow.install()
 
 game = MinesweeperManager()
+if PROFILE:
+    game.profiler = FrameProfiler()
+    game.profiler.install()
+if RECORD and not ENDLESS:
+    game.recorder = ReplayRecorder(print_logs=True)
+
+pacer = FramePacer(TARGET_FPS, LATENCY_BUDGET)
 
 def enter_game():
     game.reset()
     while True:
+        pacer.begin_frame()
         result = game.update()
+        pacer.end_frame(game.had_input, game.is_held(), game.get_wake_time())
         if result == ProgramState.MENU:
             enter_menu()
 
@@ -1035,10 +3406,14 @@ menu = MenuManager()
 def enter_menu():
     menu.reset()
     while True:
+        pacer.begin_frame()
         result = menu.update()
+        pacer.end_frame(menu.had_input, menu.is_held(), menu.selector.get_next_repeat())
         if result == ProgramState.GAME:
             enter_game()
         elif result == ProgramState.QUIT:
             break
 
-enter_menu()
\ No newline at end of file
+# The headless backend sets HEADLESS to import the script without playing
+if not globals().get("HEADLESS", False):
+    enter_menu()
\ No newline at end of file
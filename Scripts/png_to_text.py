@@ -1,29 +1,74 @@
+import argparse
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageChops
 from math import *
 
-def get_image_as_txt(image: Image) -> str:
+# =====================
+# ASSET BUILD
+# =====================
+# Converts the PNGs under Assets/Sprites and Assets/Fonts to sprite text
+# next to each PNG, and regenerates the sprite constants of SpriteLibrary
+# in minesweeper.py from Assets/Sprites.
+#
+#   python png_to_text.py [--force] [--jobs N] [--report]
+
+ROOT_PATH = Path(__file__).resolve().parent.parent
+ASSETS_PATH = ROOT_PATH / "Assets"
+SOURCE_DIRS = (ASSETS_PATH / "Sprites", ASSETS_PATH / "Fonts")
+# Only these become SpriteLibrary constants, fonts are too big for the calculator
+MODULE_DIR = ASSETS_PATH / "Sprites"
+
+GAME_PATH = ROOT_PATH / "Scripts" / "minesweeper.py"
+MANIFEST_PATH = ASSETS_PATH / ".build_manifest.json"
+# Bump when the output format changes, so every PNG is converted again
+BUILD_VERSION = 1
+
+# Spritesheets by file stem: (constant name, cell width, cell height)
+SPRITESHEETS = {
+    "numbers": ("NUMBER_SPRITES", 6, 9),
+    "reffspixelfont_spritesheet_0_to_1023": ("FONT_SPRITES", 17, 17),
+}
+
+BEGIN_MARKER = "    # --- BEGIN GENERATED SPRITES ---\n"
+END_MARKER = "    # --- END GENERATED SPRITES ---\n"
+
+# Opaque black is the only color that counts as a set pixel. Image.point
+# tables for a band that is 0, and for one that is 255
+IS_ZERO = [255] + [0] * 255
+IS_FULL = [0] * 255 + [255]
+
+def get_image_packed(image: Image) -> bytes:
+    """Packs the set pixels one bit each, MSB first, rows padded to a
+    byte. This is the bitmap sprite layout."""
+    red, green, blue, alpha = image.convert("RGBA").split()
+    brightest = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    mask = ImageChops.darker(brightest.point(IS_ZERO), alpha.point(IS_FULL))
+    return mask.convert("1", dither=Image.Dither.NONE).tobytes()
+
+def get_image_rows(image: Image) -> list[int]:
+    """Returns each row as an int, bit (width - 1 - x) set for pixel x."""
     width, height = image.size
-    pixel_values = image.load()
+    bytes_per_row = ceil(width/8)
+    padding = bytes_per_row * 8 - width
+    packed = get_image_packed(image)
+
+    return [
+        int.from_bytes(packed[start:start + bytes_per_row], "big") >> padding
+        for start in range(0, len(packed), bytes_per_row)
+    ]
 
+def get_image_as_txt(image: Image) -> str:
+    width, height = image.size
     bytes_per_row = ceil(width/8)
+    packed = get_image_packed(image)
 
     lines = []
-    for y in range(height):
-        row = []
-        for i in range(bytes_per_row):
-            bits = ""
-            for j in range(8):
-                x = i * 8 + j
-                if x >= width:
-                    bits += "0"
-                else:
-                    r, g, b, a = pixel_values[x, y]
-                    is_black = r == 0 and g == 0 and b == 0 and a == 255
-                    bits += "1" if is_black else "0"
-                
-            row.append("0b" + bits)
-        lines.append("\t" + ", ".join(row))
+    for start in range(0, len(packed), bytes_per_row):
+        row = packed[start:start + bytes_per_row]
+        lines.append("\t" + ", ".join(f"0b{byte:08b}" for byte in row))
 
     txt = (
         f"({width}, {height}, bytes([\n" 
@@ -55,13 +100,232 @@ def get_spritesheet_as_txt(image: Image, width: int, height: int) -> str:
     )
     return spritesheet_as_txt
 
-#PATH = "Minesweeper/Assets/Sprites/Numbers"
-#txt = get_spritesheet_as_txt(PATH + "/numbers.png", 6, 9)
-#Path(PATH + "/numbers.txt").write_text(txt)
+# =====================
+# RECT COVER
+# =====================
+# A rect-list sprite is (width, height, ((x, y, w, h), ...)) and is drawn
+# with one fill_rect per rect. Rects may overlap, they share one color.
+
+def get_image_bits(image: Image) -> list[list[bool]]:
+    width = image.width
+    return [
+        [bool(row >> (width - 1 - x) & 1) for x in range(width)]
+        for row in get_image_rows(image)
+    ]
+
+def get_run_rects(bits: list[list[bool]]) -> list[tuple[int, int, int, int]]:
+    """One rect per horizontal run, what the bitmap format draws."""
+    rects = []
+    for y, row in enumerate(bits):
+        x = 0
+        while x < len(row):
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < len(row) and row[x]:
+                x += 1
+            rects.append((start, y, x - start, 1))
+    return rects
+
+def get_rect_cover(bits: list[list[bool]]) -> list[tuple[int, int, int, int]]:
+    """Greedy near-minimal cover of the set bits by rectangles.
+
+    Each uncovered bit, in reading order, starts the rect that covers the
+    most still uncovered bits. Candidates span every run width from that
+    bit and grow down while the whole span stays set, so runs that repeat
+    across rows merge into one rect.
+    """
+    height = len(bits)
+    width = len(bits[0]) if height else 0
+    covered = [[False] * width for _ in range(height)]
+    rects = []
+
+    for y in range(height):
+        for x in range(width):
+            if not bits[y][x] or covered[y][x]:
+                continue
+
+            max_w = 0
+            while x + max_w < width and bits[y][x + max_w]:
+                max_w += 1
+
+            best = None
+            best_score = (-1, -1)
+            for w in range(1, max_w + 1):
+                h = 1
+                while y + h < height and all(bits[y + h][x:x + w]):
+                    h += 1
+
+                new_bits = sum(
+                    not covered[ry][rx]
+                    for ry in range(y, y + h) for rx in range(x, x + w)
+                )
+                score = (new_bits, w * h)
+                if score > best_score:
+                    best, best_score = (x, y, w, h), score
+
+            rx, ry, rw, rh = best
+            for cy in range(ry, ry + rh):
+                for cx in range(rx, rx + rw):
+                    covered[cy][cx] = True
+            rects.append(best)
+
+    # Never worse than drawing the runs
+    runs = get_run_rects(bits)
+    return rects if len(rects) <= len(runs) else runs
+
+def get_spritesheet_cells(image: Image, width: int, height: int) -> list[Image]:
+    x_amount = floor(image.width / width)
+    y_amount = floor(image.height / height)
+    return [
+        image.crop((x * width, y * height, (x+1) * width, (y+1) * height))
+        for y in range(y_amount) for x in range(x_amount)
+    ]
+
+def report_rect_counts(path: Path) -> None:
+    """Prints fill_rect calls per sprite, run format vs rect cover."""
+    print(f"{'sprite':<28} {'runs':>6} {'rects':>6}")
+    total_runs, total_rects = 0, 0
+
+    for file in sorted(path.rglob("*.png")):
+        image = Image.open(file).convert("RGBA")
+        if file.stem in SPRITESHEETS:
+            _, cell_width, cell_height = SPRITESHEETS[file.stem]
+            images = get_spritesheet_cells(image, cell_width, cell_height)
+        else:
+            images = [image]
+
+        for n, image in enumerate(images):
+            bits = get_image_bits(image)
+            runs, rects = len(get_run_rects(bits)), len(get_rect_cover(bits))
+            total_runs += runs
+            total_rects += rects
+
+            name = file.stem if len(images) == 1 else f"{file.stem}[{n}]"
+            print(f"{name:<28} {runs:>6} {rects:>6}")
+
+    print(f"{'total':<28} {total_runs:>6} {total_rects:>6}")
+
+# =====================
+# BUILD
+# =====================
+
+def get_file_hash(file: Path) -> str:
+    digest = hashlib.sha256(file.read_bytes())
+    digest.update(str(BUILD_VERSION).encode())
+    return digest.hexdigest()
+
+def get_constant_name(file: Path) -> str:
+    if file.stem in SPRITESHEETS:
+        return SPRITESHEETS[file.stem][0]
+    return file.stem.upper() + "_SPRITE"
+
+def convert_png(file: Path) -> dict:
+    """Process pool worker: writes the .txt next to the PNG and returns its
+    manifest entry, with rect-list sprites when it feeds SpriteLibrary."""
+    image = Image.open(file).convert("RGBA")
+
+    if file.stem in SPRITESHEETS:
+        _, cell_width, cell_height = SPRITESHEETS[file.stem]
+        txt = get_spritesheet_as_txt(image, cell_width, cell_height)
+        images = get_spritesheet_cells(image, cell_width, cell_height)
+    else:
+        txt = get_image_as_txt(image)
+        images = [image]
+
+    txt_file = file.with_suffix(".txt")
+    if not txt_file.exists() or txt_file.read_text() != txt:
+        txt_file.write_text(txt)
+
+    entry = {"hash": get_file_hash(file)}
+    if MODULE_DIR in file.parents:
+        entry["sprites"] = [
+            [image.width, image.height, get_rect_cover(get_image_bits(image))]
+            for image in images
+        ]
+    return entry
+
+def format_sprite(sprite: list, indent: str) -> str:
+    width, height, rects = sprite
+    lines = [f"{indent}    ({x}, {y}, {w}, {h})," for x, y, w, h in rects]
+    return f"({width}, {height}, (\n" + "\n".join(lines) + f"\n{indent}))"
+
+def get_module_block(manifest: dict) -> str:
+    lines = ["    # Generated by png_to_text.py from Assets/Sprites, do not edit\n"]
+
+    for key in sorted(manifest):
+        file = ROOT_PATH / key
+        if "sprites" not in manifest[key]:
+            continue
+
+        name = get_constant_name(file)
+        sprites = manifest[key]["sprites"]
+
+        if file.stem in SPRITESHEETS:
+            items = [f"        {format_sprite(sprite, '        ')}" for sprite in sprites]
+            lines.append(f"    {name} = [\n" + ",\n".join(items) + "\n    ]\n\n")
+        else:
+            lines.append(f"    {name} = {format_sprite(sprites[0], '    ')}\n\n")
+
+    return "".join(lines)
+
+def write_module(manifest: dict) -> bool:
+    source = GAME_PATH.read_text()
+    start = source.index(BEGIN_MARKER) + len(BEGIN_MARKER)
+    end = source.index(END_MARKER)
+
+    updated = source[:start] + get_module_block(manifest) + source[end:]
+    if updated == source:
+        return False
+
+    GAME_PATH.write_text(updated)
+    return True
+
+def build(force: bool, jobs: int) -> None:
+    manifest = {}
+    if MANIFEST_PATH.exists() and not force:
+        manifest = json.loads(MANIFEST_PATH.read_text())
+
+    files = sorted(file for path in SOURCE_DIRS for file in path.rglob("*.png"))
+    keys = [file.relative_to(ROOT_PATH).as_posix() for file in files]
+
+    # Content hashes decide what is converted again
+    stale = []
+    for file, key in zip(files, keys):
+        entry = manifest.get(key)
+        if entry is None or entry["hash"] != get_file_hash(file) \
+                or not file.with_suffix(".txt").exists():
+            stale.append((file, key))
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            entries = pool.map(convert_png, [file for file, _ in stale])
+            for (_, key), entry in zip(stale, entries):
+                manifest[key] = entry
+                print(f"converted {key}")
+
+    # Forget deleted PNGs
+    manifest = {key: manifest[key] for key in keys}
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+
+    if write_module(manifest):
+        print(f"updated {GAME_PATH.relative_to(ROOT_PATH).as_posix()}")
+
+    print(f"{len(stale)} converted, {len(files) - len(stale)} up to date")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build sprite assets")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--report", action="store_true",
+        help="print fill_rect calls per sprite instead of building")
+    args = parser.parse_args()
+
+    if args.report:
+        report_rect_counts(MODULE_DIR)
+    else:
+        build(args.force, args.jobs)
 
-path1 = Path("Minesweeper/Assets/Sprites/Menu")
-for file in Path(path1).iterdir():
-    if file.suffix.lower() == ".png":
-        txt = get_image_as_txt(Image.open(file))
-        txt_file = Path(str(file).removesuffix(".png") + ".txt")
-        txt_file.write_text(txt)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from headless import Backend
+
+# =====================
+# MINE PROBABILITIES
+# =====================
+# Checks MineProbabilities, the exact solver behind
+# MinesweeperBoard.get_mine_probabilities, against brute force
+# enumeration of every mine layout on small boards. Times whole solves
+# over expert games played from its own probabilities, and its
+# incremental constraint upkeep against a full rebuild.
+#
+#   python probabilities.py [--seed S] verify [--trials N]
+#   python probabilities.py [--seed S] bench [--games N] [--moves N]
+
+def brute_force(ms, board) -> list[float]:
+    """Mine probability of every tile from all layouts of the remaining
+    mines over the unknown tiles that agree with the numbers. None when
+    no layout does."""
+    Tile = ms.Tile
+    tiles = board.tiles
+
+    unknown = [i for i in range(len(tiles)) if not tiles[i] & (Tile.UNCOVERED | Tile.FLAGGED)]
+    flagged = {i for i in range(len(tiles)) if tiles[i] & Tile.FLAGGED}
+    exploded = sum(1 for tile in tiles if tile & Tile.UNCOVERED and tile & Tile.MINED)
+    mines_left = board.mine_amount - len(flagged) - exploded
+
+    numbers = [
+        (i, tiles[i] & Tile.MINE_COUNT_MASK, list(board.neighbors(i)))
+        for i in range(len(tiles))
+        if tiles[i] & Tile.UNCOVERED and not tiles[i] & Tile.MINED
+    ]
+
+    total = 0
+    mined_counts = dict.fromkeys(unknown, 0)
+    if 0 <= mines_left <= len(unknown):
+        for layout in itertools.combinations(unknown, mines_left):
+            mined = flagged.union(layout)
+            if all(sum(j in mined for j in around) == count for _, count, around in numbers):
+                total += 1
+                for i in layout:
+                    mined_counts[i] += 1
+    if total == 0:
+        return None
+
+    probabilities = [0.0] * len(tiles)
+    for i in flagged:
+        probabilities[i] = 1.0
+    for i in unknown:
+        probabilities[i] = mined_counts[i] / total
+    return probabilities
+
+def play_random_move(ms, board, rng) -> None:
+    """Uncovers, flags or chords a random tile, usually a safe move so
+    games build up a frontier. Some flags are wrong on purpose."""
+    Tile = ms.Tile
+    w = board.width
+    i = rng.randrange(len(board.tiles))
+    tile = board.tiles[i]
+
+    roll = rng.random()
+    if roll < 0.2:
+        board.flag_tile(i % w, i // w)
+    elif roll < 0.3:
+        board.chord_tile(i % w, i // w)
+    elif not tile & Tile.MINED or roll < 0.35:
+        board.uncover_tile(i % w, i // w)
+
+def verify(trials, seed):
+    ms = Backend().load_game()
+    rng = random.Random(seed)
+    checked = unsolvable = 0
+
+    for trial in range(trials):
+        width, height = rng.randint(2, 6), rng.randint(2, 5)
+        max_mines = ms.MinesweeperBoard.get_max_mine_amount(width, height)
+        board = ms.MinesweeperBoard(width, height, rng.randint(0, max_mines))
+
+        random.seed(rng.random())
+        board.uncover_tile(rng.randrange(width), rng.randrange(height))
+
+        # Solving after every move keeps the constraints incremental
+        for step in range(rng.randint(1, 12)):
+            if board.game_state != ms.GameState.PLAYING:
+                break
+
+            expected = brute_force(ms, board)
+            actual = board.get_mine_probabilities()
+            if expected is None:
+                assert actual is None, ("expected no layout", trial, step)
+                unsolvable += 1
+            else:
+                assert actual is not None, ("expected layouts", trial, step)
+                for i in range(len(expected)):
+                    assert abs(actual[i] - expected[i]) < 1e-9, (trial, step, i, actual[i], expected[i])
+            checked += 1
+
+            play_random_move(ms, board, rng)
+
+    print(f"{trials} trials, {checked} board states match brute force "
+          f"({unsolvable} with no layout)")
+
+def play_best_move(ms, board, probabilities) -> None:
+    """Flags every certain mine, then uncovers the safest tile."""
+    Tile = ms.Tile
+    w = board.width
+    best = None
+    for i in range(len(board.tiles)):
+        if board.tiles[i] & (Tile.UNCOVERED | Tile.FLAGGED):
+            continue
+        if probabilities[i] == 1.0:
+            board.flag_tile(i % w, i // w)
+        elif best is None or probabilities[i] < probabilities[best]:
+            best = i
+    if best is not None:
+        board.uncover_tile(best % w, best // w)
+
+def bench_games(ms, games, seed):
+    """Times every solve of expert games played from the probabilities,
+    and the enumeration of each new component on its own."""
+    rng = random.Random(seed)
+    solves = []
+    # (cells, seconds) of every component enumerated cold
+    components = []
+
+    for _ in range(games):
+        random.seed(rng.random())
+        board = ms.MinesweeperBoard(30, 16, 99)
+        board.uncover_tile(rng.randrange(30), rng.randrange(16))
+        solver = board.mine_probabilities
+
+        while board.game_state == ms.GameState.PLAYING:
+            for component in solver.get_components(solver.get_constraints()):
+                if component not in solver.component_cache:
+                    start = time.perf_counter()
+                    solver.solve_component(component)
+                    components.append((len({cell for cells, _ in component for cell in cells}),
+                                       time.perf_counter() - start))
+                    # Cold again for the timed solve
+                    del solver.component_cache[component]
+
+            start = time.perf_counter()
+            probabilities = solver.solve()
+            solves.append(time.perf_counter() - start)
+            play_best_move(ms, board, probabilities)
+
+    solves.sort()
+    print(f"{games} expert games, {len(solves)} solves")
+    print(f"solve ms   p50 {solves[len(solves) // 2] * 1000:.2f}  "
+          f"p99 {solves[int(0.99 * (len(solves) - 1))] * 1000:.2f}  max {solves[-1] * 1000:.2f}")
+    cells, slowest = max(components, key=lambda component: component[1])
+    print(f"{len(components)} components enumerated, largest "
+          f"{max(size for size, _ in components)} cells, slowest {slowest * 1000:.2f} ms ({cells} cells)")
+
+def bench(games, moves, seed):
+    ms = Backend().load_game()
+    bench_games(ms, games, seed)
+    print()
+    configs = (
+        ("expert", 30, 16, 99),
+        ("100x100", 100, 100, 2000),
+    )
+
+    print(f"{'board':<10} {'rebuild ms':>11} {'incremental ms':>15} {'speedup':>8}")
+    for label, width, height, mine_amount in configs:
+        rng = random.Random(seed)
+        random.seed(seed)
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+        board.uncover_tile(width // 2, height // 2)
+
+        solver = board.mine_probabilities
+        solver.get_constraints()
+        rebuilds, updates = [], []
+
+        for _ in range(moves):
+            if board.game_state != ms.GameState.PLAYING:
+                break
+            play_random_move(ms, board, rng)
+
+            start = time.perf_counter()
+            incremental = solver.get_constraints()
+            updates.append(time.perf_counter() - start)
+
+            fresh = ms.MineProbabilities(board)
+            start = time.perf_counter()
+            rebuilt = fresh.get_constraints()
+            rebuilds.append(time.perf_counter() - start)
+            board.unsubscribe(fresh.on_change)
+
+            assert sorted(incremental) == sorted(rebuilt), "incremental constraints differ"
+
+        rebuild = statistics.median(rebuilds) * 1000
+        update = statistics.median(updates) * 1000
+        print(f"{label:<10} {rebuild:>11.3f} {update:>15.3f} {rebuild / update:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact mine probabilities")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = commands.add_parser("verify", help="compare against brute force on small boards")
+    verify_parser.add_argument("--trials", type=int, default=300)
+
+    bench_parser = commands.add_parser("bench", help="solve times over expert games, and constraint upkeep")
+    bench_parser.add_argument("--games", type=int, default=40)
+    bench_parser.add_argument("--moves", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == "verify":
+        verify(args.trials, args.seed)
+    else:
+        bench(args.games, args.moves, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+import argparse
+import random
+import time
+from pathlib import Path
+
+from headless import Backend
+
+# =====================
+# REPLAY
+# =====================
+# Plays ReplayRecorder logs back through MinesweeperBoard as fast as it
+# goes: no game loop, no clock and no drawing, except for the frames asked
+# for. A replay file holds many logs: MAGIC, then each log after its
+# length as a varint.
+#
+#   python replay.py record FILE [--games N] [--seed S]
+#   python replay.py import TEXT FILE
+#   python replay.py play FILE [--game N] [--render FRAME ...] [--out DIR]
+#   python replay.py bench FILE [--games N]
+#   python replay.py verify [--games N] [--seed S]
+
+MAGIC = b"MSRP"
+FRAME_TIME = 1 / 60
+
+class ReplayLog:
+    """One game's log with its header read, see ReplayRecorder."""
+
+    def __init__(self, ms, data: bytes):
+        read = ms.ReplayRecorder.read_varint
+
+        version, pos = read(data, 0)
+        if version != ms.ReplayRecorder.VERSION:
+            raise ValueError("unsupported replay log version " + str(version))
+
+        self.seed, pos = read(data, pos)
+        self.width, pos = read(data, pos)
+        self.height, pos = read(data, pos)
+        self.mine_amount, pos = read(data, pos)
+        no_guess, pos = read(data, pos)
+        self.no_guess = bool(no_guess)
+
+        self.mines = []
+        mine = 0
+        for _ in range(self.mine_amount):
+            gap, pos = read(data, pos)
+            mine += gap
+            self.mines.append(mine)
+
+        self.data = data
+        self.events_start = pos
+
+    def events(self, ms):
+        """Iterates over (frame, action, x, y), frames counted from the
+        start of the game."""
+        read = ms.ReplayRecorder.read_varint
+        action_bits = ms.ReplayRecorder.ACTION_BITS
+        action_mask = (1 << action_bits) - 1
+        data = self.data
+        pos = self.events_start
+        frame = 0
+
+        while pos < len(data):
+            packed, pos = read(data, pos)
+            x, pos = read(data, pos)
+            y, pos = read(data, pos)
+            frame += packed >> action_bits
+            yield frame, packed & action_mask, x, y
+
+# --- FILES ---
+
+def write_logs(ms, path, logs) -> None:
+    out = bytearray(MAGIC)
+    for log in logs:
+        ms.ReplayRecorder.write_varint(out, len(log))
+        out.extend(log)
+    Path(path).write_bytes(out)
+
+def read_logs(ms, path) -> list[bytes]:
+    data = Path(path).read_bytes()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(str(path) + " is not a replay file")
+
+    logs = []
+    pos = len(MAGIC)
+    while pos < len(data):
+        length, pos = ms.ReplayRecorder.read_varint(data, pos)
+        logs.append(data[pos:pos + length])
+        pos += length
+    return logs
+
+# =====================
+# ENGINE
+# =====================
+
+class ReplayEngine:
+    """Plays logs back on boards reused across games. The board's own
+    rules decide the outcome, which must match the one logged."""
+
+    def __init__(self, ms):
+        self.ms = ms
+        # (width, height, mine_amount) -> board
+        self.boards = {}
+        self.display = None
+
+    def get_board(self, log: ReplayLog):
+        key = (log.width, log.height, log.mine_amount)
+        board = self.boards.get(key)
+        if board is None:
+            board = self.ms.MinesweeperBoard(log.width, log.height, log.mine_amount)
+            self.boards[key] = board
+        else:
+            board.reset()
+
+        # The logged mines stand in for the first click's generation
+        board.place_mines(log.mines)
+        board.is_first_click = False
+        return board
+
+    def play(self, log: ReplayLog, render_frames=(), on_render=None) -> tuple[int, int, int]:
+        """Plays a log back. Draws the board as it was at the end of each of
+        render_frames and calls on_render(frame). Returns the game state
+        reached, the game state logged and the time taken logged."""
+        ms = self.ms
+        Recorder = ms.ReplayRecorder
+        MOVE, UNCOVER, FLAG, CHORD = Recorder.MOVE, Recorder.UNCOVER, Recorder.FLAG, Recorder.CHORD
+        action_bits = Recorder.ACTION_BITS
+        action_mask = (1 << action_bits) - 1
+        read = Recorder.read_varint
+
+        # Seeded as the game was, for anything that draws from the RNG
+        ms.seed(log.seed)
+        board = self.get_board(log)
+        uncover_tile, flag_tile, chord_tile = board.uncover_tile, board.flag_tile, board.chord_tile
+
+        rendering = bool(render_frames)
+        if rendering:
+            pending = sorted(render_frames, reverse=True)
+            display = self.get_display()
+            display.reset()
+
+        data = log.data
+        pos = log.events_start
+        end = len(data)
+        frame = 0
+        sel_x = sel_y = 0
+        logged_state = logged_time = None
+
+        # Varints below 0x80 are one byte, so most are read inline
+        while pos < end:
+            packed = data[pos]
+            pos += 1
+            if packed >= 0x80:
+                packed, pos = read(data, pos - 1)
+            x = data[pos]
+            pos += 1
+            if x >= 0x80:
+                x, pos = read(data, pos - 1)
+            y = data[pos]
+            pos += 1
+            if y >= 0x80:
+                y, pos = read(data, pos - 1)
+
+            frame += packed >> action_bits
+            if rendering:
+                while pending and pending[-1] < frame:
+                    self.render(board, sel_x, sel_y)
+                    on_render(pending.pop())
+
+            action = packed & action_mask
+            if action == MOVE:
+                sel_x, sel_y = x, y
+                if rendering:
+                    self.follow(board, x, y)
+            elif action == UNCOVER:
+                uncover_tile(x, y)
+            elif action == FLAG:
+                flag_tile(x, y)
+            elif action == CHORD:
+                chord_tile(x, y)
+            else:
+                logged_state, logged_time = x, y
+
+        # Frames after the last event show the final board
+        if rendering:
+            while pending and pending[-1] <= frame:
+                self.render(board, sel_x, sel_y)
+                on_render(pending.pop())
+
+        return board.game_state, logged_state, logged_time
+
+    # --- RENDERING ---
+
+    def get_display(self):
+        if self.display is None:
+            ms = self.ms
+            self.display = ms.MinesweeperDisplay(
+                0, ms.HUD_HEIGHT, ms.TILE_SIZE, ms.GRID_WIDTH, ms.GRID_HEIGHT
+            )
+        return self.display
+
+    def follow(self, board, x, y) -> None:
+        # The camera moves as MinesweeperDisplay.follow moves it, without drawing
+        display = self.display
+        display.camera_x = display.get_camera_axis(x, display.camera_x, display.view_width, board.width)
+        display.camera_y = display.get_camera_axis(y, display.camera_y, display.view_height, board.height)
+
+    def render(self, board, x, y) -> None:
+        """Draws the board view and selection. The HUD is not drawn, the
+        log holds frames, not the clock."""
+        display = self.display
+        display.invalidate()
+        display.scroll_to(board, display.camera_x, display.camera_y)
+        display.draw_selection_border(x, y)
+
+# =====================
+# HARNESS
+# =====================
+
+def record_games(backend, ms, games, seed, on_frame=None) -> list[bytes]:
+    """Plays games of random input through MinesweeperManager with a
+    ReplayRecorder attached. on_frame(game, frame) runs after each update."""
+    game = ms.game
+    keyboard, clock = backend.keyboard, backend.clock
+    game.recorder = ms.ReplayRecorder()
+
+    keys = (ms.KEY_UP, ms.KEY_DOWN, ms.KEY_LEFT, ms.KEY_RIGHT,
+            ms.KEY_TOOLBOX, ms.KEY_BACKSPACE, ms.KEY_OK)
+    weights = (4, 4, 4, 4, 2, 1, 1)
+    rng = random.Random(seed)
+    random.seed(seed)
+
+    logs = []
+    for number in range(games):
+        keyboard.release_all()
+        game.reset()
+
+        while True:
+            keyboard.release_all()
+            if rng.random() < 0.5:
+                keyboard.press(rng.choices(keys, weights)[0])
+            clock.advance(FRAME_TIME)
+            state = game.update()
+            if on_frame:
+                on_frame(number, game.recorder.frame)
+            if state != ms.ProgramState.GAME:
+                break
+
+        logs.append(game.recorder.logs[-1])
+
+    game.recorder = None
+    return logs
+
+def run_record(args):
+    backend = Backend()
+    ms = backend.load_game()
+    backend.framebuffer.write_pixels = False
+
+    start = time.perf_counter()
+    logs = record_games(backend, ms, args.games, args.seed)
+    wall = time.perf_counter() - start
+
+    write_logs(ms, args.file, logs)
+    total = sum(len(log) for log in logs)
+    print(f"recorded {len(logs)} games in {wall:.2f} s, {total} bytes, "
+          f"{total / len(logs):.1f} bytes/game -> {args.file}")
+
+def run_import(args):
+    """Collects the logs a RECORD game printed, from a copy of its console
+    output, into a replay file."""
+    ms = Backend().load_game()
+    prefix = ms.ReplayRecorder.TEXT_PREFIX
+
+    logs = []
+    for number, line in enumerate(Path(args.text).read_text().splitlines(), 1):
+        line = line.strip()
+        if not line.startswith(prefix):
+            continue
+        # A complete log decodes to its END event, a cut copy does not
+        try:
+            log = bytes.fromhex(line[len(prefix):])
+            events = list(ReplayLog(ms, log).events(ms))
+        except (ValueError, IndexError):
+            events = []
+        if not events or events[-1][1] != ms.ReplayRecorder.END:
+            raise ValueError(f"{args.text}:{number}: replay log cut short")
+        logs.append(log)
+    if not logs:
+        raise SystemExit("no '" + prefix.strip() + "' lines in " + args.text)
+
+    write_logs(ms, args.file, logs)
+    print(f"imported {len(logs)} games, {sum(len(log) for log in logs)} bytes -> {args.file}")
+
+def run_play(args):
+    backend = Backend()
+    ms = backend.load_game()
+    engine = ReplayEngine(ms)
+    log = ReplayLog(ms, read_logs(ms, args.file)[args.game])
+
+    out = Path(args.out)
+    if args.render:
+        out.mkdir(parents=True, exist_ok=True)
+
+    def save(frame):
+        framebuffer = backend.framebuffer
+        path = out / f"game{args.game}_frame{frame}.ppm"
+        header = f"P6 {framebuffer.width} {framebuffer.height} 255\n".encode()
+        path.write_bytes(header + bytes(framebuffer.pixels))
+        print(f"frame {frame} -> {path}")
+
+    state, logged_state, logged_time = engine.play(log, args.render, save)
+    events = sum(1 for _ in log.events(ms))
+    print(f"{log.width}x{log.height}, {log.mine_amount} mines, seed {log.seed}, {events} events")
+    print(f"state {state}, logged {logged_state}, time taken {logged_time} s")
+
+def run_bench(args):
+    ms = Backend().load_game()
+    engine = ReplayEngine(ms)
+    logs = [ReplayLog(ms, data) for data in read_logs(ms, args.file)]
+    events = [sum(1 for _ in log.events(ms)) for log in logs]
+
+    # Cycles through the file's logs until args.games games are played
+    start = time.perf_counter()
+    played = mismatched = played_events = 0
+    while played < args.games:
+        for log, count in zip(logs, events):
+            state, logged_state, _ = engine.play(log)
+            mismatched += state != logged_state
+            played_events += count
+            played += 1
+            if played == args.games:
+                break
+    wall = time.perf_counter() - start
+
+    total = sum(len(log.data) for log in logs)
+    print(f"{played} games from {len(logs)} logs, {total / len(logs):.1f} bytes/game")
+    print(f"wall           {wall:>10.2f} s")
+    print(f"games/sec      {played / wall:>10.0f}")
+    print(f"events/sec     {played_events / wall:>10.0f}")
+    print(f"mismatched     {mismatched:>10}")
+
+def run_verify(args):
+    """Records games while saving the live screen at random frames, then
+    replays them and compares outcomes and the board area of the screen."""
+    backend = Backend()
+    ms = backend.load_game()
+    framebuffer = backend.framebuffer
+    rng = random.Random(args.seed)
+
+    # Board rows of the screen, below the HUD
+    board_start = ms.HUD_HEIGHT * framebuffer.width * 3
+    live = {}
+
+    def snapshot(number, frame):
+        if rng.random() < 0.05:
+            live[(number, frame)] = bytes(framebuffer.pixels[board_start:])
+
+    logs = [ReplayLog(ms, data) for data in record_games(backend, ms, args.games, args.seed, snapshot)]
+    engine = ReplayEngine(ms)
+
+    for number, log in enumerate(logs):
+        frames = [frame for n, frame in live if n == number]
+
+        def compare(frame):
+            replayed = bytes(framebuffer.pixels[board_start:])
+            assert replayed == live[(number, frame)], f"game {number} frame {frame} differs"
+
+        state, logged_state, _ = engine.play(log, frames, compare)
+        assert state == logged_state, f"game {number} ends in {state}, logged {logged_state}"
+
+    print(f"{len(logs)} games, {len(live)} frames match the live game")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded games")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record games of random input")
+    record.add_argument("file")
+    record.add_argument("--games", type=int, default=500)
+    record.add_argument("--seed", type=int, default=0)
+    record.set_defaults(run=run_record)
+
+    load = commands.add_parser("import", help="collect logs printed by the game into a replay file")
+    load.add_argument("text", help="console output of a game played with RECORD on")
+    load.add_argument("file")
+    load.set_defaults(run=run_import)
+
+    play = commands.add_parser("play", help="replay one game, saving frames as PPM")
+    play.add_argument("file")
+    play.add_argument("--game", type=int, default=0)
+    play.add_argument("--render", type=int, nargs="*", default=[], metavar="FRAME",
+        help="frames to save, those after the game ended are skipped")
+    play.add_argument("--out", default="frames")
+    play.set_defaults(run=run_play)
+
+    bench = commands.add_parser("bench", help="replay games at full speed")
+    bench.add_argument("file")
+    bench.add_argument("--games", type=int, default=10000)
+    bench.set_defaults(run=run_bench)
+
+    verify = commands.add_parser("verify", help="check replays against the live game")
+    verify.add_argument("--games", type=int, default=200)
+    verify.add_argument("--seed", type=int, default=0)
+    verify.set_defaults(run=run_verify)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
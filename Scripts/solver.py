@@ -0,0 +1,286 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from headless import Backend
+
+# =====================
+# SOLVER
+# =====================
+# Plays MinesweeperBoard through uncover_tile and flag_tile only, and
+# follows the board through its change sets. Each turn it applies every
+# deduction available on the frontier, and guesses with the configured
+# policy when there is none.
+#
+#   python solver.py [--games N] [--width W] [--height H] [--mines M]
+#                    [--policy P] [--processes N] [--seed S]
+
+GUESS_POLICIES = ("local", "corner", "random")
+
+class Constraint:
+    """An uncovered number: `mines` of the covered, unflagged `cells`
+    around it are mined."""
+
+    def __init__(self, cells: frozenset, mines: int):
+        self.cells = cells
+        self.mines = mines
+
+class Solver:
+    def __init__(self, board, Tile, GameState, policy="local", rng=None):
+        if policy not in GUESS_POLICIES:
+            raise ValueError("policy must be one of " + ", ".join(GUESS_POLICIES))
+
+        self.board = board
+        self.Tile = Tile
+        self.GameState = GameState
+        self.policy = policy
+        self.rng = rng or random.Random()
+
+        # Uncovered numbers that still touch covered, unflagged tiles
+        self.frontier = set()
+        self.moves = 0
+        self.guesses = 0
+
+        board.subscribe(self.on_change)
+
+    # --- BOARD ACCESS ---
+
+    def is_unknown(self, i) -> bool:
+        return not self.board.tiles[i] & (self.Tile.UNCOVERED | self.Tile.FLAGGED)
+
+    def get_constraint(self, i) -> Constraint:
+        tiles = self.board.tiles
+        Tile = self.Tile
+
+        cells = []
+        flagged = 0
+        for j in self.board.neighbors(i):
+            if tiles[j] & Tile.FLAGGED:
+                flagged += 1
+            elif not tiles[j] & Tile.UNCOVERED:
+                cells.append(j)
+
+        return Constraint(frozenset(cells), (tiles[i] & Tile.MINE_COUNT_MASK) - flagged)
+
+    def on_change(self, change) -> None:
+        """Adds the numbers a ChangeSet uncovers to the frontier."""
+        if change.is_reset:
+            self.frontier.clear()
+            return
+
+        uncovered = self.Tile.UNCOVERED
+        count_mask = self.Tile.MINE_COUNT_MASK
+        new_states = change.new_states
+        for n, i in enumerate(change.indices):
+            if new_states[n] & uncovered and new_states[n] & count_mask:
+                self.frontier.add(i)
+
+    # --- MOVES ---
+
+    def uncover(self, i) -> None:
+        w = self.board.width
+        self.board.uncover_tile(i % w, i // w)
+        self.moves += 1
+
+    def flag(self, i) -> None:
+        w = self.board.width
+        self.board.flag_tile(i % w, i // w)
+        self.moves += 1
+
+    # --- DEDUCTION ---
+
+    def find_deductions(self) -> tuple[set, set]:
+        """Returns (safe, mined) cells provable from the frontier with
+        single-point and subset reasoning."""
+        constraints = {}
+        for i in list(self.frontier):
+            constraint = self.get_constraint(i)
+            if constraint.cells:
+                constraints[i] = constraint
+            else:
+                self.frontier.discard(i)
+
+        safe, mined = set(), set()
+
+        # Single point: a number already satisfied, or needing every cell
+        for constraint in constraints.values():
+            if constraint.mines == 0:
+                safe |= constraint.cells
+            elif constraint.mines == len(constraint.cells):
+                mined |= constraint.cells
+
+        if safe or mined:
+            return safe, mined
+
+        # Subset: A inside B leaves B - A with B.mines - A.mines mines.
+        # Only numbers sharing a cell can overlap, found through the cells
+        by_cell = {}
+        for i, constraint in constraints.items():
+            for cell in constraint.cells:
+                by_cell.setdefault(cell, []).append(i)
+
+        for i, a in constraints.items():
+            others = set()
+            for cell in a.cells:
+                others.update(by_cell[cell])
+            others.discard(i)
+
+            for k in others:
+                b = constraints[k]
+                if not a.cells < b.cells:
+                    continue
+
+                rest = b.cells - a.cells
+                rest_mines = b.mines - a.mines
+                if rest_mines == 0:
+                    safe |= rest
+                elif rest_mines == len(rest):
+                    mined |= rest
+
+        return safe, mined
+
+    # --- GUESSING ---
+
+    def guess(self) -> int:
+        board = self.board
+        unknown = [i for i in range(len(board.tiles)) if self.is_unknown(i)]
+
+        if self.policy == "random":
+            return self.rng.choice(unknown)
+
+        if self.policy == "corner":
+            w, h = board.width, board.height
+            corners = [0, w - 1, (h - 1) * w, h * w - 1]
+            open_corners = [i for i in corners if self.is_unknown(i)]
+            if open_corners:
+                return self.rng.choice(open_corners)
+            return self.rng.choice(unknown)
+
+        # "local": lowest risk estimated from the numbers around each cell,
+        # other cells share the mines the frontier does not account for
+        risk = {}
+        for i in self.frontier:
+            constraint = self.get_constraint(i)
+            if not constraint.cells:
+                continue
+            local = constraint.mines / len(constraint.cells)
+            for cell in constraint.cells:
+                risk[cell] = max(risk.get(cell, 0.0), local)
+
+        interior = [i for i in unknown if i not in risk]
+        if interior:
+            frontier_mines = sum(risk.values())
+            mines_left = max(board.flags_left - frontier_mines, 0.0)
+            interior_risk = mines_left / len(interior)
+        else:
+            interior_risk = 2.0
+
+        best = min(risk.values(), default=2.0)
+        if interior_risk < best:
+            return self.rng.choice(interior)
+
+        candidates = [cell for cell, value in risk.items() if value == best]
+        return self.rng.choice(sorted(candidates))
+
+    # --- GAME LOOP ---
+
+    def play(self, first_x=None, first_y=None) -> int:
+        """Plays until the game ends, returns the final GameState."""
+        board = self.board
+        playing = self.GameState.PLAYING
+
+        if first_x is None:
+            first_x, first_y = board.width // 2, board.height // 2
+        self.uncover(first_y * board.width + first_x)
+
+        while board.game_state == playing:
+            safe, mined = self.find_deductions()
+
+            for i in mined:
+                if self.is_unknown(i):
+                    self.flag(i)
+            for i in safe:
+                if self.is_unknown(i) and board.game_state == playing:
+                    self.uncover(i)
+
+            if not safe and not mined and board.game_state == playing:
+                self.guesses += 1
+                self.uncover(self.guess())
+
+        return board.game_state
+
+# =====================
+# HARNESS
+# =====================
+
+worker_game = None
+
+def init_worker():
+    global worker_game
+    worker_game = Backend().load_game()
+
+def play_games(task) -> tuple[int, int, int, int, float]:
+    """Plays one chunk of seeded games in a worker process. Returns
+    (games, wins, moves, guesses, seconds spent playing)."""
+    seeds, width, height, mine_amount, policy = task
+    ms = worker_game
+
+    wins = moves = guesses = 0
+    start = time.perf_counter()
+
+    for seed in seeds:
+        # The board draws its mines from the global random module
+        random.seed(seed)
+        board = ms.MinesweeperBoard(width, height, mine_amount)
+        solver = Solver(board, ms.Tile, ms.GameState, policy, random.Random(seed))
+
+        if solver.play() == ms.GameState.WON:
+            wins += 1
+        moves += solver.moves
+        guesses += solver.guesses
+
+    return len(seeds), wins, moves, guesses, time.perf_counter() - start
+
+def run(games, width, height, mine_amount, policy, processes, seed, chunk_size=50):
+    seeds = list(range(seed, seed + games))
+    tasks = [
+        (seeds[start:start + chunk_size], width, height, mine_amount, policy)
+        for start in range(0, games, chunk_size)
+    ]
+
+    total_games = wins = moves = guesses = 0
+    play_time = 0.0
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(play_games, tasks):
+            total_games += result[0]
+            wins += result[1]
+            moves += result[2]
+            guesses += result[3]
+            play_time += result[4]
+    wall = time.perf_counter() - start
+
+    print(f"{total_games} games {width}x{height}, {mine_amount} mines, "
+          f"policy {policy}, {processes} processes")
+    print(f"games/sec      {total_games / wall:>10.1f}")
+    print(f"win rate       {wins / total_games:>10.1%}")
+    print(f"guesses/game   {guesses / total_games:>10.2f}")
+    print(f"time per move  {play_time / max(moves, 1) * 1e6:>10.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Solver load test")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--width", type=int, default=16)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--mines", type=int, default=25)
+    parser.add_argument("--policy", choices=GUESS_POLICIES, default="local")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.games, args.width, args.height, args.mines, args.policy, args.processes, args.seed)
+
+if __name__ == "__main__":
+    main()